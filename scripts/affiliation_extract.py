@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Affiliation candidates extracted from citing-paper venue and snippet text.
+When no cached affiliation exists, the SerpAPI scripts fall back to pulling
+an institution name out of "venue snippet". Each script used to run its own,
+slightly different, uncompiled regex per paper and keep only the first hit.
+AffiliationExtractor compiles one pattern and runs it once over a batch of
+distinct texts joined together. Every match becomes a candidate with its
+span and, when given the coordinate index, that index's hit. The affiliation
+picked is still the first candidate, as the per-paper regex returned.
+"""
+
+import bisect
+import re
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from affiliation_index import AffiliationMatch
+
+# A capitalized, comma-delimited phrase containing one of these words
+INSTITUTION_WORDS = ('University', 'Institute', 'College', 'Lab')
+
+# Joins a batch of texts; the pattern never matches across it
+SEPARATOR = '\x00'
+# Distinct texts whose candidates are memoized, least recently used evicted first
+DEFAULT_MAXSIZE = 4096
+
+
+class AffiliationCandidate(NamedTuple):
+    text: str                           # the extracted affiliation
+    start: int                          # its span in the source text
+    end: int
+    location: Optional[AffiliationMatch]  # coordinate index hit, if an index was given
+
+
+class AffiliationExtractor:
+    """Memoized, batched institution-name extraction from free text"""
+
+    def __init__(self, index=None, words=INSTITUTION_WORDS, maxsize=DEFAULT_MAXSIZE):
+        self.index = index
+        self.maxsize = maxsize
+        self.pattern = re.compile(
+            rf"[A-Z][^,{SEPARATOR}]+(?:{'|'.join(map(re.escape, words))})[^,{SEPARATOR}]*")
+        self._candidates = OrderedDict()  # text -> tuple of AffiliationCandidate, in LRU order
+        self.stats = {'texts': 0, 'scanned': 0, 'candidates': 0, 'located': 0, 'evictions': 0}
+
+    def _candidate(self, text, start, end):
+        raw = text[start:end]
+        affiliation = raw.strip()
+        start += len(raw) - len(raw.lstrip())
+        location = self.index.lookup(affiliation) if self.index is not None else None
+        self.stats['candidates'] += 1
+        if location:
+            self.stats['located'] += 1
+        return AffiliationCandidate(affiliation, start, start + len(affiliation), location)
+
+    def extract_batch(self, texts):
+        """Candidates for each text, in text order; each distinct text is scanned once"""
+        texts = [t or '' for t in texts]
+        self.stats['texts'] += len(texts)
+        pending = [t for t in dict.fromkeys(texts) if t not in self._candidates]
+        if pending:
+            self.stats['scanned'] += len(pending)
+            offsets = []
+            position = 0
+            for text in pending:
+                offsets.append(position)
+                position += len(text) + len(SEPARATOR)
+            found = [[] for _ in pending]
+            for m in self.pattern.finditer(SEPARATOR.join(pending)):
+                i = bisect.bisect_right(offsets, m.start()) - 1
+                found[i].append(self._candidate(pending[i], m.start() - offsets[i], m.end() - offsets[i]))
+            for text, candidates in zip(pending, found):
+                self._candidates[text] = tuple(candidates)
+        result = [self._candidates[t] for t in texts]
+        for text in dict.fromkeys(texts):
+            self._candidates.move_to_end(text)
+        while len(self._candidates) > self.maxsize:
+            self._candidates.popitem(last=False)
+            self.stats['evictions'] += 1
+        return result
+
+    def candidates(self, text):
+        return self.extract_batch([text])[0]
+
+    def best(self, text):
+        """The first candidate in text, or None"""
+        return self.pick(self.candidates(text))
+
+    @staticmethod
+    def pick(candidates):
+        return candidates[0] if candidates else None
+
+    def summary(self):
+        return (f"{self.stats['texts']} texts, {self.stats['scanned']} distinct scanned, "
+                f"{self.stats['candidates']} candidates, {self.stats['located']} with coordinates")
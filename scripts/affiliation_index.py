@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Prefix-trie index from institution aliases to coordinates.
+The scripts used to resolve an affiliation by testing every key of the
+university (and country) coordinate table as a substring, in table order.
+AffiliationIndex compiles all the keys into one trie-shaped regex that is run
+once over the affiliation, so the cost grows with the length of the text
+rather than the number of institutions, and it reports where the alias
+matched and how much to trust it.
+"""
+
+import bisect
+import re
+from typing import Any, NamedTuple
+
+from venue_classifier import _trie
+
+# Confidence multiplier for a match that starts or ends inside a word
+# ('mit' in 'smith'), which the substring scans always accepted
+PARTIAL_WORD_CONFIDENCE = 0.5
+
+
+class AffiliationMatch(NamedTuple):
+    key: str            # the table alias that matched
+    value: Any          # its table entry, e.g. {'lat', 'lng', 'country', 'city'}
+    start: int          # span of the alias in the lowercased affiliation
+    end: int
+    confidence: float   # table weight, halved for matches inside a word
+    rank: int           # table priority: lower wins, as in the old first-match scans
+
+
+class AffiliationIndex:
+    """Substring index over the keys of one or more lookup tables
+
+    Tables are given in priority order, optionally with a weight each (e.g.
+    1.0 for institutions, 0.6 for a bare country). lookup() returns what the
+    legacy scan returned: the earliest key in table order that occurs
+    anywhere in the lowercased text.
+    """
+
+    def __init__(self, *tables, weights=None):
+        weights = weights or [1.0] * len(tables)
+        self.entries = []  # rank -> (key, value, weight)
+        ranks = {}
+        for table, weight in zip(tables, weights):
+            for key, value in table.items():
+                key = key.lower()
+                if key and key not in ranks:
+                    ranks[key] = len(self.entries)
+                    self.entries.append((key, value, weight))
+
+        # The lookahead reports the longest key starting at each position; the
+        # shorter keys that are prefixes of it match there too, so each key
+        # stands for the best-ranked of its prefixes
+        self.best_prefix = {}
+        for key in ranks:
+            prefixes = [key[:i] for i in range(1, len(key) + 1) if key[:i] in ranks]
+            self.best_prefix[key] = min(ranks[p] for p in prefixes)
+        self.pattern = re.compile(f'(?=({_trie(ranks)}))' if ranks else '(?!)')
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _hits(self, text):
+        """(rank, start) of the best key starting at each matching position"""
+        return [(self.best_prefix[m.group(1)], m.start()) for m in self.pattern.finditer(text)]
+
+    def _match(self, text, rank, start):
+        key, value, weight = self.entries[rank]
+        end = start + len(key)
+        whole_word = ((start == 0 or not text[start - 1].isalnum())
+                      and (end == len(text) or not text[end].isalnum()))
+        confidence = weight if whole_word else weight * PARTIAL_WORD_CONFIDENCE
+        return AffiliationMatch(key, value, start, end, confidence, rank)
+
+    def lookup(self, text):
+        """Highest-priority match anywhere in text, or None"""
+        if not text:
+            return None
+        text = text.lower()
+        hits = self._hits(text)
+        return self._match(text, *min(hits)) if hits else None
+
+    def lookup_word(self, text):
+        """Highest-priority match that starts and ends on word boundaries, or None
+
+        For short aliases that read as parts of other words ('cisco' in
+        'san francisco').
+        """
+        if not text:
+            return None
+        text = text.lower()
+        for rank, start in sorted(self._hits(text)):
+            match = self._match(text, rank, start)
+            if match.confidence == self.entries[rank][2]:
+                return match
+        return None
+
+    def lookup_parts(self, text, separators=',|'):
+        """Best match in the first separator-delimited part that has one
+
+        Gives the same result as looking up each part of the text in turn and
+        then the whole text, from a single scan.
+        """
+        if not text:
+            return None
+        text = text.lower()
+        hits = self._hits(text)
+        if not hits:
+            return None
+        # Part p runs up to the separator at bounds[p]; a key crossing a
+        # separator only counts for the whole text
+        bounds = [i for i, ch in enumerate(text) if ch in separators] + [len(text)]
+        best = None
+        for rank, start in hits:
+            part = bisect.bisect_left(bounds, start)
+            if bounds[part] >= start + len(self.entries[rank][0]) and (best is None or (part, rank) < best[:2]):
+                best = (part, rank, start)
+        return self._match(text, *best[1:]) if best else self._match(text, *min(hits))
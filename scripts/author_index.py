@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Author identity index across Scholar IDs, display names and abbreviations.
+The CitationMap pickles key citing authors by Scholar ID, its CSV and
+affiliation tuples use display names ("AKRAM SHERIFF") and SerpAPI returns
+abbreviated names ("VS Narajala"). AuthorIndex resolves all three to one
+interned author ID with hashed lookups: names are reduced to their
+self_citation canonical form, and every name also registers its initials and
+dropped-middle-name variants, so an abbreviation resolves to the one fuller
+spelling it can stand for.
+"""
+
+import sys
+from collections import defaultdict
+
+from self_citation import canonical_name, name_variants
+
+
+def completeness(key):
+    """Sort key putting spelled-out names before initials and short forms"""
+    tokens = key.split()
+    return -sum(len(t) > 1 for t in tokens), -len(tokens)
+
+
+class AuthorIndex:
+    """Canonical author IDs for author names and Scholar IDs
+
+    An author's ID is its Scholar ID when the first sighting had one, else
+    'name:' plus the canonical form of the name. Names given to the
+    constructor are registered most complete first, so abbreviations among
+    them resolve to the full names; a name first seen later by resolve() can
+    only join authors registered before it. An abbreviation that fits more
+    than one author keeps an ID of its own.
+    """
+
+    def __init__(self, names=()):
+        self._by_key = {}                  # canonical name -> author id
+        self._by_scholar_id = {}           # Scholar ID -> author id
+        self._variants = defaultdict(set)  # name variant -> ids of authors it can stand for
+        self.names = {}                    # author id -> first spelling seen
+        self.stats = {'lookups': 0, 'abbreviations': 0, 'ambiguous': 0}
+        spellings = {}
+        for name in names:
+            key = canonical_name(name) if name else ''
+            if key and key not in spellings:
+                spellings[key] = name
+        for key in sorted(spellings, key=completeness):
+            self.resolve(spellings[key])
+        self.stats['lookups'] = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def _from_variant(self, key):
+        ids = self._variants.get(key)
+        if not ids:
+            return None
+        if len(ids) > 1:
+            self.stats['ambiguous'] += 1
+            return None
+        self.stats['abbreviations'] += 1
+        return next(iter(ids))
+
+    def resolve(self, name, scholar_id=None):
+        """Author ID for a name and/or Scholar ID, or None if both are empty"""
+        self.stats['lookups'] += 1
+        key = canonical_name(name) if name else ''
+        author_id = self._by_scholar_id.get(scholar_id) if scholar_id else None
+        if author_id is None and key:
+            author_id = self._by_key.get(key) or self._from_variant(key)
+        if author_id is None:
+            if not (key or scholar_id):
+                return None
+            author_id = sys.intern(scholar_id or f'name:{key}')
+            self.names[author_id] = name or scholar_id
+
+        if scholar_id:
+            self._by_scholar_id.setdefault(scholar_id, author_id)
+        if key and key not in self._by_key:
+            self._by_key[key] = author_id
+            for variant in name_variants(key):
+                self._variants[variant].add(author_id)
+        return author_id
+
+    def summary(self):
+        return (f"{len(self)} authors from {self.stats['lookups']} lookups, "
+                f"{self.stats['abbreviations']} abbreviated spellings resolved, "
+                f"{self.stats['ambiguous']} ambiguous")
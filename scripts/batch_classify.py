@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Column-wise classification for the CitationMap CSV merge scripts.
+Instead of classifying venue, affiliation and author inside the per-row loop,
+the scripts hand over whole columns: every distinct value is classified once
+and the results are scattered back to row order (factorize/take, as in
+NumPy), so the row loop only indexes into precomputed arrays.
+"""
+
+TIER_SCORES = {'tier1': 50, 'tier2': 35, 'preprint': 10, 'other': 20}
+
+
+def factorize(values):
+    """Return (codes, uniques): uniques in first-seen order, codes[i] indexes values[i]"""
+    index = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    return codes, list(index)
+
+
+def map_unique(fn, values):
+    """[fn(v) for v in values], calling fn once per distinct value"""
+    codes, uniques = factorize(values)
+    results = [fn(value) for value in uniques]
+    return [results[code] for code in codes]
+
+
+class BatchClassifier:
+    """Bundles a script's row classifiers behind one classify_batch call
+
+    get_venue_tier is required; the other classifiers are optional and their
+    columns come back as None/False when missing.
+    """
+
+    def __init__(self, get_venue_tier, is_prestigious=None, is_self_citation=None, get_coords=None,
+                 tier_scores=TIER_SCORES):
+        self.get_venue_tier = get_venue_tier
+        self.is_prestigious = is_prestigious
+        self.is_self_citation = is_self_citation
+        self.get_coords = get_coords
+        self.tier_scores = tier_scores
+
+    def classify_batch(self, venues, affiliations=None, authors=None):
+        """Classify parallel columns, returning a dict of parallel lists
+
+        tier and venueScore come from venues; isPrestigious is set if either the
+        affiliation or the venue is prestigious; coords come from affiliations
+        and isSelfCitation from authors.
+        """
+        n = len(venues)
+        affiliations = affiliations if affiliations is not None else [''] * n
+        authors = authors if authors is not None else [''] * n
+
+        tiers = map_unique(self.get_venue_tier, venues)
+        columns = {
+            'tier': tiers,
+            'venueScore': [self.tier_scores[tier] for tier in tiers],
+            'isPrestigious': [False] * n,
+            'isSelfCitation': [False] * n,
+            'coords': [None] * n,
+        }
+        if self.is_prestigious:
+            by_affiliation = map_unique(self.is_prestigious, affiliations)
+            by_venue = map_unique(self.is_prestigious, venues)
+            columns['isPrestigious'] = [a or v for a, v in zip(by_affiliation, by_venue)]
+        if self.is_self_citation:
+            columns['isSelfCitation'] = map_unique(self.is_self_citation, authors)
+        if self.get_coords:
+            # Rows get their own copy; callers annotate coordinate dicts in place
+            columns['coords'] = [dict(c) if c else c for c in map_unique(self.get_coords, affiliations)]
+        return columns
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the single-pass venue classifier.
+Runs every script's get_venue_tier against the per-pattern implementation it
+replaced (sequential re.search or `any(p in venue ...)` over the same
+pattern_registry.json tables), checks both give identical tiers, and reports the speedup.
+
+Usage:
+    python3 benchmark_venue_classifier.py [--repeat 20]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from pattern_registry import load_pattern_registry
+from serpapi_standin import SYNTHETIC_VENUES
+
+# Modules whose tables are \b regexes; the rest match plain substrings
+REGEX_SCRIPTS = ['full_citation_refresh', 'merge_all_data', 'enhanced_citation_analysis']
+SUBSTRING_SCRIPTS = [
+    'convert_citation_cache', 'convert_citationmap_csv', 'fetch_citations_gh',
+    'merge_citation_data', 'quick_venue_fetch',
+]
+
+
+def legacy_regex_tier(venue, table):
+    if not venue:
+        return 'other'
+    v = venue.lower()
+    for tier in ('preprint', 'tier1', 'tier2'):
+        for pattern in table[tier]:
+            if re.search(pattern, v):
+                return tier
+    return 'other'
+
+
+def legacy_substring_tier(venue, table):
+    if not venue:
+        return 'other'
+    v = venue.lower()
+    if any(p in v for p in table['preprint']):
+        return 'preprint'
+    if any(p in v for p in table['tier1']):
+        return 'tier1'
+    if any(p in v for p in table['tier2']):
+        return 'tier2'
+    return 'other'
+
+
+def load_venues():
+    """Venue strings from the committed citations.json plus synthetic ones"""
+    venues = [v.format(n=n) for n, v in enumerate(SYNTHETIC_VENUES)]
+    citations_path = Path(__file__).parent.parent / 'src' / 'data' / 'citations.json'
+    if citations_path.exists():
+        with open(citations_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        venues += [p.get('venue', '') for p in data.get('citingPapers', [])]
+        venues += [p.get('venue', '') for p in data.get('publications', [])]
+    # Cases where a lower-priority match comes before a higher-priority one
+    venues += [
+        'Proceedings of the IEEE workshop, arXiv preprint',
+        'Journal of Systems, ACM',
+        'Springer thesis repository',
+        '',
+    ]
+    return venues
+
+
+def timed(fn, venues, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for venue in venues:
+            fn(venue)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the venue classifier against the legacy matchers')
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the venue corpus per timing')
+    args = parser.parse_args(argv)
+
+    # Two scripts refuse to import without a key; nothing here calls the API
+    os.environ.setdefault('SERPAPI_KEY', 'benchmark')
+    venues = load_venues()
+    patterns = load_pattern_registry()
+    print(f"{len(venues)} venue strings x {args.repeat} passes\n")
+    print(f"{'script':<30} {'legacy':>9} {'compiled':>9} {'speedup':>8}  result")
+
+    failures = 0
+    for name in REGEX_SCRIPTS + SUBSTRING_SCRIPTS:
+        module = importlib.import_module(name)
+        if name in REGEX_SCRIPTS:
+            legacy, table = legacy_regex_tier, patterns['venue_tiers_word']
+        else:
+            legacy, table = legacy_substring_tier, patterns['venue_tiers_substring']
+        old = lambda v: legacy(v, table)
+        if name == 'enhanced_citation_analysis':
+            new = lambda v: module.get_venue_tier('', v)
+            old = lambda v: legacy(f" {v} ", table)
+        else:
+            new = module.get_venue_tier
+
+        mismatches = [v for v in venues if old(v) != new(v)]
+        failures += len(mismatches)
+        legacy_time = timed(old, venues, args.repeat)
+        compiled_time = timed(new, venues, args.repeat)
+        result = 'identical' if not mismatches else f"{len(mismatches)} MISMATCHES, e.g. {mismatches[0]!r}"
+        print(f"{name:<30} {legacy_time * 1000:>7.1f}ms {compiled_time * 1000:>7.1f}ms "
+              f"{legacy_time / compiled_time:>7.1f}x  {result}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Build gazetteer.bin, the offline place table gazetteer.py memory-maps.
+Places come from, most trusted first: the pattern_registry.json institution
+and country coordinates, affiliations Nominatim has placed before (the
+geocode cache), the cities CitationMap geocoded in citation_info.csv and,
+optionally, a GeoNames cities dump
+(https://download.geonames.org/export/dump/, e.g. cities15000.txt) for
+world-wide city coverage. A name is kept for the first place that claims it.
+CitationMap's per-author coordinates are too noisy to place institutions
+(a row's affiliation may list several), so its affiliations are not indexed.
+
+Usage:
+    python3 build_gazetteer.py [--geonames cities15000.txt [--country-info countryInfo.txt]]
+"""
+
+import argparse
+import csv
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from affiliation_extract import INSTITUTION_WORDS
+from gazetteer import (CITATIONMAP, CITY, COUNTRY, GAZETTEER_PATH, GEOCODED, GEONAMES, INSTITUTION, REGISTRY,
+                       Gazetteer, name_tokens, write_gazetteer)
+from geocode_cache import CACHE_PATH, GeocodeCache
+from pattern_registry import load_pattern_registry
+
+INSTITUTION_TOKENS = {word.casefold() for word in INSTITUTION_WORDS}
+# Words that name a kind of institution or a field rather than one place;
+# a name made only of these and institution words ("university of
+# technology", "national institute of science") fits many places
+GENERIC_TOKENS = INSTITUTION_TOKENS | {
+    'of', 'and', 'for', 'the', 'in', 'at', 'de',
+    'national', 'state', 'international', 'federal', 'public', 'private', 'open', 'central',
+    'school', 'faculty', 'department', 'dept', 'center', 'centre', 'laboratory', 'laboratories', 'research',
+    'academy', 'polytechnic', 'graduate', 'higher', 'education',
+    'science', 'sciences', 'technology', 'technologies', 'engineering', 'computer', 'computing',
+    'information', 'applied', 'advanced', 'medical', 'medicine', 'health', 'business', 'management',
+    'studies', 'arts', 'mathematics', 'physics', 'data', 'ai', 'artificial', 'intelligence',
+}
+
+
+def institution_names(affiliation):
+    """The parts of a free-text affiliation that name an institution
+
+    "Associate Professor, MIT Media Lab" should place "mit media lab", not
+    every affiliation that mentions an associate professor, so only parts
+    with an institution word or written as an acronym are kept, and generic
+    names such as "University of Science" are dropped.
+    """
+    names = []
+    for part in affiliation.replace('|', ',').split(','):
+        part = part.strip()
+        tokens = name_tokens(part)
+        if not tokens or GENERIC_TOKENS.issuperset(tokens):
+            continue
+        if INSTITUTION_TOKENS.intersection(tokens) or (part.isupper() and len(part) > 2):
+            names.append(part)
+    return names
+
+
+def registry_places(patterns):
+    for key, coords in patterns['university_coords'].items():
+        yield [key], coords['lat'], coords['lng'], coords['country'], coords.get('city', ''), INSTITUTION, REGISTRY
+    for key, coords in patterns['country_coords'].items():
+        yield [key], coords['lat'], coords['lng'], coords['country'], '', COUNTRY, REGISTRY
+
+
+def geocode_cache_places(cache):
+    for affiliation, coords in cache.positives():
+        names = institution_names(affiliation)
+        if names:
+            yield (names, coords['lat'], coords['lng'], coords.get('country', ''), coords.get('city', ''),
+                   INSTITUTION, GEOCODED)
+
+
+def csv_places(csv_path, excluded_countries):
+    """(city, country) pairs at the mean coordinates of their rows"""
+    cities = defaultdict(list)
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            try:
+                lat, lng = float(row['latitude']), float(row['longitude'])
+            except (TypeError, ValueError):
+                continue
+            country = row.get('country') or ''
+            if country in excluded_countries or not row.get('city'):
+                continue
+            cities[row['city'], country].append((lat, lng))
+    for (city, country), points in cities.items():
+        yield ([city], sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points),
+               country, city, CITY, CITATIONMAP)
+
+
+def geonames_places(cities_path, country_info_path=None):
+    """Cities from a GeoNames dump, most populous first so they win shared names"""
+    countries = {}
+    if country_info_path:
+        with open(country_info_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.startswith('#'):
+                    fields = line.rstrip('\n').split('\t')
+                    countries[fields[0]] = fields[4]
+    rows = []
+    with open(cities_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            population = int(fields[14]) if fields[14].isdigit() else 0
+            rows.append((population, fields[1], fields[2], float(fields[4]), float(fields[5]), fields[8]))
+    rows.sort(key=lambda row: -row[0])
+    for _, name, ascii_name, lat, lng, code in rows:
+        yield [name, ascii_name], lat, lng, countries.get(code, code), name, CITY, GEONAMES
+
+
+def main(argv=None):
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description='Build the offline gazetteer')
+    parser.add_argument('--output', default=GAZETTEER_PATH, help='gazetteer file to write')
+    parser.add_argument('--csv', default=script_dir / 'citation_info.csv', help='CitationMap CSV output')
+    parser.add_argument('--geonames', help='GeoNames cities file (cities15000.txt or similar)')
+    parser.add_argument('--country-info', help='GeoNames countryInfo.txt, for country names of the cities')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    patterns = load_pattern_registry()
+    excluded = set(patterns['excluded_countries'])
+
+    def sources():
+        yield from registry_places(patterns)
+        if CACHE_PATH.exists():
+            yield from geocode_cache_places(GeocodeCache())
+        if Path(args.csv).exists():
+            yield from csv_places(args.csv, excluded)
+        if args.geonames:
+            yield from (place for place in geonames_places(args.geonames, args.country_info)
+                        if place[3] not in excluded)
+
+    places, names = write_gazetteer(args.output, sources())
+    gazetteer = Gazetteer(args.output)
+    print(f"Wrote {places} places under {names} names ({gazetteer.max_words} words at most) "
+          f"to {args.output} in {time.time() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Streaming stages from fetched cites= pages to citing-paper records.
+Each stage is a generator over the previous one, so records flow through one
+at a time while later pages are still being fetched, and the location and
+venue aggregates are updated as records pass instead of in separate passes
+over the full list at the end.
+"""
+
+from collections import defaultdict
+
+from author_index import AuthorIndex
+from location_aggregate import LocationMap
+
+# Records built per classify() batch: one SerpAPI cites= page
+BATCH_SIZE = 10
+
+
+def flatten_pages(pages, fetched_counts):
+    """(cites_id, papers) pages -> (cites_id, paper), counting papers per publication"""
+    for cites_id, papers in pages:
+        fetched_counts[cites_id] += len(papers)
+        for paper in papers:
+            yield cites_id, paper
+
+
+def drop_self_citations(items, is_self_citation, stats):
+    for cites_id, paper in items:
+        if any(is_self_citation(a) for a in paper['authors']):
+            stats['self_citations'] += 1
+            continue
+        yield cites_id, paper
+
+
+def drop_duplicates(items, titles, stats):
+    """Keep the first record of every title cluster; titles is a TitleIndex and may be pre-seeded"""
+    for cites_id, paper in items:
+        if not titles.add(paper['title']):
+            stats['duplicates'] += 1
+            continue
+        yield cites_id, paper
+
+
+def classify(items, build_records, batch_size=BATCH_SIZE):
+    """build_records([(cites_id, paper), ...]) -> the citing-paper records written to citations.json
+
+    Called on batches of up to batch_size items, about a page at a time, so
+    per-batch work like affiliation extraction runs once per batch.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield from build_records(batch)
+            batch = []
+    if batch:
+        yield from build_records(batch)
+
+
+class CitationAggregate:
+    """Location and venue aggregates maintained one record at a time"""
+
+    def __init__(self, locate, authors=None):
+        self.locate = locate  # record -> (lat, lng, country, city) or None
+        self.authors = authors if authors is not None else AuthorIndex()
+        self.author_ids = set()
+        self.location_map = LocationMap()
+        self.tier_counts = {'tier1': 0, 'tier2': 0, 'other': 0, 'preprint': 0}
+        self.venue_counts = defaultdict(int)
+        self.country_counts = defaultdict(int)
+        self.prestigious_count = 0
+        self.total = 0
+
+    def add(self, paper):
+        self.total += 1
+        self.tier_counts[paper['tier']] += 1
+        if paper['venue']:
+            self.venue_counts[paper['venue']] += 1
+        if paper.get('country') and paper['country'] != 'Unknown':
+            self.country_counts[paper['country']] += 1
+        if paper.get('isPrestigious'):
+            self.prestigious_count += 1
+        for name in paper.get('authors', []):
+            author_id = self.authors.resolve(name)
+            if author_id:
+                self.author_ids.add(author_id)
+        self._add_location(paper)
+
+    def _add_location(self, paper):
+        located = self.locate(paper)
+        if not located:
+            return
+        lat, lng, country, city = located
+        try:
+            lat_f = float(lat)
+            lng_f = float(lng)
+        except (ValueError, TypeError):
+            return
+
+        self.location_map.add(lat_f, lng_f, country, city, paper['title'],
+                              paper.get('affiliations', []), rank=paper.get('influenceScore', 0))
+
+    def consume(self, records, sink):
+        """Aggregate each record on its way into sink (e.g. list.append)"""
+        for record in records:
+            self.add(record)
+            sink(record)
+
+    def locations(self):
+        return sorted(self.location_map.locations(), key=lambda x: x['count'], reverse=True)
+
+    def top_venues(self, n=15):
+        return sorted(self.venue_counts.items(), key=lambda x: x[1], reverse=True)[:n]
+
+    def top_countries(self, n=10):
+        return sorted(self.country_counts.items(), key=lambda x: x[1], reverse=True)[:n]
+
+    def stats(self):
+        """The citations.json stats block"""
+        tiers = self.tier_counts
+        return {
+            'totalCitations': self.total,
+            'uniqueLocations': len(self.location_map),
+            'topVenues': [{'name': v[0], 'count': v[1]} for v in self.top_venues()],
+            'influenceDistribution': {
+                'high': tiers['tier1'] + self.prestigious_count,
+                'medium': tiers['tier2'],
+                'low': tiers['other'] + tiers['preprint']
+            },
+            'tierDistribution': dict(tiers),
+            'topCountries': [{'name': c[0], 'count': c[1]} for c in self.top_countries()],
+            'prestigiousCount': self.prestigious_count,
+            'uniqueAuthors': len(self.author_ids)
+        }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Memoized classification for venue, affiliation and location lookups.
+The same venue strings and affiliations repeat hundreds of times across the
+CitationMap CSV and SerpAPI pages, so each script wraps its pure classifiers
+(get_venue_tier, is_prestigious, get_coords, ...) in a bounded LRU keyed on the
+lowercased input. The cache can be snapshotted to disk and reused by the next
+run; each classifier's entries are tagged with the registry hash of the tables
+it reads and dropped as soon as those tables change, leaving the others.
+"""
+
+import atexit
+import functools
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent / 'citation_cache' / 'classification'
+DEFAULT_MAXSIZE = 4096
+
+
+class ClassificationCache:
+    """Bounded LRU shared by the memoized classifiers of one script
+
+    Keys are (function name, lowercased arguments); every wrapped classifier
+    lowercases its input before matching, so that is the only normalization
+    that is safe to apply without changing results. Set CLASSIFY_NO_SNAPSHOT=1
+    to keep the cache in memory only.
+    """
+
+    def __init__(self, name, registry, maxsize=DEFAULT_MAXSIZE, cache_dir=CACHE_DIR, snapshot=True):
+        self.registry = registry
+        self.maxsize = maxsize
+        self.table_hashes = {}  # function name -> hash of the tables it reads
+        self.path = Path(cache_dir) / f'{name}.json'
+        self.snapshot = snapshot and not os.environ.get('CLASSIFY_NO_SNAPSHOT')
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'loaded': 0, 'invalidated': 0}
+        self._entries = OrderedDict()
+        self._snapshot_hashes = {}
+        if self.snapshot:
+            self._load()
+            atexit.register(self.save)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Entries are checked against the tables when their function is memoized
+        self._snapshot_hashes = snapshot.get('tableHashes', {})
+        for function, key, value in snapshot.get('entries', [])[-self.maxsize:]:
+            self._entries[(function, key)] = value
+        self.stats['loaded'] = len(self._entries)
+
+    def _invalidate(self, name):
+        stale = [key for key in self._entries if key[0] == name]
+        for key in stale:
+            del self._entries[key]
+        self.stats['loaded'] -= len(stale)
+        self.stats['invalidated'] += len(stale)
+
+    def save(self):
+        """Write the current entries, least recently used first"""
+        if not self.snapshot or not self._entries:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'tableHashes': self.table_hashes,
+                'entries': [[function, key, value] for (function, key), value in self._entries.items()
+                            if function in self.table_hashes],
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def memoize(self, *tables):
+        """Decorator caching fn(*texts) on its lowercased arguments
+
+        tables names the registry tables fn reads; its snapshot entries are
+        discarded when any of them has changed.
+        """
+        def decorator(fn):
+            name = fn.__name__
+            self.table_hashes[name] = self.registry.hash(*tables)
+            if self._snapshot_hashes.get(name) != self.table_hashes[name]:
+                self._invalidate(name)
+
+            @functools.wraps(fn)
+            def wrapper(*texts):
+                if not any(texts):
+                    return fn(*texts)
+                key = (name, '\x1f'.join('\x00' if t is None else str(t).lower() for t in texts))
+                try:
+                    value = self._entries[key]
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                except KeyError:
+                    self.stats['misses'] += 1
+                    value = fn(*texts)
+                    self._entries[key] = value
+                    if len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self.stats['evictions'] += 1
+                # Callers may annotate returned coordinate dicts
+                return dict(value) if isinstance(value, dict) else value
+
+            wrapper.cache = self
+            return wrapper
+
+        return decorator
+
+    def summary(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups * 100 if lookups else 0.0
+        line = (f"{self.stats['hits']} hits / {lookups} lookups ({rate:.0f}%), "
+                f"{len(self._entries)} entries, {self.stats['evictions']} evictions")
+        if self.stats['loaded']:
+            line += f", {self.stats['loaded']} loaded from snapshot"
+        if self.stats['invalidated']:
+            line += f", {self.stats['invalidated']} snapshot entries discarded (pattern tables changed)"
+        return line
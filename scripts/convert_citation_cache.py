@@ -13,6 +13,17 @@ import time
 import math
 from pathlib import Path
 
+from author_index import AuthorIndex
+from classification_cache import ClassificationCache
+from gazetteer import load_gazetteer
+from geocode_batch import GeocodeBatch, RateLimitedGeocoder, nominatim_limiter
+from geocode_cache import GeocodeCache, normalize_affiliation
+from location_aggregate import LocationMap
+from pattern_registry import load_pattern_registry
+from self_citation import load_self_citation_matcher
+from spatial_index import FINE_LOCATION_DECIMALS, cluster_layers
+from title_index import TitleIndex
+
 # Try to import geopy, but make it optional
 try:
     from geopy.geocoders import Nominatim
@@ -22,182 +33,33 @@ except ImportError:
     GEOPY_AVAILABLE = False
     print("Note: geopy not installed, using predefined coordinates only")
 
-# Your name patterns to filter out self-citations
-SELF_NAMES = [
-    'vineeth sai', 
-    'vs narajala', 
-    'vineeth sai narajala', 
-    'v. s. narajala', 
-    'narajala, v',
-    'narajala, vineeth',
-    'v s narajala',
-    'vineeth narajala',
-    'narajala vs',
-    'narajala vineeth'
-]
-
-# Tier 1: Top-tier peer-reviewed venues (IEEE, ACM, USENIX, major security conferences)
-TIER1_PATTERNS = [
-    'ieee', 'acm', 'usenix', 'ndss', 'ccs', 's&p', 'sp ', 'infocom',
-    'security', 'oakland', 'crypto', 'eurocrypt', 'asiacrypt',
-    'acsac', 'esorics', 'wisec', 'uss ', 'isca', 'micro', 'hpca',
-    'sigcomm', 'mobicom', 'nsdi', 'sosp', 'osdi', 'eurosys',
-    'pldi', 'popl', 'icse', 'fse', 'ase', 'issta', 'sigmod', 'vldb',
-    'transactions on', 'ieee access', 'ieee communications', 
-    'ieee network', 'ieee transactions'
-]
-
-# Tier 2: Other peer-reviewed venues
-TIER2_PATTERNS = [
-    'springer', 'elsevier', 'nature', 'science', 'plos', 'jstor',
-    'wiley', 'taylor & francis', 'mdpi', 'sensors', 'electronics',
-    'journal of', 'international journal', 'conference on', 
-    'symposium on', 'workshop on', 'proceedings', 'applied sciences'
-]
-
-# Preprints
-PREPRINT_PATTERNS = ['arxiv', 'preprint', 'ssrn', 'biorxiv', 'medrxiv', 'techrxiv']
-
-# Predefined university coordinates (fallback when geocoding is unavailable or fails)
-UNIVERSITY_COORDS = {
-    # USA
-    'stanford': {'lat': 37.4275, 'lng': -122.1697, 'country': 'United States'},
-    'mit': {'lat': 42.3601, 'lng': -71.0942, 'country': 'United States'},
-    'massachusetts institute': {'lat': 42.3601, 'lng': -71.0942, 'country': 'United States'},
-    'berkeley': {'lat': 37.8719, 'lng': -122.2585, 'country': 'United States'},
-    'carnegie mellon': {'lat': 40.4432, 'lng': -79.9428, 'country': 'United States'},
-    'georgia tech': {'lat': 33.7756, 'lng': -84.3963, 'country': 'United States'},
-    'georgia institute': {'lat': 33.7756, 'lng': -84.3963, 'country': 'United States'},
-    'harvard': {'lat': 42.3770, 'lng': -71.1167, 'country': 'United States'},
-    'princeton': {'lat': 40.3431, 'lng': -74.6551, 'country': 'United States'},
-    'cornell': {'lat': 42.4534, 'lng': -76.4735, 'country': 'United States'},
-    'purdue': {'lat': 40.4237, 'lng': -86.9212, 'country': 'United States'},
-    'michigan': {'lat': 42.2780, 'lng': -83.7382, 'country': 'United States'},
-    'illinois': {'lat': 40.1020, 'lng': -88.2272, 'country': 'United States'},
-    'uiuc': {'lat': 40.1020, 'lng': -88.2272, 'country': 'United States'},
-    'ucla': {'lat': 34.0689, 'lng': -118.4452, 'country': 'United States'},
-    'usc': {'lat': 34.0224, 'lng': -118.2851, 'country': 'United States'},
-    'texas': {'lat': 30.2849, 'lng': -97.7341, 'country': 'United States'},
-    'ut austin': {'lat': 30.2849, 'lng': -97.7341, 'country': 'United States'},
-    'virginia tech': {'lat': 37.2296, 'lng': -80.4139, 'country': 'United States'},
-    'unc': {'lat': 35.9049, 'lng': -79.0469, 'country': 'United States'},
-    'north carolina': {'lat': 35.9049, 'lng': -79.0469, 'country': 'United States'},
-    'washington': {'lat': 47.6553, 'lng': -122.3035, 'country': 'United States'},
-    'columbia': {'lat': 40.8075, 'lng': -73.9626, 'country': 'United States'},
-    'nyu': {'lat': 40.7295, 'lng': -73.9965, 'country': 'United States'},
-    'ohio state': {'lat': 40.0067, 'lng': -83.0305, 'country': 'United States'},
-    'penn state': {'lat': 40.7982, 'lng': -77.8599, 'country': 'United States'},
-    'cisco': {'lat': 37.4089, 'lng': -121.9495, 'country': 'United States'},
-    'google': {'lat': 37.4220, 'lng': -122.0841, 'country': 'United States'},
-    'microsoft': {'lat': 47.6740, 'lng': -122.1215, 'country': 'United States'},
-    'apple': {'lat': 37.3349, 'lng': -122.0090, 'country': 'United States'},
-    'amazon': {'lat': 47.6062, 'lng': -122.3321, 'country': 'United States'},
-    'meta': {'lat': 37.4850, 'lng': -122.1469, 'country': 'United States'},
-    'facebook': {'lat': 37.4850, 'lng': -122.1469, 'country': 'United States'},
-    
-    # UK
-    'oxford': {'lat': 51.7548, 'lng': -1.2544, 'country': 'United Kingdom'},
-    'cambridge': {'lat': 52.2043, 'lng': 0.1218, 'country': 'United Kingdom'},
-    'imperial': {'lat': 51.4988, 'lng': -0.1749, 'country': 'United Kingdom'},
-    'ucl': {'lat': 51.5246, 'lng': -0.1340, 'country': 'United Kingdom'},
-    'edinburgh': {'lat': 55.9445, 'lng': -3.1892, 'country': 'United Kingdom'},
-    'manchester': {'lat': 53.4668, 'lng': -2.2339, 'country': 'United Kingdom'},
-    'bristol': {'lat': 51.4584, 'lng': -2.6030, 'country': 'United Kingdom'},
-    'unsw': {'lat': -33.9173, 'lng': 151.2313, 'country': 'Australia'},
-    
-    # Europe
-    'eth zurich': {'lat': 47.3769, 'lng': 8.5417, 'country': 'Switzerland'},
-    'epfl': {'lat': 46.5197, 'lng': 6.5668, 'country': 'Switzerland'},
-    'tu munich': {'lat': 48.1497, 'lng': 11.5679, 'country': 'Germany'},
-    'rwth aachen': {'lat': 50.7785, 'lng': 6.0597, 'country': 'Germany'},
-    'kit': {'lat': 49.0094, 'lng': 8.4108, 'country': 'Germany'},
-    'tu berlin': {'lat': 52.5125, 'lng': 13.3269, 'country': 'Germany'},
-    'sorbonne': {'lat': 48.8462, 'lng': 2.3464, 'country': 'France'},
-    'inria': {'lat': 48.8422, 'lng': 2.2656, 'country': 'France'},
-    'delft': {'lat': 52.0116, 'lng': 4.3571, 'country': 'Netherlands'},
-    'amsterdam': {'lat': 52.3556, 'lng': 4.9556, 'country': 'Netherlands'},
-    
-    # Asia
-    'tsinghua': {'lat': 40.0015, 'lng': 116.3264, 'country': 'China'},
-    'peking': {'lat': 39.9869, 'lng': 116.3059, 'country': 'China'},
-    'fudan': {'lat': 31.2990, 'lng': 121.5000, 'country': 'China'},
-    'zhejiang': {'lat': 30.2616, 'lng': 120.1195, 'country': 'China'},
-    'shanghai jiao': {'lat': 31.0284, 'lng': 121.4374, 'country': 'China'},
-    'nanjing': {'lat': 32.1194, 'lng': 118.9589, 'country': 'China'},
-    'ustc': {'lat': 31.8205, 'lng': 117.2272, 'country': 'China'},
-    'science and technology of china': {'lat': 31.8205, 'lng': 117.2272, 'country': 'China'},
-    'electronic science': {'lat': 30.7633, 'lng': 103.9889, 'country': 'China'},
-    'hong kong': {'lat': 22.2830, 'lng': 114.1370, 'country': 'Hong Kong'},
-    'chinese university': {'lat': 22.4196, 'lng': 114.2068, 'country': 'Hong Kong'},
-    'tokyo': {'lat': 35.7128, 'lng': 139.7620, 'country': 'Japan'},
-    'kyoto': {'lat': 35.0274, 'lng': 135.7817, 'country': 'Japan'},
-    'seoul national': {'lat': 37.4596, 'lng': 126.9520, 'country': 'South Korea'},
-    'kaist': {'lat': 36.3701, 'lng': 127.3604, 'country': 'South Korea'},
-    'nus': {'lat': 1.2966, 'lng': 103.7764, 'country': 'Singapore'},
-    'ntu singapore': {'lat': 1.3483, 'lng': 103.6831, 'country': 'Singapore'},
-    'nanyang': {'lat': 1.3483, 'lng': 103.6831, 'country': 'Singapore'},
-    'iit': {'lat': 19.1334, 'lng': 72.9133, 'country': 'India'},
-    'iisc': {'lat': 13.0219, 'lng': 77.5671, 'country': 'India'},
-    'indian institute': {'lat': 28.5447, 'lng': 77.1929, 'country': 'India'},
-    
-    # Australia
-    'melbourne': {'lat': -37.7983, 'lng': 144.9610, 'country': 'Australia'},
-    'sydney': {'lat': -33.8888, 'lng': 151.1872, 'country': 'Australia'},
-    'anu': {'lat': -35.2777, 'lng': 149.1185, 'country': 'Australia'},
-    'monash': {'lat': -37.9105, 'lng': 145.1363, 'country': 'Australia'},
-    
-    # Middle East
-    'technion': {'lat': 32.7775, 'lng': 35.0217, 'country': 'Israel'},
-    'tel aviv': {'lat': 32.1133, 'lng': 34.8044, 'country': 'Israel'},
-    'kaust': {'lat': 22.3097, 'lng': 39.1036, 'country': 'Saudi Arabia'},
-    
-    # Other
-    'xian': {'lat': 34.3416, 'lng': 108.9398, 'country': 'China'},
-    "xi'an": {'lat': 34.3416, 'lng': 108.9398, 'country': 'China'},
-    'sun yat-sen': {'lat': 23.0967, 'lng': 113.2847, 'country': 'China'},
-    'wuhan': {'lat': 30.5364, 'lng': 114.3577, 'country': 'China'},
-    'kiev': {'lat': 50.4501, 'lng': 30.5234, 'country': 'Ukraine'},
-    'киев': {'lat': 50.4501, 'lng': 30.5234, 'country': 'Ukraine'},
-}
-
-# Country coordinates (fallback)
-COUNTRY_COORDS = {
-    'usa': {'lat': 39.8283, 'lng': -98.5795, 'country': 'United States'},
-    'united states': {'lat': 39.8283, 'lng': -98.5795, 'country': 'United States'},
-    'us': {'lat': 39.8283, 'lng': -98.5795, 'country': 'United States'},
-    'india': {'lat': 20.5937, 'lng': 78.9629, 'country': 'India'},
-    'china': {'lat': 35.8617, 'lng': 104.1954, 'country': 'China'},
-    'uk': {'lat': 55.3781, 'lng': -3.4360, 'country': 'United Kingdom'},
-    'united kingdom': {'lat': 55.3781, 'lng': -3.4360, 'country': 'United Kingdom'},
-    'germany': {'lat': 51.1657, 'lng': 10.4515, 'country': 'Germany'},
-    'france': {'lat': 46.2276, 'lng': 2.2137, 'country': 'France'},
-    'canada': {'lat': 56.1304, 'lng': -106.3468, 'country': 'Canada'},
-    'australia': {'lat': -25.2744, 'lng': 133.7751, 'country': 'Australia'},
-    'japan': {'lat': 36.2048, 'lng': 138.2529, 'country': 'Japan'},
-    'south korea': {'lat': 35.9078, 'lng': 127.7669, 'country': 'South Korea'},
-    'korea': {'lat': 35.9078, 'lng': 127.7669, 'country': 'South Korea'},
-    'brazil': {'lat': -14.2350, 'lng': -51.9253, 'country': 'Brazil'},
-    'russia': {'lat': 61.5240, 'lng': 105.3188, 'country': 'Russia'},
-    'singapore': {'lat': 1.3521, 'lng': 103.8198, 'country': 'Singapore'},
-    'israel': {'lat': 31.0461, 'lng': 34.8516, 'country': 'Israel'},
-    'switzerland': {'lat': 46.8182, 'lng': 8.2275, 'country': 'Switzerland'},
-    'netherlands': {'lat': 52.1326, 'lng': 5.2913, 'country': 'Netherlands'},
-    'spain': {'lat': 40.4637, 'lng': -3.7492, 'country': 'Spain'},
-    'italy': {'lat': 41.8719, 'lng': 12.5674, 'country': 'Italy'},
-}
+# Nominatim results persist across runs in citation_cache/geocode.sqlite3
+GEOCODE_CACHE = None if os.environ.get('GEOCODE_NO_CACHE') else GeocodeCache()
+
+# Offline institution/city/country table (build_gazetteer.py), for affiliations
+# the registry cannot place; None if gazetteer.bin has not been built
+GAZETTEER = load_gazetteer()
+
+# Set to skip Nominatim and place affiliations from the offline tables only
+GEOCODE_OFFLINE = bool(os.environ.get('GEOCODE_OFFLINE'))
+NOMINATIM_USER_AGENT = 'ironclad-web-presence-citations'
+
+# Profile owner's name aliases are in self_citation_aliases.json
+SELF_CITATIONS = load_self_citation_matcher()
+
+
+# Venue, institution and coordinate tables are in pattern_registry.json
+PATTERNS = load_pattern_registry()
+PATTERN_TABLES = ('venue_tiers_substring', 'university_coords', 'country_coords')
+CLASSIFICATION_CACHE = ClassificationCache('convert_citation_cache', PATTERNS)
+VENUE_CLASSIFIER = PATTERNS.venue_classifier('venue_tiers_substring')
+COORDS_INDEX = PATTERNS.index('university_coords', 'country_coords', weights=[1.0, 0.6])
 
 
+@CLASSIFICATION_CACHE.memoize('venue_tiers_substring')
 def get_venue_tier(venue: str) -> str:
     """Determine the tier of a venue"""
-    venue_lower = venue.lower()
-    
-    if any(p in venue_lower for p in PREPRINT_PATTERNS):
-        return 'preprint'
-    if any(p in venue_lower for p in TIER1_PATTERNS):
-        return 'tier1'
-    if any(p in venue_lower for p in TIER2_PATTERNS):
-        return 'tier2'
-    return 'other'
+    return VENUE_CLASSIFIER.tier(venue)
 
 
 def get_venue_score(venue: str) -> int:
@@ -224,42 +86,44 @@ def calculate_influence_score(venue: str) -> dict:
 
 def is_self_citation(author_name: str) -> bool:
     """Check if the author name matches the profile owner"""
-    if not author_name:
-        return False
-    author_lower = author_name.lower().strip()
-    for name in SELF_NAMES:
-        if name in author_lower or author_lower in name:
-            return True
-    return False
+    return SELF_CITATIONS.is_self(author_name)
 
 
+@CLASSIFICATION_CACHE.memoize('university_coords', 'country_coords')
 def get_coords_from_affiliation(affiliation: str) -> dict:
     """Get coordinates from affiliation using predefined mapping"""
     if not affiliation:
         return None
     
-    aff_lower = affiliation.lower()
-    
-    # Try university matches first
-    for pattern, coords in UNIVERSITY_COORDS.items():
-        if pattern in aff_lower:
-            return coords.copy()
-    
-    # Try country matches
-    for pattern, coords in COUNTRY_COORDS.items():
-        if pattern in aff_lower:
-            return coords.copy()
+    # University matches take precedence over country matches
+    match = COORDS_INDEX.lookup(affiliation)
+    return dict(match.value) if match else None
+
+
+@CLASSIFICATION_CACHE.memoize('university_coords', 'country_coords')
+def get_coords_from_affiliation_parts(affiliation: str) -> dict:
+    """Coordinates for the first comma/pipe-separated part of an affiliation that
+    resolves, falling back to the whole affiliation"""
+    if not affiliation:
+        return None
     
-    return None
+    match = COORDS_INDEX.lookup_parts(affiliation)
+    return dict(match.value) if match else None
 
 
-def geocode_with_nominatim(affiliation: str, geolocator, cache: dict) -> dict:
-    """Geocode an affiliation using Nominatim (if available)"""
+def geocode_with_nominatim(affiliation: str, geolocator, cache=GEOCODE_CACHE) -> dict:
+    """Geocode an affiliation using Nominatim (if available)
+
+    cache is a GeocodeCache (or None): known coordinates and recent
+    "not found" answers are served from it without a network call.
+    """
     if not GEOPY_AVAILABLE or not affiliation:
         return None
     
-    if affiliation in cache:
-        return cache[affiliation]
+    missing = object()
+    cached = cache.get(affiliation, missing) if cache is not None else missing
+    if cached is not missing:
+        return cached
     
     try:
         # Clean up the affiliation string
@@ -273,7 +137,8 @@ def geocode_with_nominatim(affiliation: str, geolocator, cache: dict) -> dict:
                 'lng': location.longitude,
                 'country': 'Unknown'
             }
-            cache[affiliation] = result
+            if cache is not None:
+                cache.put(affiliation, result)
             return result
         
         # Try just the last part (often the institution name)
@@ -288,15 +153,33 @@ def geocode_with_nominatim(affiliation: str, geolocator, cache: dict) -> dict:
                         'lng': location.longitude,
                         'country': 'Unknown'
                     }
-                    cache[affiliation] = result
+                    if cache is not None:
+                        cache.put(affiliation, result)
                     return result
-    except Exception:
-        pass
+    except (GeocoderTimedOut, GeocoderServiceError):
+        # Transient: not cached, so the next run asks again
+        return None
     
-    cache[affiliation] = None
+    # Nominatim answered and found nothing: remember that for the negative TTL.
+    # Any other exception is a bug and propagates instead of being cached.
+    if cache is not None:
+        cache.put(affiliation, None)
     return None
 
 
+def make_geocode_batch() -> GeocodeBatch:
+    """Geocoding stage: registry, then gazetteer, then geocode cache, then Nominatim"""
+    resolvers = [get_coords_from_affiliation_parts]
+    if GAZETTEER is not None:
+        resolvers.append(GAZETTEER.coords)
+    geocode = None
+    if GEOPY_AVAILABLE and not GEOCODE_OFFLINE:
+        geolocator = RateLimitedGeocoder(Nominatim(user_agent=NOMINATIM_USER_AGENT), nominatim_limiter(),
+                                         throttle_errors=(GeocoderServiceError,))
+        geocode = lambda affiliation: geocode_with_nominatim(affiliation, geolocator, cache=GEOCODE_CACHE)
+    return GeocodeBatch(resolvers, cache=GEOCODE_CACHE, geocode=geocode)
+
+
 def load_csv_data(csv_path: str) -> list:
     """Load and parse CSV file from CitationMap"""
     papers = []
@@ -352,7 +235,9 @@ def main():
     seen_papers = set()
     cited_publications = set()
     self_citation_count = 0
-    affiliations_collected = {}
+    affiliations_collected = {}  # canonical title -> paper
+    titles = TitleIndex()
+    author_index = AuthorIndex(str(entry[0]) for entry in affiliation_list if entry and entry[0])
     
     for entry in affiliation_list:
         if len(entry) >= 4:
@@ -374,16 +259,19 @@ def main():
                 continue
             
             # Track affiliations for each paper
-            paper_key = citing_paper.lower()
+            paper_key = titles.canonical(citing_paper)
             if paper_key not in affiliations_collected:
                 affiliations_collected[paper_key] = {
                     'title': citing_paper,
                     'authors': [],
+                    'author_ids': set(),
                     'affiliations': [],
                     'cited_paper': cited_paper
                 }
             
-            if author_name and author_name not in affiliations_collected[paper_key]['authors']:
+            author_id = author_index.resolve(author_name)
+            if author_id and author_id not in affiliations_collected[paper_key]['author_ids']:
+                affiliations_collected[paper_key]['author_ids'].add(author_id)
                 affiliations_collected[paper_key]['authors'].append(author_name)
             if affiliation and affiliation != 'Unknown' and affiliation not in affiliations_collected[paper_key]['affiliations']:
                 affiliations_collected[paper_key]['affiliations'].append(affiliation)
@@ -394,7 +282,7 @@ def main():
     # Convert collected data to citing papers list
     for paper_key, data in affiliations_collected.items():
         # Try to get venue from CSV lookup
-        venue = venue_lookup.get(paper_key, 'Unknown')
+        venue = venue_lookup.get(data['title'].lower(), 'Unknown')
         
         # Calculate influence score (venue-only)
         scores = calculate_influence_score(venue)
@@ -417,51 +305,31 @@ def main():
     
     print(f"Processed {len(citing_papers)} citing papers")
     
-    # Aggregate locations using predefined coordinates (fast)
+    # Geocode each distinct affiliation once, then aggregate locations
+    print("Geocoding affiliations...")
+    geocoding = make_geocode_batch()
+    affiliation_coords = geocoding.run(p['affiliation'] for p in citing_papers
+                                       if p.get('affiliation') and p['affiliation'] != 'Unknown')
+    print(f"Geocoding: {geocoding.summary()}")
     print("Aggregating locations...")
     
-    location_counts = {}
+    location_map = LocationMap(decimals=FINE_LOCATION_DECIMALS)
     geocoded_count = 0
     
     for paper in citing_papers:
         aff = paper.get('affiliation', 'Unknown')
         if aff and aff != 'Unknown':
-            # Try each part of the affiliation
-            parts = re.split(r'[,|]', aff)
-            coords = None
-            
-            for part in parts:
-                part = part.strip()
-                coords = get_coords_from_affiliation(part)
-                if coords:
-                    break
-            
-            # Also try the full affiliation
-            if not coords:
-                coords = get_coords_from_affiliation(aff)
+            coords = affiliation_coords.get(normalize_affiliation(aff))
             
             if coords:
                 geocoded_count += 1
-                key = f"{coords['lat']:.2f},{coords['lng']:.2f}"
-                
-                if key not in location_counts:
-                    location_counts[key] = {
-                        'latitude': coords['lat'],
-                        'longitude': coords['lng'],
-                        'country': coords['country'],
-                        'count': 0,
-                        'papers': [],
-                        'affiliations': []
-                    }
-                
-                location_counts[key]['count'] += 1
-                if paper['title'] not in location_counts[key]['papers'][:10]:  # Limit stored papers
-                    location_counts[key]['papers'].append(paper['title'])
-                if aff not in location_counts[key]['affiliations'][:5]:  # Limit stored affiliations
-                    location_counts[key]['affiliations'].append(aff)
-    
-    locations = list(location_counts.values())
+                location_map.add(coords['lat'], coords['lng'], coords['country'], None,
+                                 paper['title'], [aff], rank=paper['influenceScore'])
+    
+    locations = location_map.locations()
     print(f"Geocoded {geocoded_count} papers to {len(locations)} unique locations")
+    if GAZETTEER is not None:
+        print(f"Gazetteer: {GAZETTEER.summary()}")
     
     # Create publications list from cited papers
     publications = [{'title': p, 'citationCount': 0, 'year': 2024} for p in cited_publications]
@@ -505,9 +373,11 @@ def main():
     citation_data = {
         'lastUpdated': time.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
         'scholarId': 'hIVoKbIAAAAJ',
+        'patternHashes': PATTERNS.tag(*PATTERN_TABLES),
         'publications': publications,
         'citingPapers': citing_papers,
         'locations': locations,
+        'clusterLayers': cluster_layers(locations),
         'stats': {
             'totalCitations': len(citing_papers),
             'uniqueLocations': len(locations),
@@ -528,6 +398,11 @@ def main():
     print(f"  Citing Papers (external): {len(citing_papers)}")
     print(f"  Self-citations filtered: {self_citation_count}")
     print(f"  Locations: {len(locations)}")
+    print(f"  Classification cache: {CLASSIFICATION_CACHE.summary()}")
+    print(f"  Self-citation matcher: {SELF_CITATIONS.summary()}")
+    print(f"  Title clusters: {titles.summary()}")
+    print(f"  Authors: {author_index.summary()}")
+    titles.save_decisions('convert_citation_cache')
     print(f"\nVenue Tiers:")
     print(f"  Tier 1 (IEEE/ACM/USENIX): {tier_counts['tier1']}")
     print(f"  Tier 2 (Other peer-reviewed): {tier_counts['tier2']}")
@@ -11,64 +11,32 @@ import re
 from collections import defaultdict
 from pathlib import Path
 
-# Self-citation patterns
-SELF_NAMES = [
-    'vineeth sai', 'vs narajala', 'vineeth sai narajala', 'v. s. narajala', 
-    'narajala, v', 'narajala, vineeth', 'v s narajala', 'vineeth narajala',
-    'v narajala', 'narajala v'
-]
+from author_index import AuthorIndex
+from classification_cache import ClassificationCache
+from location_aggregate import LocationMap
+from pattern_registry import load_pattern_registry
+from self_citation import load_self_citation_matcher
+from spatial_index import cluster_layers
+from title_index import TitleIndex
 
-# Venue patterns for categorization
-TIER1_PATTERNS = [
-    'ieee', 'ieee transactions', 'ieee access', 'ieee communications',
-    'acm', 'dl.acm.org', 'acm digital library',
-    'usenix', 'ndss', 'ccs', 's&p', 'sp ', 'infocom',
-    'security', 'oakland', 'crypto', 'eurocrypt', 'asiacrypt',
-    'acsac', 'esorics', 'wisec', 'uss ',
-    'isca', 'micro', 'hpca', 'sigcomm', 'mobicom', 'nsdi', 'sosp', 'osdi', 'eurosys',
-    'pldi', 'popl', 'icse', 'fse', 'ase', 'issta', 'sigmod', 'vldb',
-    'neurips', 'nips', 'icml', 'iclr', 'cvpr', 'iccv', 'eccv', 'aaai', 'ijcai',
-    'workshop on mobility', 'mobiarch', 'mobisys', 'springer'
-]
+# Profile owner's name aliases are in self_citation_aliases.json
+SELF_CITATIONS = load_self_citation_matcher()
 
-TIER2_PATTERNS = [
-    'elsevier', 'nature', 'science', 'plos', 'jstor',
-    'wiley', 'taylor & francis', 'mdpi', 'sensors', 'electronics',
-    'journal of', 'transactions on', 'international journal', 'ict express',
-    'conference on', 'symposium on', 'workshop on', 'proceedings of',
-    'ceur-ws.org', 'ceur workshop', 'openreview.net', 'openreview',
-    'pmc.ncbi', 'pubmed', 'ncbi.nlm.nih.gov',
-    'dbpia', 'cyberleninka', '한국통신학회', 'kics',
-    'sol.sbc.org.br', 'sbc.org.br', 'cds.cern.ch', 'books.google.com',
-]
 
-PREPRINT_PATTERNS = [
-    'arxiv', 'preprint', 'ssrn', 'biorxiv', 'medrxiv', 'techrxiv',
-    'researchgate.net', 'researchsquare', 'f1000research', 
-    'preprints.org', 'osf.io', 'zenodo',
-    'digitalcommons', 'repository.lib', 'proquest', 'ela.kpi.ua',
-    'google patents', 'us patent'
-]
+def is_self_citation(author_name):
+    return SELF_CITATIONS.is_self(author_name)
 
 
-def is_self_citation(author_name):
-    if not author_name:
-        return False
-    author_lower = author_name.lower().strip()
-    return any(name in author_lower for name in SELF_NAMES)
+# Venue, institution and coordinate tables are in pattern_registry.json
+PATTERNS = load_pattern_registry()
+PATTERN_TABLES = ('venue_tiers_substring',)
+CLASSIFICATION_CACHE = ClassificationCache('convert_citationmap_csv', PATTERNS)
+VENUE_CLASSIFIER = PATTERNS.venue_classifier('venue_tiers_substring')
 
 
+@CLASSIFICATION_CACHE.memoize('venue_tiers_substring')
 def get_venue_tier(venue):
-    if not venue:
-        return 'other'
-    v = venue.lower()
-    if any(p in v for p in PREPRINT_PATTERNS):
-        return 'preprint'
-    if any(p in v for p in TIER1_PATTERNS):
-        return 'tier1'
-    if any(p in v for p in TIER2_PATTERNS):
-        return 'tier2'
-    return 'other'
+    return VENUE_CLASSIFIER.tier(venue)
 
 
 def get_venue_score(venue):
@@ -88,8 +56,11 @@ def main():
     print(f"Reading {csv_path}...")
     
     # Parse CSV
-    papers_by_title = {}  # Deduplicate by citing paper title
-    locations_map = {}
+    papers_by_title = {}  # Deduplicate by canonical citing paper title
+    titles = TitleIndex()
+    author_index = AuthorIndex()
+    paper_authors = {}  # paper key -> ids of the authors listed on it
+    locations_map = LocationMap()
     publications_set = set()
     self_citations_filtered = 0
     
@@ -119,8 +90,10 @@ def main():
                 continue
             
             # Deduplicate by paper title, keep first occurrence with best data
-            if citing_title not in papers_by_title:
-                papers_by_title[citing_title] = {
+            paper_key = titles.canonical(citing_title)
+            author_id = author_index.resolve(author)
+            if paper_key not in papers_by_title:
+                papers_by_title[paper_key] = {
                     'title': citing_title,
                     'authors': [author] if author else [],
                     'venue': '',  # CitationMap doesn't provide venue
@@ -132,10 +105,12 @@ def main():
                     'citedPublication': cited_title,
                     'affiliation': affiliation if affiliation and affiliation not in ['AI_ML', 'GENAI', 'Security', 'No_author_info'] else 'Unknown'
                 }
+                paper_authors[paper_key] = {author_id} if author_id else set()
             else:
                 # Add author if not already present
-                if author and author not in papers_by_title[citing_title]['authors']:
-                    papers_by_title[citing_title]['authors'].append(author)
+                if author_id and author_id not in paper_authors[paper_key]:
+                    paper_authors[paper_key].add(author_id)
+                    papers_by_title[paper_key]['authors'].append(author)
             
             # Aggregate locations
             try:
@@ -143,28 +118,11 @@ def main():
                 lng_f = float(lng) if lng else None
                 
                 if lat_f and lng_f and country:
-                    # Round for grouping
-                    key = f"{lat_f:.1f},{lng_f:.1f}"
-                    
-                    if key not in locations_map:
-                        locations_map[key] = {
-                            'latitude': lat_f,
-                            'longitude': lng_f,
-                            'country': country,
-                            'city': city or '',
-                            'count': 0,
-                            'papers': [],
-                            'affiliations': []
-                        }
-                    
-                    locations_map[key]['count'] += 1
-                    
-                    if len(locations_map[key]['papers']) < 10 and citing_title not in locations_map[key]['papers']:
-                        locations_map[key]['papers'].append(citing_title)
-                    
-                    if affiliation and affiliation not in ['AI_ML', 'GENAI', 'Security', 'No_author_info']:
-                        if affiliation not in locations_map[key]['affiliations']:
-                            locations_map[key]['affiliations'].append(affiliation)
+                    paper_title = papers_by_title[paper_key]['title']
+                    if affiliation not in ['AI_ML', 'GENAI', 'Security', 'No_author_info']:
+                        locations_map.add(lat_f, lng_f, country, city or '', paper_title, [affiliation])
+                    else:
+                        locations_map.add(lat_f, lng_f, country, city or '', paper_title)
             except (ValueError, TypeError):
                 pass
     
@@ -174,7 +132,7 @@ def main():
     
     # Convert to lists
     citing_papers = list(papers_by_title.values())
-    locations = list(locations_map.values())
+    locations = locations_map.locations()
     
     # Create publications list
     publications = [{'title': t, 'year': 2024, 'venue': '', 'citationCount': 0} for t in publications_set]
@@ -192,9 +150,11 @@ def main():
     citation_data = {
         'lastUpdated': __import__('datetime').datetime.now().strftime('%Y-%m-%dT%H:%M:%S.000Z'),
         'scholarId': 'hIVoKbIAAAAJ',
+        'patternHashes': PATTERNS.tag(*PATTERN_TABLES),
         'publications': publications,
         'citingPapers': citing_papers,
         'locations': locations,
+        'clusterLayers': cluster_layers(locations),
         'stats': {
             'totalCitations': len(citing_papers),
             'uniqueLocations': len(locations),
@@ -218,6 +178,11 @@ def main():
     print(f"  Unique citing papers: {len(citing_papers)}")
     print(f"  Unique locations: {len(locations)}")
     print(f"  Self-citations filtered: {self_citations_filtered}")
+    print(f"  Classification cache: {CLASSIFICATION_CACHE.summary()}")
+    print(f"  Self-citation matcher: {SELF_CITATIONS.summary()}")
+    print(f"  Title clusters: {titles.summary()}")
+    print(f"  Authors: {author_index.summary()}")
+    titles.save_decisions('convert_citationmap_csv')
     
     # Show top locations
     print(f"\nTop 10 locations by citation count:")
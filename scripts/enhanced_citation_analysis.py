@@ -6,172 +6,41 @@ Processes CitationMap CSV data and infers venue quality from paper metadata.
 
 import csv
 import json
-import re
 import time
 from collections import defaultdict
 from pathlib import Path
 
-# Self-citation patterns to filter out
-SELF_NAMES = [
-    'vineeth sai', 'vs narajala', 'vineeth sai narajala', 'v. s. narajala', 
-    'narajala, v', 'narajala, vineeth', 'v s narajala', 'vineeth narajala',
-    'v narajala', 'narajala v', 'narajala vs', 'vineeth s'
-]
+from author_index import AuthorIndex
+from classification_cache import ClassificationCache
+from location_aggregate import LocationMap
+from pattern_registry import load_pattern_registry
+from self_citation import load_self_citation_matcher
+from spatial_index import cluster_layers
+from title_index import TitleIndex
 
-# Tier 1: Top-tier venues (IEEE, ACM, USENIX, major conferences)
-TIER1_PATTERNS = [
-    # IEEE
-    r'\bieee\b', r'\bieee transactions\b', r'\bieee access\b', r'\bieee communications\b',
-    r'\bieee network\b', r'\binfocom\b',
-    # ACM
-    r'\bacm\b', r'dl\.acm\.org', r'\bsigcomm\b', r'\bmobicom\b', r'\bccs\b',
-    # USENIX
-    r'\busenix\b', r'\bndss\b', r'\buss\b', r'\bosdi\b', r'\bnsdi\b',
-    # Security conferences
-    r'\bs&p\b', r'\boakland\b', r'\bcrypto\b', r'\bacsac\b', r'\besorics\b',
-    # Top AI/ML
-    r'\bneurips\b', r'\bnips\b', r'\bicml\b', r'\biclr\b', r'\bcvpr\b', r'\baaai\b', r'\bijcai\b',
-    # Top systems
-    r'\bsosp\b', r'\beurosys\b', r'\bisca\b', r'\bmicro\b', r'\bhpca\b',
-    # Top SE
-    r'\bicse\b', r'\bfse\b', r'\base\b', r'\bpldi\b', r'\bpopl\b',
-]
-
-# Tier 2: Other peer-reviewed venues
-TIER2_PATTERNS = [
-    r'\bspringer\b', r'\belsevier\b', r'\bnature\b', r'\bscience\b', r'\bplos\b',
-    r'\bwiley\b', r'\bmdpi\b', r'\bsensors\b', r'\belectronics\b',
-    r'\bjournal of\b', r'\btransactions on\b', r'\binternational journal\b',
-    r'\bconference on\b', r'\bsymposium on\b', r'\bworkshop on\b', r'\bproceedings\b',
-    r'\bceur-ws\b', r'\bopenreview\b', r'\bpubmed\b', r'\bncbi\b',
-    # Regional databases
-    r'\bdbpia\b', r'\bcyberleninka\b', r'\bsbc\.org\b',
-]
-
-# Preprint patterns
-PREPRINT_PATTERNS = [
-    r'\barxiv\b', r'\bpreprint\b', r'\bssrn\b', r'\bbiorxiv\b', r'\bmedrxiv\b',
-    r'\bresearchgate\b', r'\bresearchsquare\b', r'\bzenodo\b', r'\bosf\.io\b',
-    r'\bdigitalcommons\b', r'\brepository\b', r'\bproquest\b',
-    r'\bgoogle patents\b', r'\bus patent\b', r'\bthesis\b', r'\bdissertation\b',
-]
-
-# Prestigious institutions for high-influence scoring
-PRESTIGIOUS_INSTITUTIONS = [
-    'stanford', 'mit', 'massachusetts institute', 'berkeley', 'uc berkeley',
-    'carnegie mellon', 'cmu', 'harvard', 'princeton', 'cornell', 'georgia tech',
-    'purdue', 'oxford', 'cambridge', 'eth zurich', 'eth zürich',
-    'tsinghua', 'peking', 'zhejiang', 'national university of singapore', 'nus',
-    'kaist', 'google', 'microsoft', 'meta', 'deepmind', 'amazon', 'nvidia', 'openai',
-    'yale', 'columbia', 'ucla', 'caltech', 'nyu', 'usc', 'university of washington',
-    'university of michigan', 'uiuc', 'ut austin', 'johns hopkins', 'duke',
-    'university of toronto', 'waterloo', 'epfl', 'imperial college', 'ucl',
-    'tu munich', 'max planck', 'inria', 'cnrs', 'ben-gurion', 'ben gurion',
-    'technion', 'tel aviv', 'tokyo', 'kyoto', 'seoul national',
-]
-
-# University coordinates for map
-UNIVERSITY_COORDS = {
-    'stanford': {'lat': 37.4275, 'lng': -122.1697, 'country': 'United States', 'city': 'Stanford'},
-    'mit': {'lat': 42.3601, 'lng': -71.0942, 'country': 'United States', 'city': 'Cambridge'},
-    'massachusetts institute': {'lat': 42.3601, 'lng': -71.0942, 'country': 'United States', 'city': 'Cambridge'},
-    'berkeley': {'lat': 37.8719, 'lng': -122.2585, 'country': 'United States', 'city': 'Berkeley'},
-    'carnegie mellon': {'lat': 40.4432, 'lng': -79.9428, 'country': 'United States', 'city': 'Pittsburgh'},
-    'georgia tech': {'lat': 33.7756, 'lng': -84.3963, 'country': 'United States', 'city': 'Atlanta'},
-    'georgia institute': {'lat': 33.7756, 'lng': -84.3963, 'country': 'United States', 'city': 'Atlanta'},
-    'harvard': {'lat': 42.3770, 'lng': -71.1167, 'country': 'United States', 'city': 'Cambridge'},
-    'princeton': {'lat': 40.3431, 'lng': -74.6551, 'country': 'United States', 'city': 'Princeton'},
-    'cornell': {'lat': 42.4534, 'lng': -76.4735, 'country': 'United States', 'city': 'Ithaca'},
-    'purdue': {'lat': 40.4237, 'lng': -86.9212, 'country': 'United States', 'city': 'West Lafayette'},
-    'cisco': {'lat': 37.4089, 'lng': -121.9495, 'country': 'United States', 'city': 'San Jose'},
-    'san jose': {'lat': 37.3387, 'lng': -121.8853, 'country': 'United States', 'city': 'San Jose'},
-    'google': {'lat': 37.4220, 'lng': -122.0841, 'country': 'United States', 'city': 'Mountain View'},
-    'microsoft': {'lat': 47.6740, 'lng': -122.1215, 'country': 'United States', 'city': 'Redmond'},
-    'amazon': {'lat': 47.6062, 'lng': -122.3321, 'country': 'United States', 'city': 'Seattle'},
-    'meta': {'lat': 37.4850, 'lng': -122.1469, 'country': 'United States', 'city': 'Menlo Park'},
-    'oxford': {'lat': 51.7548, 'lng': -1.2544, 'country': 'United Kingdom', 'city': 'Oxford'},
-    'cambridge': {'lat': 52.2043, 'lng': 0.1218, 'country': 'United Kingdom', 'city': 'Cambridge'},
-    'imperial': {'lat': 51.4988, 'lng': -0.1749, 'country': 'United Kingdom', 'city': 'London'},
-    'ucl': {'lat': 51.5246, 'lng': -0.1340, 'country': 'United Kingdom', 'city': 'London'},
-    'eth zurich': {'lat': 47.3769, 'lng': 8.5417, 'country': 'Switzerland', 'city': 'Zurich'},
-    'epfl': {'lat': 46.5197, 'lng': 6.5668, 'country': 'Switzerland', 'city': 'Lausanne'},
-    'tu munich': {'lat': 48.1497, 'lng': 11.5679, 'country': 'Germany', 'city': 'Munich'},
-    'rwth aachen': {'lat': 50.7785, 'lng': 6.0597, 'country': 'Germany', 'city': 'Aachen'},
-    'tsinghua': {'lat': 40.0015, 'lng': 116.3264, 'country': 'China', 'city': 'Beijing'},
-    'peking': {'lat': 39.9869, 'lng': 116.3059, 'country': 'China', 'city': 'Beijing'},
-    'zhejiang': {'lat': 30.2616, 'lng': 120.1195, 'country': 'China', 'city': 'Hangzhou'},
-    'fudan': {'lat': 31.2990, 'lng': 121.5000, 'country': 'China', 'city': 'Shanghai'},
-    'shanghai jiao': {'lat': 31.0284, 'lng': 121.4374, 'country': 'China', 'city': 'Shanghai'},
-    'nanjing': {'lat': 32.1194, 'lng': 118.9589, 'country': 'China', 'city': 'Nanjing'},
-    "xi'an": {'lat': 34.3416, 'lng': 108.9398, 'country': 'China', 'city': "Xi'an"},
-    'xian jiaotong': {'lat': 34.3416, 'lng': 108.9398, 'country': 'China', 'city': "Xi'an"},
-    'hong kong': {'lat': 22.2830, 'lng': 114.1370, 'country': 'Hong Kong', 'city': 'Hong Kong'},
-    'singapore': {'lat': 1.2966, 'lng': 103.7764, 'country': 'Singapore', 'city': 'Singapore'},
-    'nus': {'lat': 1.2966, 'lng': 103.7764, 'country': 'Singapore', 'city': 'Singapore'},
-    'national university of singapore': {'lat': 1.2966, 'lng': 103.7764, 'country': 'Singapore', 'city': 'Singapore'},
-    'nanyang': {'lat': 1.3483, 'lng': 103.6831, 'country': 'Singapore', 'city': 'Singapore'},
-    'tokyo': {'lat': 35.7128, 'lng': 139.7620, 'country': 'Japan', 'city': 'Tokyo'},
-    'kyoto': {'lat': 35.0274, 'lng': 135.7817, 'country': 'Japan', 'city': 'Kyoto'},
-    'seoul national': {'lat': 37.4596, 'lng': 126.9520, 'country': 'South Korea', 'city': 'Seoul'},
-    'kaist': {'lat': 36.3701, 'lng': 127.3604, 'country': 'South Korea', 'city': 'Daejeon'},
-    'ben-gurion': {'lat': 31.2623, 'lng': 34.8013, 'country': 'Israel', 'city': 'Beer Sheva'},
-    'ben gurion': {'lat': 31.2623, 'lng': 34.8013, 'country': 'Israel', 'city': 'Beer Sheva'},
-    'technion': {'lat': 32.7775, 'lng': 35.0217, 'country': 'Israel', 'city': 'Haifa'},
-    'tel aviv': {'lat': 32.1133, 'lng': 34.8044, 'country': 'Israel', 'city': 'Tel Aviv'},
-    'melbourne': {'lat': -37.7983, 'lng': 144.9610, 'country': 'Australia', 'city': 'Melbourne'},
-    'sydney': {'lat': -33.8888, 'lng': 151.1872, 'country': 'Australia', 'city': 'Sydney'},
-    'unsw': {'lat': -33.9173, 'lng': 151.2313, 'country': 'Australia', 'city': 'Sydney'},
-    'anu': {'lat': -35.2777, 'lng': 149.1185, 'country': 'Australia', 'city': 'Canberra'},
-    'kampala': {'lat': 0.3476, 'lng': 32.5825, 'country': 'Uganda', 'city': 'Kampala'},
-    'uganda': {'lat': 0.3476, 'lng': 32.5825, 'country': 'Uganda', 'city': 'Kampala'},
-    'nigeria': {'lat': 6.5244, 'lng': 3.3792, 'country': 'Nigeria', 'city': 'Lagos'},
-    'jos': {'lat': 9.8965, 'lng': 8.8583, 'country': 'Nigeria', 'city': 'Jos'},
-    'owasp': {'lat': 40.7128, 'lng': -74.0060, 'country': 'United States', 'city': 'New York'},
-    'sap': {'lat': 49.2937, 'lng': 8.6433, 'country': 'Germany', 'city': 'Walldorf'},
-    'ege university': {'lat': 38.4567, 'lng': 27.2261, 'country': 'Turkey', 'city': 'Izmir'},
-    'toronto': {'lat': 43.6629, 'lng': -79.3957, 'country': 'Canada', 'city': 'Toronto'},
-    'waterloo': {'lat': 43.4723, 'lng': -80.5449, 'country': 'Canada', 'city': 'Waterloo'},
-    'mcgill': {'lat': 45.5049, 'lng': -73.5772, 'country': 'Canada', 'city': 'Montreal'},
-    'ireland': {'lat': 53.3498, 'lng': -6.2603, 'country': 'Ireland', 'city': 'Dublin'},
-    'dublin': {'lat': 53.3498, 'lng': -6.2603, 'country': 'Ireland', 'city': 'Dublin'},
-}
-
-# Countries that indicate geocoding noise (should be filtered)
-EXCLUDED_COUNTRIES = ['Papua New Guinea', 'Mali']
+# Profile owner's name aliases are in self_citation_aliases.json
+SELF_CITATIONS = load_self_citation_matcher()
 
 
 def is_self_citation(author_name: str) -> bool:
     """Check if the author name matches the profile owner"""
-    if not author_name:
-        return False
-    author_lower = author_name.lower().strip()
-    for name in SELF_NAMES:
-        if name in author_lower or author_lower in name:
-            return True
-    return False
+    return SELF_CITATIONS.is_self(author_name)
+
+
+# Venue, institution and coordinate tables are in pattern_registry.json
+PATTERNS = load_pattern_registry()
+PATTERN_TABLES = ('venue_tiers_word', 'prestigious_institutions', 'university_coords', 'excluded_countries')
+EXCLUDED_COUNTRIES = PATTERNS['excluded_countries']
+CLASSIFICATION_CACHE = ClassificationCache('enhanced_citation_analysis', PATTERNS)
+VENUE_CLASSIFIER = PATTERNS.venue_classifier('venue_tiers_word')
+PRESTIGE_INDEX = PATTERNS.index('prestigious_institutions')
+COORDS_INDEX = PATTERNS.index('university_coords')
 
 
+@CLASSIFICATION_CACHE.memoize('venue_tiers_word')
 def get_venue_tier(title: str, venue: str = '', affiliation: str = '') -> str:
     """Determine venue tier from paper metadata"""
-    # Combine all text for pattern matching
-    text = f"{title} {venue} {affiliation}".lower()
-    
-    # Check preprints first
-    for pattern in PREPRINT_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE):
-            return 'preprint'
-    
-    # Check tier 1 venues
-    for pattern in TIER1_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE):
-            return 'tier1'
-    
-    # Check tier 2 venues
-    for pattern in TIER2_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE):
-            return 'tier2'
-    
-    return 'other'
+    return VENUE_CLASSIFIER.tier(f"{title} {venue} {affiliation}")
 
 
 def get_venue_score(tier: str) -> int:
@@ -179,26 +48,22 @@ def get_venue_score(tier: str) -> int:
     return {'tier1': 50, 'tier2': 35, 'preprint': 10, 'other': 20}[tier]
 
 
+@CLASSIFICATION_CACHE.memoize('prestigious_institutions')
 def is_prestigious_institution(affiliation: str) -> bool:
     """Check if affiliation is from a prestigious institution"""
     if not affiliation:
         return False
-    aff_lower = affiliation.lower()
-    return any(inst in aff_lower for inst in PRESTIGIOUS_INSTITUTIONS)
+    return PRESTIGE_INDEX.lookup_word(affiliation) is not None
 
 
+@CLASSIFICATION_CACHE.memoize('university_coords')
 def get_coords_from_affiliation(affiliation: str) -> dict:
     """Get coordinates from affiliation using predefined mapping"""
     if not affiliation:
         return None
     
-    aff_lower = affiliation.lower()
-    
-    for pattern, coords in UNIVERSITY_COORDS.items():
-        if pattern in aff_lower:
-            return coords.copy()
-    
-    return None
+    match = COORDS_INDEX.lookup(affiliation)
+    return dict(match.value) if match else None
 
 
 def normalize_country(country: str) -> str:
@@ -227,15 +92,20 @@ def main():
     print(f"\nReading data from: {csv_path}")
     
     # Parse CSV
-    papers_by_title = {}
-    locations_map = {}
+    papers_by_title = {}  # canonical title -> paper
+    titles = TitleIndex()
+    paper_authors = {}  # paper key -> ids of the authors listed on it
+    locations_map = LocationMap()
     publications_set = set()
     self_citations_filtered = 0
     total_rows = 0
     
     with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+        rows = list(csv.DictReader(f))
+        # Seeded with every spelling first, as merge_citation_data does, so an
+        # abbreviation resolves to the fuller name even if it comes first
+        author_index = AuthorIndex(row.get('citing author name', '') for row in rows)
+        for row in rows:
             total_rows += 1
             author = row.get('citing author name', '')
             citing_title = row.get('citing paper title', '')
@@ -277,8 +147,10 @@ def main():
             # Normalize country
             norm_country = normalize_country(country) if country else 'Unknown'
             
-            if citing_title not in papers_by_title:
-                papers_by_title[citing_title] = {
+            paper_key = titles.canonical(citing_title)
+            author_id = author_index.resolve(author)
+            if paper_key not in papers_by_title:
+                papers_by_title[paper_key] = {
                     'title': citing_title,
                     'authors': [author] if author else [],
                     'venue': tier.upper() if tier != 'other' else 'Unknown',
@@ -294,21 +166,23 @@ def main():
                     'tier': tier,
                     'isPrestigious': is_prestigious
                 }
+                paper_authors[paper_key] = {author_id} if author_id else set()
             else:
                 # Add author if not already present
-                if author and author not in papers_by_title[citing_title]['authors']:
-                    papers_by_title[citing_title]['authors'].append(author)
+                if author_id and author_id not in paper_authors[paper_key]:
+                    paper_authors[paper_key].add(author_id)
+                    papers_by_title[paper_key]['authors'].append(author)
                 # Update affiliation if better
-                if clean_aff and clean_aff not in papers_by_title[citing_title]['affiliations']:
-                    papers_by_title[citing_title]['affiliations'].append(clean_aff)
-                    if papers_by_title[citing_title]['affiliation'] == 'Unknown':
-                        papers_by_title[citing_title]['affiliation'] = clean_aff
+                if clean_aff and clean_aff not in papers_by_title[paper_key]['affiliations']:
+                    papers_by_title[paper_key]['affiliations'].append(clean_aff)
+                    if papers_by_title[paper_key]['affiliation'] == 'Unknown':
+                        papers_by_title[paper_key]['affiliation'] = clean_aff
                 # Update country if better
-                if norm_country != 'Unknown' and papers_by_title[citing_title]['country'] == 'Unknown':
-                    papers_by_title[citing_title]['country'] = norm_country
+                if norm_country != 'Unknown' and papers_by_title[paper_key]['country'] == 'Unknown':
+                    papers_by_title[paper_key]['country'] = norm_country
                 # Update prestigious status
                 if is_prestigious:
-                    papers_by_title[citing_title]['isPrestigious'] = True
+                    papers_by_title[paper_key]['isPrestigious'] = True
             
             # Aggregate locations from CSV data
             try:
@@ -316,26 +190,8 @@ def main():
                 lng_f = float(lng) if lng else None
                 
                 if lat_f and lng_f and country and country not in EXCLUDED_COUNTRIES:
-                    key = f"{lat_f:.1f},{lng_f:.1f}"
-                    
-                    if key not in locations_map:
-                        locations_map[key] = {
-                            'latitude': lat_f,
-                            'longitude': lng_f,
-                            'country': normalize_country(country),
-                            'city': city or '',
-                            'count': 0,
-                            'papers': [],
-                            'affiliations': []
-                        }
-                    
-                    locations_map[key]['count'] += 1
-                    
-                    if len(locations_map[key]['papers']) < 10 and citing_title not in locations_map[key]['papers']:
-                        locations_map[key]['papers'].append(citing_title)
-                    
-                    if clean_aff and clean_aff not in locations_map[key]['affiliations']:
-                        locations_map[key]['affiliations'].append(clean_aff)
+                    paper_title = papers_by_title[paper_key]['title']
+                    locations_map.add(lat_f, lng_f, normalize_country(country), city or '', paper_title, [clean_aff])
             except (ValueError, TypeError):
                 pass
     
@@ -344,30 +200,15 @@ def main():
         for aff in paper.get('affiliations', []):
             coords = get_coords_from_affiliation(aff)
             if coords:
-                key = f"{coords['lat']:.1f},{coords['lng']:.1f}"
-                
-                if key not in locations_map:
-                    locations_map[key] = {
-                        'latitude': coords['lat'],
-                        'longitude': coords['lng'],
-                        'country': coords['country'],
-                        'city': coords.get('city', ''),
-                        'count': 0,
-                        'papers': [],
-                        'affiliations': []
-                    }
-                
-                if title not in locations_map[key]['papers']:
-                    locations_map[key]['count'] += 1
-                    if len(locations_map[key]['papers']) < 10:
-                        locations_map[key]['papers'].append(title)
-                    
-                    if aff not in locations_map[key]['affiliations']:
-                        locations_map[key]['affiliations'].append(aff)
+                location = locations_map.get(coords['lat'], coords['lng'], coords['country'], coords.get('city', ''))
+                # Counted unless it is among the location's sampled papers, as the
+                # capped-list check always did: past 10 papers a title counts again
+                if title not in location.papers:
+                    location.add(title, [aff])
     
     # Convert to lists
     citing_papers = list(papers_by_title.values())
-    locations = sorted(locations_map.values(), key=lambda x: x['count'], reverse=True)
+    locations = sorted(locations_map.locations(), key=lambda x: x['count'], reverse=True)
     
     # Calculate tier stats
     tier_counts = {'tier1': 0, 'tier2': 0, 'other': 0, 'preprint': 0}
@@ -403,9 +244,11 @@ def main():
     citation_data = {
         'lastUpdated': time.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
         'scholarId': 'hIVoKbIAAAAJ',
+        'patternHashes': PATTERNS.tag(*PATTERN_TABLES),
         'publications': publications,
         'citingPapers': citing_papers,
         'locations': locations,
+        'clusterLayers': cluster_layers(locations),
         'stats': {
             'totalCitations': len(citing_papers),
             'uniqueLocations': len(locations),
@@ -438,6 +281,11 @@ def main():
     print(f"  Self-citations filtered: {self_citations_filtered}")
     print(f"  Unique locations: {len(locations)}")
     print(f"  Unique countries: {len(country_counts)}")
+    print(f"  Classification cache: {CLASSIFICATION_CACHE.summary()}")
+    print(f"  Self-citation matcher: {SELF_CITATIONS.summary()}")
+    print(f"  Title clusters: {titles.summary()}")
+    print(f"  Authors: {author_index.summary()}")
+    titles.save_decisions('enhanced_citation_analysis')
     
     print(f"\n{'='*40}")
     print("VENUE TIER DISTRIBUTION")
@@ -11,6 +11,8 @@ if (!SERPAPI_KEY) {
   throw new Error('SERPAPI_KEY environment variable not set. Set it with: export SERPAPI_KEY="your_key"');
 }
 const SCHOLAR_ID = 'hIVoKbIAAAAJ';
+// Point SERPAPI_BASE_URL at scripts/serpapi_standin.py to run without spending quota
+const SERPAPI_SEARCH_URL = `${(process.env.SERPAPI_BASE_URL ?? 'https://serpapi.com').replace(/\/$/, '')}/search.json`;
 const SCHOLAR_PROFILE_URL = `https://scholar.google.com/citations?user=${SCHOLAR_ID}&hl=en`;
 const OUTPUT_PATH = join(process.cwd(), 'src/data/citations.json');
 const SCHOLAR_METRICS_OUTPUT_PATH = join(process.cwd(), 'src/data/scholarMetrics.json');
@@ -159,7 +161,7 @@ async function geocodeAffiliation(affiliation: string): Promise<{ lat: number; l
 
 async function fetchAuthorPublications(): Promise<Publication[]> {
   // Use Google Scholar Author API with author_id parameter
-  const url = `https://serpapi.com/search.json?engine=google_scholar_author&author_id=${SCHOLAR_ID}&api_key=${SERPAPI_KEY}`;
+  const url = `${SERPAPI_SEARCH_URL}?engine=google_scholar_author&author_id=${SCHOLAR_ID}&api_key=${SERPAPI_KEY}`;
   
   try {
     console.log(`Fetching from: ${url.replace(SERPAPI_KEY, 'API_KEY_HIDDEN')}`);
@@ -210,7 +212,7 @@ async function fetchAuthorAffiliation(authorLink: string): Promise<string | null
     if (!authorIdMatch) return null;
     
     const authorId = authorIdMatch[1];
-    const url = `https://serpapi.com/search.json?engine=google_scholar_author&author_id=${authorId}&api_key=${SERPAPI_KEY}`;
+    const url = `${SERPAPI_SEARCH_URL}?engine=google_scholar_author&author_id=${authorId}&api_key=${SERPAPI_KEY}`;
     
     const response = await fetch(url);
     if (!response.ok) return null;
@@ -236,7 +238,7 @@ async function fetchCitingPapers(citesId: string, publicationTitle: string): Pro
   let iteration = 0;
   while (hasMore && iteration < maxIterations) {
     iteration++;
-    const url = `https://serpapi.com/search.json?engine=google_scholar&cites=${firstCitesId}&start=${start}&api_key=${SERPAPI_KEY}`;
+    const url = `${SERPAPI_SEARCH_URL}?engine=google_scholar&cites=${firstCitesId}&start=${start}&api_key=${SERPAPI_KEY}`;
     
     try {
       const response = await fetch(url);
@@ -4,14 +4,23 @@ Fetch citation data from SerpAPI for GitHub Actions.
 Uses SERPAPI_KEY from environment variable.
 """
 
+import argparse
 import json
 import os
-import re
 import time
-import urllib.request
-import urllib.error
 from pathlib import Path
 
+from affiliation_extract import AffiliationExtractor
+from classification_cache import ClassificationCache
+from http_client import default_client
+from incremental_refresh import (changed_publications, load_previous, mark_pending, split_citing_papers,
+                                 unfinished_papers)
+from location_aggregate import LocationMap
+from pattern_registry import load_pattern_registry
+from self_citation import load_self_citation_matcher
+from serpapi_fetch import author_url, fetch_all_citations, fetch_url, rate_limiter, response_cache
+from spatial_index import FINE_LOCATION_DECIMALS, cluster_layers
+
 # Get API key from environment
 SERPAPI_KEY = os.environ.get('SERPAPI_KEY')
 if not SERPAPI_KEY:
@@ -19,86 +28,27 @@ if not SERPAPI_KEY:
 
 SCHOLAR_ID = 'hIVoKbIAAAAJ'
 
-# Self-citation patterns
-SELF_NAMES = [
-    'vineeth sai', 'vs narajala', 'vineeth sai narajala', 'v. s. narajala', 
-    'narajala, v', 'narajala, vineeth', 'v s narajala', 'vineeth narajala'
-]
-
-# Venue patterns for categorization
-TIER1_PATTERNS = [
-    'ieee', 'ieee transactions', 'ieee access', 'ieee communications',
-    'acm', 'dl.acm.org', 'acm digital library',
-    'usenix', 'ndss', 'ccs', 's&p', 'sp ', 'infocom',
-    'security', 'oakland', 'crypto', 'eurocrypt', 'asiacrypt',
-    'acsac', 'esorics', 'wisec', 'uss ',
-    'isca', 'micro', 'hpca', 'sigcomm', 'mobicom', 'nsdi', 'sosp', 'osdi', 'eurosys',
-    'pldi', 'popl', 'icse', 'fse', 'ase', 'issta', 'sigmod', 'vldb',
-    'neurips', 'nips', 'icml', 'iclr', 'cvpr', 'iccv', 'eccv', 'aaai', 'ijcai',
-    'workshop on mobility', 'mobiarch', 'mobisys'
-]
-
-TIER2_PATTERNS = [
-    'springer', 'elsevier', 'nature', 'science', 'plos', 'jstor',
-    'wiley', 'taylor & francis', 'mdpi', 'sensors', 'electronics',
-    'journal of', 'transactions on', 'international journal', 'ict express',
-    'conference on', 'symposium on', 'workshop on', 'proceedings of',
-    'ceur-ws.org', 'ceur workshop', 'openreview.net', 'openreview',
-    'pmc.ncbi', 'pubmed', 'ncbi.nlm.nih.gov',
-    'dbpia', 'cyberleninka', '한국통신학회', 'kics',
-    'sol.sbc.org.br', 'sbc.org.br', 'cds.cern.ch', 'books.google.com',
-]
+# Profile owner's name aliases are in self_citation_aliases.json
+SELF_CITATIONS = load_self_citation_matcher(SCHOLAR_ID)
 
-PREPRINT_PATTERNS = [
-    'arxiv', 'preprint', 'ssrn', 'biorxiv', 'medrxiv', 'techrxiv',
-    'researchgate.net', 'researchsquare', 'f1000research', 
-    'preprints.org', 'osf.io', 'zenodo',
-    'digitalcommons', 'repository.lib', 'proquest', 'ela.kpi.ua',
-    'google patents', 'us patent'
-]
 
-# University coordinates for map
-UNIVERSITY_COORDS = {
-    'stanford': {'lat': 37.4275, 'lng': -122.1697, 'country': 'United States'},
-    'mit': {'lat': 42.3601, 'lng': -71.0942, 'country': 'United States'},
-    'berkeley': {'lat': 37.8719, 'lng': -122.2585, 'country': 'United States'},
-    'carnegie mellon': {'lat': 40.4432, 'lng': -79.9428, 'country': 'United States'},
-    'georgia tech': {'lat': 33.7756, 'lng': -84.3963, 'country': 'United States'},
-    'harvard': {'lat': 42.3770, 'lng': -71.1167, 'country': 'United States'},
-    'princeton': {'lat': 40.3431, 'lng': -74.6551, 'country': 'United States'},
-    'cornell': {'lat': 42.4534, 'lng': -76.4735, 'country': 'United States'},
-    'purdue': {'lat': 40.4237, 'lng': -86.9212, 'country': 'United States'},
-    'tsinghua': {'lat': 40.0015, 'lng': 116.3264, 'country': 'China'},
-    'peking': {'lat': 39.9869, 'lng': 116.3059, 'country': 'China'},
-    'zhejiang': {'lat': 30.2616, 'lng': 120.1195, 'country': 'China'},
-    'oxford': {'lat': 51.7548, 'lng': -1.2544, 'country': 'United Kingdom'},
-    'cambridge': {'lat': 52.2043, 'lng': 0.1218, 'country': 'United Kingdom'},
-    'eth zurich': {'lat': 47.3769, 'lng': 8.5417, 'country': 'Switzerland'},
-    'google': {'lat': 37.4220, 'lng': -122.0841, 'country': 'United States'},
-    'microsoft': {'lat': 47.6740, 'lng': -122.1215, 'country': 'United States'},
-    'cern': {'lat': 46.2330, 'lng': 6.0557, 'country': 'Switzerland'},
-    'hong kong': {'lat': 22.2830, 'lng': 114.1370, 'country': 'Hong Kong'},
-    'singapore': {'lat': 1.2966, 'lng': 103.7764, 'country': 'Singapore'},
-    'kaist': {'lat': 36.3701, 'lng': 127.3604, 'country': 'South Korea'},
-}
+def is_self_citation(author_name):
+    return SELF_CITATIONS.is_self(author_name)
 
 
-def is_self_citation(author_name):
-    if not author_name:
-        return False
-    author_lower = author_name.lower().strip()
-    return any(name in author_lower for name in SELF_NAMES)
+# Venue, institution and coordinate tables are in pattern_registry.json
+PATTERNS = load_pattern_registry()
+PATTERN_TABLES = ('venue_tiers_substring', 'university_coords')
+CLASSIFICATION_CACHE = ClassificationCache('fetch_citations_gh', PATTERNS)
+VENUE_CLASSIFIER = PATTERNS.venue_classifier('venue_tiers_substring')
+COORDS_INDEX = PATTERNS.index('university_coords')
+# Fallback affiliations from venue/snippet text, preferring ones COORDS_INDEX can place
+AFFILIATIONS = AffiliationExtractor(COORDS_INDEX)
 
 
+@CLASSIFICATION_CACHE.memoize('venue_tiers_substring')
 def get_venue_tier(venue):
-    v = venue.lower()
-    if any(p in v for p in PREPRINT_PATTERNS):
-        return 'preprint'
-    if any(p in v for p in TIER1_PATTERNS):
-        return 'tier1'
-    if any(p in v for p in TIER2_PATTERNS):
-        return 'tier2'
-    return 'other'
+    return VENUE_CLASSIFIER.tier(venue)
 
 
 def get_venue_score(venue):
@@ -106,81 +56,25 @@ def get_venue_score(venue):
     return {'tier1': 50, 'tier2': 35, 'preprint': 10, 'other': 20}[tier]
 
 
+@CLASSIFICATION_CACHE.memoize('university_coords')
 def get_coords(affiliation):
     if not affiliation:
         return None
-    aff_lower = affiliation.lower()
-    for pattern, coords in UNIVERSITY_COORDS.items():
-        if pattern in aff_lower:
-            return coords.copy()
-    return None
+    match = COORDS_INDEX.lookup(affiliation)
+    return dict(match.value) if match else None
 
 
-def fetch_url(url, retries=3):
-    """Fetch URL with retries"""
-    for attempt in range(retries):
-        try:
-            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-            with urllib.request.urlopen(req, timeout=30) as response:
-                return json.loads(response.read().decode())
-        except urllib.error.HTTPError as e:
-            print(f"  HTTP Error {e.code}: {e.reason}")
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)
-        except Exception as e:
-            print(f"  Error: {e}")
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)
-    return None
-
-
-def fetch_serpapi_citations(publication_cites_id):
-    """Fetch citing papers for a publication from SerpAPI"""
-    papers = []
-    start = 0
-    max_pages = 5  # Limit to 50 citations per publication
-    
-    while start < max_pages * 10:
-        url = f"https://serpapi.com/search.json?engine=google_scholar&cites={publication_cites_id}&start={start}&api_key={SERPAPI_KEY}"
-        
-        data = fetch_url(url)
-        if not data:
-            break
-            
-        results = data.get('organic_results', [])
-        if not results:
-            break
-            
-        for r in results:
-            pub_info = r.get('publication_info', {})
-            venue = pub_info.get('summary', 'Unknown')
-            authors = [a.get('name', '') for a in pub_info.get('authors', [])]
-            
-            papers.append({
-                'title': r.get('title', ''),
-                'venue': venue,
-                'authors': authors,
-                'link': r.get('link', ''),
-                'citationCount': r.get('inline_links', {}).get('cited_by', {}).get('total', 0),
-                'snippet': r.get('snippet', '')
-            })
-        
-        if not data.get('pagination', {}).get('next'):
-            break
-        start += 10
-        time.sleep(1.5)  # Rate limit
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fetch citation data from SerpAPI')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-page publications whose citation count changed since the last run')
+    args = parser.parse_args(argv)
     
-    return papers
-
-
-def main():
     script_dir = Path(__file__).parent
     output_path = script_dir.parent / 'src' / 'data' / 'citations.json'
     
     print("Fetching publications from SerpAPI...")
-    url = f"https://serpapi.com/search.json?engine=google_scholar_author&author_id={SCHOLAR_ID}&api_key={SERPAPI_KEY}"
-    
-    data = fetch_url(url)
+    data = fetch_url(author_url(SCHOLAR_ID, SERPAPI_KEY))
     if not data:
         print("Error fetching publications")
         return 1
@@ -200,20 +94,47 @@ def main():
             'link': a.get('link', '')
         })
     
-    # Fetch citing papers
+    # In incremental mode keep the stored papers of publications whose count is unchanged
+    previous = load_previous(output_path) if args.incremental else None
     all_citing_papers = []
+    held = []  # stored papers of changed publications, dropped once their re-fetch finishes
+    to_refresh = publications
+    if previous:
+        to_refresh = changed_publications(publications, previous)
+        all_citing_papers, held = split_citing_papers(previous, to_refresh)
+        print(f"Incremental refresh: {len(to_refresh)} of {len(publications)} publications changed")
+        # Stored scores are recomputed, not refetched, when the venue tables changed
+        if PATTERNS.stale(previous.get('patternHashes'), 'venue_tiers_substring'):
+            for paper in all_citing_papers + held:
+                venue_score = get_venue_score(paper.get('venue', ''))
+                paper.update(influenceScore=venue_score, venueScore=venue_score)
+            print(f"  Rescored {len(all_citing_papers) + len(held)} stored papers for changed venue tables")
+    refresh_ids = {p['citesId'] for p in to_refresh}
+    kept_titles = {paper['title'].lower().strip() for paper in all_citing_papers}
+    
+    # Fetch citing papers (limit to 50 citations per publication)
+    print("Fetching citing papers...")
+    fetch_stats = {}
+    fetched = fetch_all_citations(
+        [p['citesId'] for p in to_refresh if p.get('citesId')],
+        SERPAPI_KEY, max_pages=5, default_venue='Unknown',
+        expected_counts={p['citesId']: p['citationCount'] for p in to_refresh}, stats=fetch_stats
+    )
     
     for i, pub in enumerate(publications):
-        if not pub.get('citesId'):
+        if not pub.get('citesId') or pub['citesId'] not in refresh_ids:
             continue
         
-        print(f"[{i+1}/{len(publications)}] Fetching citations for: {pub['title'][:50]}...")
-        papers = fetch_serpapi_citations(pub['citesId'])
+        print(f"[{i+1}/{len(publications)}] Citations for: {pub['title'][:50]}...")
+        papers = fetched.get(pub['citesId'], [])
         
         for p in papers:
             # Filter self-citations
             if any(is_self_citation(a) for a in p['authors']):
                 continue
+            # Stored papers already cover it
+            if p['title'].lower().strip() in kept_titles:
+                continue
             
             venue_score = get_venue_score(p['venue'])
             
@@ -233,39 +154,36 @@ def main():
         
         print(f"  Found {len(papers)} citing papers")
     
+    # Publications whose pages did not all arrive keep their stored papers and are re-paged next run
+    pending = mark_pending(to_refresh, fetch_stats['complete'])
+    if pending:
+        seen = {paper['title'].lower().strip() for paper in all_citing_papers}
+        restored = [paper for paper in unfinished_papers(held, to_refresh)
+                    if paper['title'].lower().strip() not in seen]
+        all_citing_papers.extend(restored)
+        print(f"{pending} publications not fully fetched, kept {len(restored)} stored citing papers; "
+              f"marked refreshPending for the next run")
+    
     print(f"\nTotal citing papers (after filtering): {len(all_citing_papers)}")
     
     # Aggregate locations
     print("Aggregating locations...")
-    location_map = {}
+    location_map = LocationMap(decimals=FINE_LOCATION_DECIMALS)
     
-    for paper in all_citing_papers:
+    texts = [f"{paper.get('venue', '')} {paper.get('snippet', '')}" for paper in all_citing_papers]
+    for paper, candidates in zip(all_citing_papers, AFFILIATIONS.extract_batch(texts)):
         # Try to extract affiliation from venue/snippet
-        text = f"{paper['venue']} {paper['snippet']}"
-        uni_match = re.search(r'([A-Z][^,]+(?:University|Institute|College|Lab)[^,]*)', text)
-        if uni_match:
-            aff = uni_match.group(1).strip()
+        candidate = AFFILIATIONS.pick(candidates)
+        if candidate:
+            aff = candidate.text
             paper['affiliation'] = aff
             
             coords = get_coords(aff)
             if coords:
-                key = f"{coords['lat']:.2f},{coords['lng']:.2f}"
-                if key not in location_map:
-                    location_map[key] = {
-                        'latitude': coords['lat'],
-                        'longitude': coords['lng'],
-                        'country': coords['country'],
-                        'count': 0,
-                        'papers': [],
-                        'affiliations': []
-                    }
-                location_map[key]['count'] += 1
-                if len(location_map[key]['papers']) < 10:
-                    location_map[key]['papers'].append(paper['title'])
-                if aff not in location_map[key]['affiliations']:
-                    location_map[key]['affiliations'].append(aff)
+                location_map.add(coords['lat'], coords['lng'], coords['country'], None,
+                                 paper['title'], [aff], rank=paper.get('influenceScore', 0))
     
-    locations = list(location_map.values())
+    locations = location_map.locations()
     print(f"  Found {len(locations)} unique locations")
     
     # Calculate stats
@@ -284,9 +202,11 @@ def main():
     citation_data = {
         'lastUpdated': time.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
         'scholarId': SCHOLAR_ID,
+        'patternHashes': PATTERNS.tag(*PATTERN_TABLES),
         'publications': publications,
         'citingPapers': all_citing_papers,
         'locations': locations,
+        'clusterLayers': cluster_layers(locations),
         'stats': {
             'totalCitations': len(all_citing_papers),
             'uniqueLocations': len(locations),
@@ -309,6 +229,13 @@ def main():
     print(f"  Publications: {len(publications)}")
     print(f"  Citing Papers: {len(all_citing_papers)}")
     print(f"  Locations: {len(locations)}")
+    if response_cache:
+        print(f"  Response cache: {response_cache.summary()}")
+    print(f"  HTTP: {default_client.summary()}")
+    print(f"  Rate limiter: {rate_limiter.summary()}")
+    print(f"  Classification cache: {CLASSIFICATION_CACHE.summary()}")
+    print(f"  Self-citation matcher: {SELF_CITATIONS.summary()}")
+    print(f"  Affiliation extraction: {AFFILIATIONS.summary()}")
     print(f"\nVenue Tiers:")
     print(f"  Tier 1 (IEEE/ACM/USENIX): {tier_counts['tier1']}")
     print(f"  Tier 2 (Peer-reviewed): {tier_counts['tier2']}")
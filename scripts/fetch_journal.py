@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for long citation refreshes.
+Every fetched (cites_id, start) page is written as one JSON line the moment
+it arrives, so a crashed or timed-out run can be resumed without spending the
+API budget on pages it already has.
+"""
+
+import json
+import time
+from pathlib import Path
+
+JOURNAL_PATH = Path(__file__).parent / 'citation_cache' / 'refresh_journal.jsonl'
+
+
+class FetchJournal:
+    """JSONL journal of fetched cites= pages, replayable with resume=True"""
+
+    def __init__(self, path=JOURNAL_PATH, resume=False):
+        self.path = Path(path)
+        self.pages = {}
+        self.replayed = 0
+        self.recorded = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            self._load()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb+') as f:
+            complete = 0  # bytes up to the end of the last newline-terminated line
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn final line from the crash
+                complete += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.pages[(entry['citesId'], entry['start'])] = entry
+            # Drop the torn line, or the first record appended would be glued to it
+            f.truncate(complete)
+
+    def get(self, cites_id, start):
+        """Return the journaled page, counting it as replayed, or None"""
+        entry = self.pages.get((cites_id, start))
+        if entry is not None:
+            self.replayed += 1
+        return entry
+
+    def record(self, cites_id, start, papers, has_next):
+        entry = {
+            'citesId': cites_id,
+            'start': start,
+            'fetchedAt': time.time(),
+            'hasNext': has_next,
+            'papers': papers,
+        }
+        self.pages[(cites_id, start)] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.recorded += 1
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        """Close and delete the journal once the run's output is safely written"""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def summary(self):
+        return f"{self.replayed} pages replayed, {self.recorded} pages recorded"
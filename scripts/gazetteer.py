@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Offline gazetteer of institutions, cities and countries in a memory-mapped file.
+gazetteer.bin holds fixed-size place records, a sorted hash index over their
+normalized names, a sorted hash index over the names' first words and a
+string pool. Opening it maps the file without parsing
+it, so startup costs the same for a few hundred names as for a full
+GeoNames dump. A lookup hashes every word n-gram of the affiliation and
+binary-searches the index, so it needs neither the network nor a scan of
+the table. build_gazetteer.py writes the file.
+"""
+
+import bisect
+import hashlib
+import mmap
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import NamedTuple
+
+GAZETTEER_PATH = Path(__file__).parent / 'gazetteer.bin'
+
+MAGIC = b'GAZ1'
+VERSION = 2
+# magic, version, longest name in words, places, names, distinct first words
+HEADER = struct.Struct('<4sHHIII')
+# lat, lng, name, country and city string offsets, kind, source
+PLACE = struct.Struct('<ddIIIBB')
+# string offset of the name, place index (the sorted hashes are stored separately)
+NAME = struct.Struct('<II')
+HASH = struct.Struct('<Q')
+STRING_LENGTH = struct.Struct('<H')
+
+# Place kinds in match priority order, with the confidence each one carries
+INSTITUTION, CITY, COUNTRY = 0, 1, 2
+KIND_CONFIDENCE = {INSTITUTION: 1.0, CITY: 0.8, COUNTRY: 0.6}
+# Where a place came from, most trusted first
+REGISTRY, GEOCODED, CITATIONMAP, GEONAMES = 0, 1, 2, 3
+# Names longer than this many words are not indexed
+MAX_NAME_WORDS = 8
+
+NON_WORD = re.compile(r'[^\w\s]')
+
+
+def name_tokens(text):
+    """Casefolded words of text without accents or punctuation"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return NON_WORD.sub(' ', text).split()
+
+
+def name_hash(name):
+    return HASH.unpack(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest())[0]
+
+
+class GazetteerMatch(NamedTuple):
+    name: str           # the gazetteer name that matched
+    lat: float
+    lng: float
+    country: str
+    city: str
+    kind: int           # INSTITUTION, CITY or COUNTRY
+    source: int         # REGISTRY, GEOCODED, CITATIONMAP or GEONAMES
+    confidence: float
+    start: int          # word span of the match in the affiliation
+    end: int
+
+    def coords(self):
+        return {'lat': self.lat, 'lng': self.lng, 'country': self.country, 'city': self.city}
+
+
+def write_gazetteer(path, places):
+    """Write places, an iterable of (names, lat, lng, country, city, kind, source), to path
+
+    A name already claimed by an earlier place is skipped, so sources should
+    come most trusted first.
+    """
+    strings = bytearray()
+    string_offsets = {}
+
+    def intern(text):
+        if text not in string_offsets:
+            encoded = text.encode('utf-8')
+            string_offsets[text] = len(strings)
+            strings.extend(STRING_LENGTH.pack(len(encoded)) + encoded)
+        return string_offsets[text]
+
+    records = []
+    index = {}  # hash -> (name offset, place index)
+    heads = set()  # hashes of the names' first words
+    max_words = 0
+    for names, lat, lng, country, city, kind, source in places:
+        keys = []
+        for name in names:
+            tokens = name_tokens(name)
+            if not tokens or len(tokens) > MAX_NAME_WORDS:
+                continue
+            key = ' '.join(tokens)
+            if name_hash(key) not in index and key not in keys:
+                keys.append(key)
+        if not keys:
+            continue
+        place = len(records)
+        records.append(PLACE.pack(lat, lng, intern(keys[0]), intern(country or ''), intern(city or ''), kind, source))
+        for key in keys:
+            index[name_hash(key)] = (intern(key), place)
+            heads.add(name_hash(key.split()[0]))
+            max_words = max(max_words, len(key.split()))
+
+    hashes = sorted(index)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_words, len(records), len(hashes), len(heads)))
+        f.writelines(records)
+        f.writelines(HASH.pack(h) for h in hashes)
+        f.writelines(HASH.pack(h) for h in sorted(heads))
+        f.writelines(NAME.pack(*index[h]) for h in hashes)
+        f.write(strings)
+    return len(records), len(hashes)
+
+
+class Gazetteer:
+    """Read-only view of a gazetteer file"""
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_words, self.places, self.names, heads = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} gazetteer; rebuild it with build_gazetteer.py")
+        self._places_at = HEADER.size
+        self._hashes_at = self._places_at + self.places * PLACE.size
+        self._heads_at = self._hashes_at + self.names * HASH.size
+        self._names_at = self._heads_at + heads * HASH.size
+        self._strings_at = self._names_at + self.names * NAME.size
+        self._hashes = self._hash_array(self._hashes_at, self._heads_at)
+        self._heads = self._hash_array(self._heads_at, self._names_at)
+        self.stats = {'lookups': 0, 'matches': 0}
+
+    def __len__(self):
+        return self.names
+
+    def _hash_array(self, start, end):
+        """Sorted hashes in the file: used in place on a little-endian host,
+        copied and byte-swapped on any other"""
+        hashes = memoryview(self._map)[start:end]
+        if sys.byteorder == 'little':
+            return hashes.cast('Q')
+        hashes = array('Q', hashes)
+        hashes.byteswap()
+        return hashes
+
+    @staticmethod
+    def _contains(hashes, h):
+        i = bisect.bisect_left(hashes, h)
+        return i, i < len(hashes) and hashes[i] == h
+
+    def _string(self, offset):
+        at = self._strings_at + offset
+        (length,) = STRING_LENGTH.unpack_from(self._map, at)
+        return self._map[at + STRING_LENGTH.size:at + STRING_LENGTH.size + length].decode('utf-8')
+
+    def _find(self, key):
+        """Place index for a normalized name, or None"""
+        i, found = self._contains(self._hashes, name_hash(key))
+        if not found:
+            return None
+        name_offset, place = NAME.unpack_from(self._map, self._names_at + i * NAME.size)
+        return place if self._string(name_offset) == key else None
+
+    def _place(self, place, start, end):
+        lat, lng, name, country, city, kind, source = PLACE.unpack_from(
+            self._map, self._places_at + place * PLACE.size)
+        return GazetteerMatch(self._string(name), lat, lng, self._string(country), self._string(city),
+                              kind, source, KIND_CONFIDENCE[kind], start, end)
+
+    def lookup(self, text):
+        """Best place named in text: institutions before cities before countries,
+        then the most trusted source, then the longest name, then the earliest"""
+        self.stats['lookups'] += 1
+        tokens = name_tokens(text)
+        best = None
+        for start in range(len(tokens)):
+            if not self._contains(self._heads, name_hash(tokens[start]))[1]:
+                continue
+            for end in range(min(len(tokens), start + self.max_words), start, -1):
+                place = self._find(' '.join(tokens[start:end]))
+                if place is None:
+                    continue
+                match = self._place(place, start, end)
+                rank = (match.kind, match.source, start - end, start)
+                if best is None or rank < best[0]:
+                    best = (rank, match)
+                break
+        if best is None:
+            return None
+        self.stats['matches'] += 1
+        return best[1]
+
+    def coords(self, text):
+        """{'lat', 'lng', 'country', 'city'} of the best place in text, or None"""
+        match = self.lookup(text)
+        return match.coords() if match else None
+
+    def summary(self):
+        return (f"{self.names} names, {self.stats['matches']} of "
+                f"{self.stats['lookups']} lookups matched")
+
+
+def load_gazetteer(path=GAZETTEER_PATH):
+    """The gazetteer at path, or None if it has not been built"""
+    return Gazetteer(path) if Path(path).exists() else None
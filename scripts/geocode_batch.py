@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Batch geocoding stage: each distinct institution is geocoded once per run.
+Affiliations are collected for the whole run and canonicalized with the
+geocode cache's normalization, so "Tsinghua University." and "tsinghua
+university" are one query.
+Offline resolvers (the pattern registry, the gazetteer) and the geocode cache
+answer what they can; only the remainder goes to the network, through a
+small worker pool that shares one rate limiter. Geocoding cost then scales
+with distinct institutions instead of author rows.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from geocode_cache import normalize_affiliation
+from rate_limiter import AdaptiveRateLimiter
+
+# Nominatim's usage policy allows at most one request per second
+NOMINATIM_RATE = 1.0
+# Requests in flight at once; the limiter, not the pool, sets the pace
+DEFAULT_WORKERS = 2
+
+MISSING = object()
+
+
+def nominatim_limiter(rate=NOMINATIM_RATE):
+    """Limiter that never exceeds rate, backing off on throttle responses"""
+    return AdaptiveRateLimiter(rate=rate, min_rate=rate / 5, max_rate=rate, burst=1)
+
+
+class RateLimitedGeocoder:
+    """geopy geocoder proxy whose geocode() waits for the limiter first
+
+    A geocode() call may issue several queries (the whole affiliation, then
+    its parts); each one takes a token. throttle_errors are the exceptions
+    that mean the provider is pushing back.
+    """
+
+    def __init__(self, geolocator, limiter, throttle_errors=()):
+        self.geolocator = geolocator
+        self.limiter = limiter
+        self.throttle_errors = throttle_errors
+
+    def geocode(self, query, **kwargs):
+        self.limiter.acquire()
+        try:
+            location = self.geolocator.geocode(query, **kwargs)
+        except self.throttle_errors:
+            self.limiter.on_throttle()
+            raise
+        self.limiter.on_success()
+        return location
+
+
+class GeocodeBatch:
+    """Resolves a run's affiliations, each distinct one once
+
+    resolvers are offline affiliation -> coordinates (or None) functions,
+    tried in order. cache is a GeocodeCache whose fresh answers, negative
+    ones included, are final. geocode is the network fallback, called from
+    worker threads, so it must be thread-safe and do its own rate limiting.
+    """
+
+    def __init__(self, resolvers=(), cache=None, geocode=None, workers=DEFAULT_WORKERS):
+        self.resolvers = list(resolvers)
+        self.cache = cache
+        self.geocode = geocode
+        self.workers = workers
+        self.stats = {'total': 0, 'unique': 0, 'offline': 0, 'cached': 0, 'queried': 0,
+                      'found': 0, 'offline_seconds': 0.0, 'network_seconds': 0.0}
+
+    def run(self, affiliations):
+        """{normalized affiliation: coordinates or None} for the given affiliations"""
+        spellings = {}  # normalized -> first spelling seen
+        for affiliation in affiliations:
+            self.stats['total'] += 1
+            key = normalize_affiliation(affiliation)
+            if key:
+                spellings.setdefault(key, affiliation)
+        self.stats['unique'] = len(spellings)
+
+        start = time.perf_counter()
+        results = {}
+        pending = []
+        for key, affiliation in spellings.items():
+            coords = next((c for c in (resolve(affiliation) for resolve in self.resolvers) if c), None)
+            if coords:
+                self.stats['offline'] += 1
+                results[key] = coords
+                continue
+            cached = self.cache.get(affiliation, MISSING) if self.cache is not None else MISSING
+            if cached is not MISSING:
+                self.stats['cached'] += 1
+                results[key] = cached
+            elif self.geocode is not None:
+                pending.append((key, affiliation))
+            else:
+                results[key] = None
+        self.stats['offline_seconds'] = time.perf_counter() - start
+
+        if pending:
+            start = time.perf_counter()
+            self.stats['queried'] = len(pending)
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='geocode') as pool:
+                found = pool.map(self.geocode, [affiliation for _, affiliation in pending])
+                for (key, _), coords in zip(pending, found):
+                    results[key] = coords
+                    if coords:
+                        self.stats['found'] += 1
+            self.stats['network_seconds'] = time.perf_counter() - start
+        return results
+
+    def summary(self):
+        return (f"{self.stats['unique']} unique of {self.stats['total']} affiliations: "
+                f"{self.stats['offline']} resolved offline, {self.stats['cached']} from the geocode cache, "
+                f"{self.stats['found']}/{self.stats['queried']} found online; "
+                f"{self.stats['offline_seconds']:.2f}s offline, {self.stats['network_seconds']:.1f}s online")
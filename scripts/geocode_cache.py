@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Persistent geocode cache for Nominatim lookups.
+Results are stored in a SQLite database under citation_cache/, keyed on the
+normalized affiliation, so a repeat run resolves every institution it has
+seen before from disk instead of over the network. Coordinates are kept
+indefinitely; "not found" answers expire after a TTL so institutions
+Nominatim learns about later are retried. The database runs in WAL mode, so
+several processes or worker threads can read and write it at once.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+CACHE_PATH = Path(__file__).parent / 'citation_cache' / 'geocode.sqlite3'
+
+# Seconds a negative (not found) result is trusted before it is looked up again
+DEFAULT_NEGATIVE_TTL = 30 * 24 * 3600
+# Milliseconds a writer waits for another writer's lock
+BUSY_TIMEOUT_MS = 30000
+
+NON_WORD = re.compile(r'[^\w\s,]')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    key TEXT PRIMARY KEY,
+    affiliation TEXT NOT NULL,
+    result TEXT,
+    fetched_at REAL NOT NULL
+)
+"""
+
+# A negative result never replaces coordinates that are already known
+UPSERT = """
+INSERT INTO geocodes (key, affiliation, result, fetched_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    affiliation = excluded.affiliation, result = excluded.result, fetched_at = excluded.fetched_at
+WHERE excluded.result IS NOT NULL OR geocodes.result IS NULL
+"""
+
+
+def normalize_affiliation(affiliation):
+    """Casefolded affiliation without accents, punctuation (but commas) or extra spaces"""
+    text = unicodedata.normalize('NFKD', affiliation or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return ' '.join(NON_WORD.sub(' ', text).split())
+
+
+class GeocodeCache:
+    """SQLite-backed affiliation -> {'lat', 'lng', 'country'} (or None) cache"""
+
+    def __init__(self, path=CACHE_PATH, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.path = Path(path)
+        self.negative_ttl = negative_ttl
+        self.stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'expired': 0, 'writes': 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self):
+        """This thread's connection, opened (and the schema created) on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, affiliation, default=None):
+        """Cached coordinates, None for a fresh negative result, default if unknown or expired"""
+        key = normalize_affiliation(affiliation)
+        row = self._connection().execute(
+            'SELECT result, fetched_at FROM geocodes WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self._count('misses')
+            return default
+        result, fetched_at = row
+        if result is not None:
+            self._count('hits')
+            return json.loads(result)
+        if time.time() - fetched_at > self.negative_ttl:
+            self._count('expired')
+            return default
+        self._count('negative_hits')
+        return None
+
+    def put(self, affiliation, result):
+        """Store coordinates, or None for an affiliation Nominatim could not place"""
+        key = normalize_affiliation(affiliation)
+        encoded = json.dumps(result, ensure_ascii=False) if result is not None else None
+        self._connection().execute(UPSERT, (key, affiliation, encoded, time.time()))
+        self._count('writes')
+
+    def positives(self):
+        """(affiliation, coordinates) of every entry Nominatim placed"""
+        rows = self._connection().execute(
+            'SELECT affiliation, result FROM geocodes WHERE result IS NOT NULL ORDER BY fetched_at')
+        return [(affiliation, json.loads(result)) for affiliation, result in rows]
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM geocodes').fetchone()[0]
+
+    def summary(self):
+        return (f"{self.stats['hits']} hits, {self.stats['negative_hits']} negative hits, "
+                f"{self.stats['misses']} misses, {self.stats['expired']} expired, "
+                f"{self.stats['writes']} writes")
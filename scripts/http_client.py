@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Pooled keep-alive HTTP client shared by the fetch scripts.
+Reuses TCP/TLS connections per host instead of a fresh urlopen handshake per
+page, caps connections per host and decodes gzip/deflate bodies. Any non-2xx
+response, an unfollowed redirect included, raises HttpError.
+"""
+
+import gzip
+import http.client
+import json
+import threading
+import urllib.parse
+import zlib
+from collections import defaultdict
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Errors that mean a pooled keep-alive connection went stale under us
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class HttpError(Exception):
+    """Non-2xx response; carries the status and headers for callers that back off"""
+
+    def __init__(self, status, reason, headers=None, body=b''):
+        super().__init__(f"HTTP {status}: {reason}")
+        self.code = status
+        self.reason = reason
+        self.headers = headers or {}
+        self.body = body
+
+
+class HttpResponse:
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+def decode_body(body, encoding):
+    encoding = (encoding or '').lower()
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)  # raw deflate stream
+    return body
+
+
+class HttpClient:
+    """Thread-safe HTTP client with a keep-alive connection pool per host"""
+
+    def __init__(self, max_per_host=4, timeout=30, headers=None):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.stats = {'requests': 0, 'connections_opened': 0, 'connections_reused': 0}
+        self._idle = defaultdict(list)
+        self._slots = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, netloc):
+        conn_cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        with self._lock:
+            self.stats['connections_opened'] += 1
+        return conn_cls(netloc, timeout=self.timeout)
+
+    def _slot(self, host_key):
+        with self._lock:
+            return self._slots[host_key]
+
+    def _checkout(self, host_key):
+        with self._lock:
+            if self._idle[host_key]:
+                self.stats['connections_reused'] += 1
+                return self._idle[host_key].pop(), True
+        return self._connect(*host_key), False
+
+    def _checkin(self, host_key, conn):
+        with self._lock:
+            self._idle[host_key].append(conn)
+
+    def request(self, method, url, headers=None):
+        parts = urllib.parse.urlsplit(url)
+        host_key = (parts.scheme, parts.netloc)
+        path = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+        send_headers = dict(self.headers, **(headers or {}))
+
+        with self._slot(host_key):
+            with self._lock:
+                self.stats['requests'] += 1
+            conn, reused = self._checkout(host_key)
+            try:
+                conn.request(method, path, headers=send_headers)
+                resp = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive socket: retry once on a fresh one
+                conn = self._connect(*host_key)
+                try:
+                    conn.request(method, path, headers=send_headers)
+                    resp = conn.getresponse()
+                except Exception:
+                    conn.close()
+                    raise
+            except Exception:
+                conn.close()
+                raise
+
+            try:
+                raw = resp.read()
+            except Exception:
+                conn.close()
+                raise
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(host_key, conn)
+
+        body = decode_body(raw, resp_headers.get('content-encoding'))
+        # Redirects are not followed, so a 3xx is an error too rather than a page to parse and cache
+        if not 200 <= resp.status < 300:
+            raise HttpError(resp.status, resp.reason, resp_headers, body)
+        return HttpResponse(resp.status, resp.reason, resp_headers, body)
+
+    def get(self, url, headers=None):
+        return self.request('GET', url, headers)
+
+    def get_json(self, url, headers=None):
+        return self.get(url, headers).json()
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+    def summary(self):
+        return (f"{self.stats['requests']} requests over {self.stats['connections_opened']} connections "
+                f"({self.stats['connections_reused']} reused)")
+
+
+default_client = HttpClient()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Incremental refresh helpers.
+Compares the author profile's per-publication citation counts with the ones
+stored in the existing citations.json so only publications whose count moved
+get re-paged, and merges the re-fetched citing papers into the stored set.
+A changed publication keeps its stored papers, and is flagged to be
+re-paged again, until a run fetches it completely.
+"""
+
+import json
+
+
+def load_previous(output_path):
+    """Load the existing citations.json, or None if there is nothing to build on"""
+    if not output_path.exists():
+        return None
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"  Could not read previous output ({e}), doing a full refresh")
+        return None
+
+
+def publication_key(pub):
+    return pub.get('citesId') or pub.get('title', '').lower().strip()
+
+
+def previous_citation_counts(previous):
+    """{citesId or title: citationCount} as stored by the previous run
+
+    Publications the previous run did not finish paging (skipped or cut short
+    by the budget, or failed) are stored with refreshPending and map to None,
+    so they count as changed until a run fetches them completely.
+    """
+    if not previous:
+        return {}
+    return {
+        publication_key(p): None if p.get('refreshPending') else p.get('citationCount', 0) or 0
+        for p in previous.get('publications', [])
+    }
+
+
+def mark_pending(publications, complete):
+    """Flag the publications with citations whose cites_id is not in complete
+
+    Returns how many were flagged.
+    """
+    pending = 0
+    for pub in publications:
+        if pub.get('citesId') and pub.get('citationCount', 0) and pub['citesId'] not in complete:
+            pub['refreshPending'] = True
+            pending += 1
+    return pending
+
+
+def changed_publications(publications, previous):
+    """Return publications whose citation count differs from the previous run"""
+    previous_counts = previous_citation_counts(previous)
+    return [
+        pub for pub in publications
+        if previous_counts.get(publication_key(pub)) != (pub.get('citationCount', 0) or 0)
+    ]
+
+
+def split_citing_papers(previous, changed):
+    """(kept, held) previous citing papers
+
+    kept papers belong to unchanged publications. held papers belong to the
+    changed ones being re-fetched; they are only dropped for the publications
+    whose re-fetch finishes (see unfinished_papers).
+    """
+    changed_titles = {pub['title'] for pub in changed}
+    kept, held = [], []
+    for paper in previous.get('citingPapers', []):
+        (held if paper.get('citedPublication') in changed_titles else kept).append(paper)
+    return kept, held
+
+
+def unfinished_papers(held, changed):
+    """The held papers of changed publications that mark_pending() flagged"""
+    pending_titles = {pub['title'] for pub in changed if pub.get('refreshPending')}
+    return [paper for paper in held if paper.get('citedPublication') in pending_titles]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Per-location citation aggregates with hashed membership and bounded samples.
+The aggregation loops used to check every citing title and affiliation
+against the location's growing lists, so a city with many citing papers made
+each further row slower. A LocationAggregate keeps exact counts, a set of
+the titles seen and a count per affiliation, pruned to the most common once
+a location has seen too many. The papers and affiliations it emits are
+fixed-size top-k samples, so per-row cost stays constant no matter how many
+papers land in one city.
+"""
+
+import heapq
+from collections import Counter
+
+from spatial_index import LOCATION_DECIMALS, location_key
+
+# Paper titles and affiliations emitted per location
+PAPER_SAMPLE_SIZE = 10
+AFFILIATION_SAMPLE_SIZE = 10
+# Affiliations counted per location: past twice this many distinct ones, only
+# this many of the most common are kept (the rest start again from zero)
+AFFILIATION_CAPACITY = 256
+
+
+class TopK:
+    """The k highest-ranked items offered, ties going to the earliest"""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []  # (rank, -arrival, item); the weakest entry on top
+        self._members = Counter()  # item -> entries in the heap
+        self._arrivals = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, item):
+        return item in self._members
+
+    def add(self, item, rank=0):
+        self._arrivals += 1
+        entry = (rank, -self._arrivals, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            evicted = heapq.heapreplace(self._heap, entry)[2]
+            self._members[evicted] -= 1
+            if not self._members[evicted]:
+                del self._members[evicted]
+        else:
+            return
+        self._members[item] += 1
+
+    def items(self):
+        """Best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+class LocationAggregate:
+    """One map location: its citation count and samples of its papers and affiliations
+
+    Papers are ranked by the rank given with them (first seen when equal);
+    affiliations by how many citations they account for here.
+    """
+
+    def __init__(self, latitude, longitude, country, city=None,
+                 paper_limit=PAPER_SAMPLE_SIZE, affiliation_limit=AFFILIATION_SAMPLE_SIZE,
+                 affiliation_capacity=AFFILIATION_CAPACITY):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.country = country
+        self.city = city  # None for scripts that do not record a city
+        self.count = 0
+        self.titles = set()
+        self.papers = TopK(paper_limit)
+        self.affiliations = Counter()
+        self.affiliation_limit = affiliation_limit
+        self.affiliation_capacity = max(affiliation_capacity, affiliation_limit)
+
+    def __contains__(self, title):
+        return title in self.titles
+
+    def add(self, title, affiliations=(), rank=0):
+        """Count one citation from title, crediting its affiliations"""
+        self.count += 1
+        if title not in self.titles:
+            self.titles.add(title)
+            self.papers.add(title, rank)
+        for affiliation in affiliations:
+            if affiliation:
+                self.affiliations[affiliation] += 1
+        if len(self.affiliations) > 2 * self.affiliation_capacity:
+            self._prune_affiliations()
+
+    def _prune_affiliations(self):
+        keep = set(heapq.nlargest(self.affiliation_capacity, self.affiliations, key=self.affiliations.__getitem__))
+        self.affiliations = Counter({a: n for a, n in self.affiliations.items() if a in keep})
+
+    def top_affiliations(self):
+        # nlargest is stable, so equally common affiliations stay in first-seen order
+        return heapq.nlargest(self.affiliation_limit, self.affiliations, key=self.affiliations.__getitem__)
+
+    def to_dict(self):
+        """The citations.json location entry"""
+        entry = {'latitude': self.latitude, 'longitude': self.longitude, 'country': self.country}
+        if self.city is not None:
+            entry['city'] = self.city
+        entry.update(count=self.count, papers=self.papers.items(), affiliations=self.top_affiliations())
+        return entry
+
+
+class LocationMap:
+    """LocationAggregates keyed by location_key() grid cell
+
+    Coordinates are rounded to decimals places to find the cell. The first
+    location added to a cell gives it its coordinates, country and city.
+    """
+
+    def __init__(self, decimals=LOCATION_DECIMALS, **limits):
+        self.decimals = decimals
+        self.limits = limits  # paper_limit / affiliation_limit / affiliation_capacity for every location
+        self._locations = {}
+
+    def __len__(self):
+        return len(self._locations)
+
+    def get(self, lat, lng, country, city=None):
+        """The aggregate for the cell containing (lat, lng), created if new"""
+        key = location_key(lat, lng, self.decimals)
+        location = self._locations.get(key)
+        if location is None:
+            location = self._locations[key] = LocationAggregate(lat, lng, country, city, **self.limits)
+        return location
+
+    def add(self, lat, lng, country, city, title, affiliations=(), rank=0):
+        self.get(lat, lng, country, city).add(title, affiliations, rank)
+
+    def locations(self):
+        """citations.json location entries in first-seen order"""
+        return [location.to_dict() for location in self._locations.values()]
@@ -10,37 +10,20 @@ import time
 from collections import defaultdict
 from pathlib import Path
 
-SCHOLAR_ID = 'hIVoKbIAAAAJ'
-
-# Self-citation patterns
-SELF_NAMES = [
-    'vineeth sai', 'vs narajala', 'vineeth sai narajala', 'v. s. narajala', 
-    'narajala, v', 'narajala, vineeth', 'v s narajala', 'vineeth narajala',
-    'v narajala', 'narajala v', 'narajala vs', 'vineeth s', 'v. narajala'
-]
-
-# Venue classification patterns
-TIER1_PATTERNS = [
-    r'\bieee\b', r'\bieee transactions\b', r'\bieee access\b', r'\bacm\b',
-    r'\busenix\b', r'\bndss\b', r'\bccs\b', r'\bs&p\b', r'\binfocom\b',
-    r'\bneurips\b', r'\bicml\b', r'\biclr\b', r'\bcvpr\b', r'\baaai\b', r'\bijcai\b',
-    r'\bsosp\b', r'\bosdi\b', r'\bnsdi\b', r'\bsigcomm\b', r'\bmobicom\b',
-    r'\bicse\b', r'\bfse\b', r'\bpldi\b', r'\bpopl\b', r'\bsigmod\b', r'\bvldb\b',
-]
+from author_index import AuthorIndex
+from batch_classify import BatchClassifier
+from classification_cache import ClassificationCache
+from location_aggregate import LocationMap
+from pattern_registry import load_pattern_registry
+from self_citation import load_self_citation_matcher
+from spatial_index import cluster_layers
+from title_index import TitleIndex
+from title_join import TitleJoin
 
-TIER2_PATTERNS = [
-    r'\bspringer\b', r'\belsevier\b', r'\bnature\b', r'\bscience\b', r'\bplos\b',
-    r'\bwiley\b', r'\bmdpi\b', r'\bsensors\b', r'\belectronics\b',
-    r'\bjournal of\b', r'\btransactions on\b', r'\binternational journal\b',
-    r'\bconference on\b', r'\bsymposium on\b', r'\bworkshop on\b', r'\bproceedings\b',
-    r'\bceur-ws\b', r'\bopenreview\b', r'\bpubmed\b', r'\bncbi\b',
-]
+SCHOLAR_ID = 'hIVoKbIAAAAJ'
 
-PREPRINT_PATTERNS = [
-    r'\barxiv\b', r'\bpreprint\b', r'\bssrn\b', r'\bbiorxiv\b', r'\bmedrxiv\b',
-    r'\bresearchgate\b', r'\bresearchsquare\b', r'\bzenodo\b', r'\bosf\.io\b',
-    r'\bdigitalcommons\b', r'\brepository\b', r'\bproquest\b', r'\bthesis\b',
-]
+# Profile owner's name aliases are in self_citation_aliases.json
+SELF_CITATIONS = load_self_citation_matcher(SCHOLAR_ID)
 
 # Domain to search URL patterns
 DOMAIN_SEARCH_URLS = {
@@ -79,53 +62,45 @@ def generate_paper_link(title, venue):
     # Fallback to Google Scholar search
     return f'https://scholar.google.com/scholar?q={encoded_title}'
 
-# Prestigious institutions
-PRESTIGIOUS_INSTITUTIONS = [
-    'stanford', 'mit', 'massachusetts institute', 'berkeley', 'uc berkeley',
-    'carnegie mellon', 'cmu', 'harvard', 'princeton', 'cornell', 'georgia tech',
-    'purdue', 'oxford', 'cambridge', 'eth zurich', 'tsinghua', 'peking', 'zhejiang',
-    'national university of singapore', 'nus', 'kaist', 'google', 'microsoft',
-    'meta', 'deepmind', 'amazon', 'nvidia', 'openai', 'anthropic', 'cisco',
-    'yale', 'columbia', 'ucla', 'caltech', 'nyu', 'johns hopkins', 'duke',
-    'ben-gurion', 'ben gurion', 'technion', 'tel aviv', 'tokyo', 'kyoto',
-]
 
-# Countries to exclude (geocoding noise)
-EXCLUDED_COUNTRIES = ['Papua New Guinea', 'Mali']
+def is_self_citation(author_name):
+    return SELF_CITATIONS.is_self(author_name)
 
 
-def is_self_citation(author_name):
-    if not author_name:
-        return False
-    author_lower = author_name.lower().strip()
-    return any(name in author_lower for name in SELF_NAMES)
+# Venue, institution and coordinate tables are in pattern_registry.json
+PATTERNS = load_pattern_registry()
+PATTERN_TABLES = ('venue_tiers_word', 'prestigious_institutions', 'excluded_countries')
+EXCLUDED_COUNTRIES = PATTERNS['excluded_countries']
+CLASSIFICATION_CACHE = ClassificationCache('merge_all_data', PATTERNS)
+VENUE_CLASSIFIER = PATTERNS.venue_classifier('venue_tiers_word')
+PRESTIGE_INDEX = PATTERNS.index('prestigious_institutions')
 
 
+@CLASSIFICATION_CACHE.memoize('venue_tiers_word')
 def get_venue_tier(venue):
-    if not venue:
-        return 'other'
-    v = venue.lower()
-    for pattern in PREPRINT_PATTERNS:
-        if re.search(pattern, v):
-            return 'preprint'
-    for pattern in TIER1_PATTERNS:
-        if re.search(pattern, v):
-            return 'tier1'
-    for pattern in TIER2_PATTERNS:
-        if re.search(pattern, v):
-            return 'tier2'
-    return 'other'
+    return VENUE_CLASSIFIER.tier(venue)
 
 
 def get_venue_score(tier):
     return {'tier1': 50, 'tier2': 35, 'preprint': 10, 'other': 20}[tier]
 
 
+@CLASSIFICATION_CACHE.memoize('prestigious_institutions')
 def is_prestigious(text):
     if not text:
         return False
-    t = text.lower()
-    return any(inst in t for inst in PRESTIGIOUS_INSTITUTIONS)
+    return PRESTIGE_INDEX.lookup_word(text) is not None
+
+
+BATCH_CLASSIFIER = BatchClassifier(get_venue_tier, is_prestigious=is_prestigious,
+                                   is_self_citation=is_self_citation)
+
+
+def clean_affiliation(affiliation):
+    """Drop CitationMap's placeholder affiliations"""
+    if not affiliation or affiliation in ['AI_ML', 'GENAI', 'Security', 'No_author_info', 'No_author_found']:
+        return ''
+    return affiliation
 
 
 def normalize_country(country):
@@ -159,148 +134,136 @@ def main():
         
         # Get venue info and links by paper title
         for paper in serpapi_data.get('citingPapers', []):
-            title_key = paper.get('title', '').lower().strip()
+            title = paper.get('title', '')
             if paper.get('venue') and paper['venue'] != 'Unknown':
-                serpapi_venues[title_key] = paper['venue']
+                serpapi_venues[title] = paper['venue']
             if paper.get('link'):
-                serpapi_links[title_key] = paper['link']
+                serpapi_links[title] = paper['link']
         
         # Keep publications from SerpAPI (has citation counts)
         serpapi_pubs = serpapi_data.get('publications', [])
         print(f"Loaded {len(serpapi_venues)} venue records from SerpAPI")
         print(f"Loaded {len(serpapi_links)} link records from SerpAPI")
         print(f"Loaded {len(serpapi_pubs)} publications from SerpAPI")
+    # CSV titles are joined to the SerpAPI records by exact or near-duplicate title
+    serpapi_venues = TitleJoin(serpapi_venues)
+    serpapi_links = TitleJoin(serpapi_links)
     
     # Parse CitationMap CSV
     print(f"\nReading CitationMap CSV: {csv_path}")
     
-    papers_by_title = {}
-    locations_map = {}
+    papers_by_title = {}  # canonical title -> paper
+    titles = TitleIndex()
+    locations_map = LocationMap()
     publications_set = set()
     self_citations_filtered = 0
-    all_authors = set()
+    all_authors = set()  # author ids
     
     with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            author = row.get('citing author name', '')
-            citing_title = row.get('citing paper title', '')
-            cited_title = row.get('cited paper title', '')
-            affiliation = row.get('affiliation', '')
-            lat = row.get('latitude', '')
-            lng = row.get('longitude', '')
-            country = row.get('country', '')
-            city = row.get('city', '')
-            
-            if cited_title:
-                publications_set.add(cited_title)
-            
-            # Filter self-citations
-            if is_self_citation(author):
-                self_citations_filtered += 1
-                continue
-            
-            if not citing_title:
-                continue
-            
-            # Filter geocoding noise
-            if country in EXCLUDED_COUNTRIES:
-                continue
-            
-            # Clean affiliation
-            clean_aff = affiliation if affiliation and affiliation not in [
-                'AI_ML', 'GENAI', 'Security', 'No_author_info', 'No_author_found'
-            ] else ''
-            
-            # Get venue from SerpAPI data
-            title_key = citing_title.lower().strip()
-            venue = serpapi_venues.get(title_key, '')
-            tier = get_venue_tier(venue)
-            score = get_venue_score(tier)
-            
-            # Normalize country
-            norm_country = normalize_country(country)
-            
-            # Check prestigious
-            is_prest = is_prestigious(clean_aff) or is_prestigious(venue)
-            
-            if author:
-                all_authors.add(author)
+        rows = list(csv.DictReader(f))
+    
+    # Classify each column once over its distinct values
+    authors = [row.get('citing author name', '') for row in rows]
+    author_index = AuthorIndex(authors)
+    clean_affs = [clean_affiliation(row.get('affiliation', '')) for row in rows]
+    venues = [serpapi_venues.get(row.get('citing paper title', ''), '') for row in rows]
+    classified = BATCH_CLASSIFIER.classify_batch(venues, clean_affs, authors)
+    
+    for i, row in enumerate(rows):
+        author = authors[i]
+        citing_title = row.get('citing paper title', '')
+        cited_title = row.get('cited paper title', '')
+        lat = row.get('latitude', '')
+        lng = row.get('longitude', '')
+        country = row.get('country', '')
+        city = row.get('city', '')
+        
+        if cited_title:
+            publications_set.add(cited_title)
+        
+        # Filter self-citations
+        if classified['isSelfCitation'][i]:
+            self_citations_filtered += 1
+            continue
+        
+        if not citing_title:
+            continue
+        
+        # Filter geocoding noise
+        if country in EXCLUDED_COUNTRIES:
+            continue
+        
+        clean_aff = clean_affs[i]
+        venue = venues[i]
+        tier = classified['tier'][i]
+        score = classified['venueScore'][i]
+        
+        # Normalize country
+        norm_country = normalize_country(country)
+        
+        is_prest = classified['isPrestigious'][i]
+        
+        author_id = author_index.resolve(author)
+        if author_id:
+            all_authors.add(author_id)
+        
+        paper_key = titles.canonical(citing_title)
+        if paper_key not in papers_by_title:
+            # Get link from SerpAPI data or generate fallback
+            paper_link = serpapi_links.get(citing_title, '') or generate_paper_link(citing_title, venue)
             
-            if citing_title not in papers_by_title:
-                # Get link from SerpAPI data or generate fallback
-                paper_link = serpapi_links.get(title_key, '') or generate_paper_link(citing_title, venue)
-                
-                papers_by_title[citing_title] = {
-                    'title': citing_title,
-                    'authors': [author] if author else [],
-                    'authors_set': {author} if author else set(),  # For dedup tracking
-                    'venue': venue,
-                    'link': paper_link,
-                    'citationCount': 0,
-                    'influenceScore': score,
-                    'venueScore': score,
-                    'citationScore': 0,
-                    'citedPublication': cited_title,
-                    'citedPublications': [cited_title] if cited_title else [],  # Track all cited papers
-                    'affiliation': clean_aff or 'Unknown',
-                    'affiliations': [clean_aff] if clean_aff else [],
-                    'country': norm_country,
-                    'tier': tier,
-                    'isPrestigious': is_prest
-                }
-            else:
-                # Add author if not already in this paper's author list
-                if author and author not in papers_by_title[citing_title]['authors_set']:
-                    papers_by_title[citing_title]['authors'].append(author)
-                    papers_by_title[citing_title]['authors_set'].add(author)
-                # Track all cited publications
-                if cited_title and cited_title not in papers_by_title[citing_title]['citedPublications']:
-                    papers_by_title[citing_title]['citedPublications'].append(cited_title)
-                if clean_aff and clean_aff not in papers_by_title[citing_title]['affiliations']:
-                    papers_by_title[citing_title]['affiliations'].append(clean_aff)
-                    if papers_by_title[citing_title]['affiliation'] == 'Unknown':
-                        papers_by_title[citing_title]['affiliation'] = clean_aff
-                if norm_country != 'Unknown' and papers_by_title[citing_title]['country'] == 'Unknown':
-                    papers_by_title[citing_title]['country'] = norm_country
-                if is_prest:
-                    papers_by_title[citing_title]['isPrestigious'] = True
+            papers_by_title[paper_key] = {
+                'title': citing_title,
+                'authors': [author] if author else [],
+                'authors_set': {author_id} if author_id else set(),  # Author ids, for dedup tracking
+                'venue': venue,
+                'link': paper_link,
+                'citationCount': 0,
+                'influenceScore': score,
+                'venueScore': score,
+                'citationScore': 0,
+                'citedPublication': cited_title,
+                'citedPublications': [cited_title] if cited_title else [],  # Track all cited papers
+                'affiliation': clean_aff or 'Unknown',
+                'affiliations': [clean_aff] if clean_aff else [],
+                'country': norm_country,
+                'tier': tier,
+                'isPrestigious': is_prest
+            }
+        else:
+            # Add author if not already in this paper's author list
+            if author_id and author_id not in papers_by_title[paper_key]['authors_set']:
+                papers_by_title[paper_key]['authors'].append(author)
+                papers_by_title[paper_key]['authors_set'].add(author_id)
+            # Track all cited publications
+            if cited_title and cited_title not in papers_by_title[paper_key]['citedPublications']:
+                papers_by_title[paper_key]['citedPublications'].append(cited_title)
+            if clean_aff and clean_aff not in papers_by_title[paper_key]['affiliations']:
+                papers_by_title[paper_key]['affiliations'].append(clean_aff)
+                if papers_by_title[paper_key]['affiliation'] == 'Unknown':
+                    papers_by_title[paper_key]['affiliation'] = clean_aff
+            if norm_country != 'Unknown' and papers_by_title[paper_key]['country'] == 'Unknown':
+                papers_by_title[paper_key]['country'] = norm_country
+            if is_prest:
+                papers_by_title[paper_key]['isPrestigious'] = True
+        
+        # Aggregate locations
+        try:
+            lat_f = float(lat) if lat else None
+            lng_f = float(lng) if lng else None
             
-            # Aggregate locations
-            try:
-                lat_f = float(lat) if lat else None
-                lng_f = float(lng) if lng else None
-                
-                if lat_f and lng_f and country and country not in EXCLUDED_COUNTRIES:
-                    key = f"{lat_f:.1f},{lng_f:.1f}"
-                    
-                    if key not in locations_map:
-                        locations_map[key] = {
-                            'latitude': lat_f,
-                            'longitude': lng_f,
-                            'country': norm_country,
-                            'city': city or '',
-                            'count': 0,
-                            'papers': [],
-                            'affiliations': []
-                        }
-                    
-                    locations_map[key]['count'] += 1
-                    
-                    if len(locations_map[key]['papers']) < 10 and citing_title not in locations_map[key]['papers']:
-                        locations_map[key]['papers'].append(citing_title)
-                    
-                    if clean_aff and clean_aff not in locations_map[key]['affiliations']:
-                        locations_map[key]['affiliations'].append(clean_aff)
-            except (ValueError, TypeError):
-                pass
-    
+            if lat_f and lng_f and country and country not in EXCLUDED_COUNTRIES:
+                paper_title = papers_by_title[paper_key]['title']
+                locations_map.add(lat_f, lng_f, norm_country, city or '', paper_title, [clean_aff])
+        except (ValueError, TypeError):
+            pass
+
     # Convert to lists and clean up internal tracking fields
     citing_papers = []
     for paper in papers_by_title.values():
         paper.pop('authors_set', None)  # Remove tracking set
         citing_papers.append(paper)
-    locations = sorted(locations_map.values(), key=lambda x: x['count'], reverse=True)
+    locations = sorted(locations_map.locations(), key=lambda x: x['count'], reverse=True)
     
     # Calculate stats
     tier_counts = {'tier1': 0, 'tier2': 0, 'other': 0, 'preprint': 0}
@@ -336,9 +299,11 @@ def main():
     citation_data = {
         'lastUpdated': time.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
         'scholarId': SCHOLAR_ID,
+        'patternHashes': PATTERNS.tag(*PATTERN_TABLES),
         'publications': publications,
         'citingPapers': citing_papers,
         'locations': locations,
+        'clusterLayers': cluster_layers(locations),
         'stats': {
             'totalCitations': len(citing_papers),
             'uniqueLocations': len(locations),
@@ -379,6 +344,13 @@ def main():
     print(f"  Unique countries: {len(country_counts)}")
     print(f"  Unique citing authors: {len(all_authors)}")
     print(f"  Author-citation pairs: {total_author_citations}")
+    print(f"  Classification cache: {CLASSIFICATION_CACHE.summary()}")
+    print(f"  Self-citation matcher: {SELF_CITATIONS.summary()}")
+    print(f"  Title clusters: {titles.summary()}")
+    print(f"  Authors: {author_index.summary()}")
+    print(f"  SerpAPI venue join: {serpapi_venues.summary()}")
+    print(f"  SerpAPI link join: {serpapi_links.summary()}")
+    titles.save_decisions('merge_all_data')
     
     print(f"\n{'='*40}")
     print("VENUE DISTRIBUTION")
@@ -4,246 +4,218 @@ Merge CitationMap CSV (rich location data) with SerpAPI fetch (venue data).
 Best of both worlds: accurate venues + detailed affiliations/locations.
 """
 
+import argparse
 import csv
 import json
 import os
-import re
 import time
-import urllib.request
 from collections import defaultdict
 from pathlib import Path
 
+from author_index import AuthorIndex
+from batch_classify import BatchClassifier
+from classification_cache import ClassificationCache
+from fetch_planner import plan_fetches
+from http_client import default_client
+from location_aggregate import LocationMap
+from pattern_registry import load_pattern_registry
+from self_citation import load_self_citation_matcher
+from serpapi_fetch import author_url, fetch_all_citations, fetch_url, rate_limiter
+from spatial_index import cluster_layers
+from title_index import TitleIndex
+from title_join import TitleJoin
+
 SERPAPI_KEY = os.environ.get('SERPAPI_KEY')
 SCHOLAR_ID = 'hIVoKbIAAAAJ'
 
-# Self-citation patterns
-SELF_NAMES = [
-    'vineeth sai', 'vs narajala', 'vineeth sai narajala', 'v. s. narajala', 
-    'narajala, v', 'narajala, vineeth', 'v s narajala', 'vineeth narajala',
-    'v narajala', 'narajala v'
-]
+# Calls the venue fetch may spend: the author profile plus ten first pages, as before
+DEFAULT_BUDGET = 11
 
-TIER1_PATTERNS = [
-    'ieee', 'ieee transactions', 'ieee access', 'acm', 'dl.acm.org',
-    'usenix', 'ndss', 'ccs', 's&p', 'infocom', 'security', 'crypto',
-    'neurips', 'icml', 'iclr', 'cvpr', 'aaai', 'ijcai', 'springer'
-]
+# Profile owner's name aliases are in self_citation_aliases.json
+SELF_CITATIONS = load_self_citation_matcher(SCHOLAR_ID)
 
-TIER2_PATTERNS = [
-    'elsevier', 'nature', 'science', 'plos', 'wiley', 'mdpi',
-    'journal of', 'transactions on', 'international journal',
-    'conference on', 'symposium on', 'workshop on', 'proceedings',
-    'ceur-ws', 'openreview', 'pubmed'
-]
 
-PREPRINT_PATTERNS = [
-    'arxiv', 'preprint', 'ssrn', 'biorxiv', 'medrxiv',
-    'researchgate', 'researchsquare', 'f1000research', 'zenodo'
-]
+def is_self_citation(author_name):
+    return SELF_CITATIONS.is_self(author_name)
 
 
-def is_self_citation(author_name):
-    if not author_name:
-        return False
-    return any(name in author_name.lower() for name in SELF_NAMES)
+# Venue, institution and coordinate tables are in pattern_registry.json
+PATTERNS = load_pattern_registry()
+PATTERN_TABLES = ('venue_tiers_substring',)
+CLASSIFICATION_CACHE = ClassificationCache('merge_citation_data', PATTERNS)
+VENUE_CLASSIFIER = PATTERNS.venue_classifier('venue_tiers_substring')
 
 
+@CLASSIFICATION_CACHE.memoize('venue_tiers_substring')
 def get_venue_tier(venue):
-    if not venue:
-        return 'other'
-    v = venue.lower()
-    if any(p in v for p in PREPRINT_PATTERNS):
-        return 'preprint'
-    if any(p in v for p in TIER1_PATTERNS):
-        return 'tier1'
-    if any(p in v for p in TIER2_PATTERNS):
-        return 'tier2'
-    return 'other'
+    return VENUE_CLASSIFIER.tier(venue)
 
 
 def get_venue_score(tier):
     return {'tier1': 50, 'tier2': 35, 'preprint': 10, 'other': 20}[tier]
 
 
-def normalize_title(title):
-    """Normalize title for matching"""
-    return re.sub(r'[^a-z0-9]', '', title.lower())[:50]
+BATCH_CLASSIFIER = BatchClassifier(get_venue_tier, is_self_citation=is_self_citation)
 
 
-def fetch_serpapi_venues():
-    """Fetch venue data from SerpAPI"""
+def fetch_serpapi_venues(budget=DEFAULT_BUDGET):
+    """Fetch venue data from SerpAPI, spending at most `budget` calls"""
     if not SERPAPI_KEY:
         print("  No SERPAPI_KEY, skipping venue fetch")
         return {}
     
     print("Fetching venue data from SerpAPI...")
-    venues = {}  # normalized_title -> venue
+    venues = {}  # citing paper title -> venue
     
     try:
         # Get author's publications
-        url = f"https://serpapi.com/search.json?engine=google_scholar_author&author_id={SCHOLAR_ID}&api_key={SERPAPI_KEY}"
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            data = json.loads(resp.read().decode())
+        data = fetch_url(author_url(SCHOLAR_ID, SERPAPI_KEY))
+        if not data:
+            print("  Error fetching publications from SerpAPI")
+            return venues
         
         articles = data.get('articles', [])
         print(f"  Found {len(articles)} publications")
         
-        # For each publication, get citing papers (limited)
-        for i, article in enumerate(articles[:10]):  # Limit to first 10 pubs
-            cites_id = article.get('cited_by', {}).get('cites_id')
-            if not cites_id:
-                continue
-            
-            print(f"  [{i+1}] Fetching citations for: {article['title'][:40]}...")
-            
-            # Get first page of citations
-            cite_url = f"https://serpapi.com/search.json?engine=google_scholar&cites={cites_id}&api_key={SERPAPI_KEY}"
-            req = urllib.request.Request(cite_url, headers={'User-Agent': 'Mozilla/5.0'})
-            
-            try:
-                with urllib.request.urlopen(req, timeout=30) as resp:
-                    cite_data = json.loads(resp.read().decode())
-                
-                results = cite_data.get('organic_results', [])
-                for r in results:
-                    title = r.get('title', '')
-                    pub_info = r.get('publication_info', {})
-                    venue = pub_info.get('summary', '')
-                    
-                    if title and venue:
-                        key = normalize_title(title)
-                        venues[key] = venue
-                
-                print(f"      Got {len(results)} citing papers")
-            except Exception as e:
-                print(f"      Error: {e}")
-            
-            time.sleep(1)  # Rate limit
+        # Spend the remaining calls on the pages that cover the most citing papers
+        publications = [{
+            'title': a.get('title', ''),
+            'citesId': a.get('cited_by', {}).get('cites_id'),
+            'citationCount': a.get('cited_by', {}).get('value', 0) or 0,
+        } for a in articles]
+        plan = plan_fetches(publications, budget, max_pages=5)
+        print(f"  {plan.report()}")
+        
+        fetched = fetch_all_citations(list(plan.page_limits()), SERPAPI_KEY,
+                                      max_pages=plan.page_limits(), fetch=fetch_url)
+        for pub, _, _, _ in plan.entries:
+            papers = fetched.get(pub['citesId'], [])
+            for paper in papers:
+                if paper['title'] and paper['venue']:
+                    venues[paper['title']] = paper['venue']
+            print(f"  {pub['title'][:40]}...: {len(papers)} citing papers")
+
     except Exception as e:
         print(f"  Error fetching from SerpAPI: {e}")
     
     print(f"  Total venues collected: {len(venues)}")
+    print(f"  HTTP: {default_client.summary()}")
+    print(f"  Rate limiter: {rate_limiter.summary()}")
     return venues
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Merge CitationMap CSV with SerpAPI venue data')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f'max SerpAPI calls for the venue fetch (default {DEFAULT_BUDGET})')
+    args = parser.parse_args(argv)
+    
     script_dir = Path(__file__).parent
     csv_path = script_dir / 'citation_info.csv'
     output_path = script_dir.parent / 'src' / 'data' / 'citations.json'
     
-    # Fetch venue data from SerpAPI
-    venue_map = fetch_serpapi_venues()
+    # Fetch venue data from SerpAPI; CSV titles join to it by exact or near-duplicate title
+    venue_map = TitleJoin(fetch_serpapi_venues(args.budget))
     
     print(f"\nReading CitationMap CSV: {csv_path}")
     
     # Parse CitationMap CSV for location data
-    papers_by_title = {}
-    locations_map = {}
+    papers_by_title = {}  # canonical title -> paper
+    titles = TitleIndex()
+    paper_authors = {}  # paper key -> ids of the authors listed on it
+    locations_map = LocationMap()
     publications_set = set()
     self_citations_filtered = 0
     
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    
     # First pass: collect country info for each paper title
     paper_countries = {}
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            citing_title = row.get('citing paper title', '')
-            country = row.get('country', '')
-            if citing_title and country and citing_title not in paper_countries:
-                paper_countries[citing_title] = country
+    for row in rows:
+        citing_title = row.get('citing paper title', '')
+        country = row.get('country', '')
+        if citing_title and country and citing_title not in paper_countries:
+            paper_countries[citing_title] = country
     
-    # Second pass: process papers
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            author = row.get('citing author name', '')
-            citing_title = row.get('citing paper title', '')
-            cited_title = row.get('cited paper title', '')
-            affiliation = row.get('affiliation', '')
-            lat = row.get('latitude', '')
-            lng = row.get('longitude', '')
-            country = row.get('country', '')
-            city = row.get('city', '')
-            
-            if cited_title:
-                publications_set.add(cited_title)
-            
-            if is_self_citation(author):
-                self_citations_filtered += 1
-                continue
-            
-            if not citing_title:
-                continue
-            
-            # Look up venue from SerpAPI data
-            title_key = normalize_title(citing_title)
-            venue = venue_map.get(title_key, '')
-            tier = get_venue_tier(venue)
-            score = get_venue_score(tier)
-            
-            # Clean affiliation
-            clean_aff = affiliation if affiliation and affiliation not in ['AI_ML', 'GENAI', 'Security', 'No_author_info'] else ''
-            
-            # Get country for this paper
-            paper_country = paper_countries.get(citing_title, country) or 'Unknown'
-            
-            if citing_title not in papers_by_title:
-                papers_by_title[citing_title] = {
-                    'title': citing_title,
-                    'authors': [author] if author else [],
-                    'venue': venue,
-                    'link': '',
-                    'citationCount': 0,
-                    'influenceScore': score,
-                    'venueScore': score,
-                    'citationScore': 0,
-                    'citedPublication': cited_title,
-                    'affiliation': clean_aff or 'Unknown',
-                    'country': paper_country
-                }
-            else:
-                if author and author not in papers_by_title[citing_title]['authors']:
-                    papers_by_title[citing_title]['authors'].append(author)
-                # Update affiliation if better
-                if clean_aff and papers_by_title[citing_title]['affiliation'] == 'Unknown':
-                    papers_by_title[citing_title]['affiliation'] = clean_aff
-                # Update country if better
-                if paper_country and paper_country != 'Unknown' and papers_by_title[citing_title].get('country') == 'Unknown':
-                    papers_by_title[citing_title]['country'] = paper_country
-            
-            # Aggregate locations
-            try:
-                lat_f = float(lat) if lat else None
-                lng_f = float(lng) if lng else None
-                
-                if lat_f and lng_f and country:
-                    key = f"{lat_f:.1f},{lng_f:.1f}"
-                    
-                    if key not in locations_map:
-                        locations_map[key] = {
-                            'latitude': lat_f,
-                            'longitude': lng_f,
-                            'country': country,
-                            'city': city or '',
-                            'count': 0,
-                            'papers': [],
-                            'affiliations': []
-                        }
-                    
-                    locations_map[key]['count'] += 1
-                    
-                    if len(locations_map[key]['papers']) < 10 and citing_title not in locations_map[key]['papers']:
-                        locations_map[key]['papers'].append(citing_title)
-                    
-                    if clean_aff and clean_aff not in locations_map[key]['affiliations']:
-                        locations_map[key]['affiliations'].append(clean_aff)
-            except (ValueError, TypeError):
-                pass
+    # Second pass: process papers, classifying each column once over its distinct values
+    authors = [row.get('citing author name', '') for row in rows]
+    author_index = AuthorIndex(authors)
+    # Look up venue from SerpAPI data
+    venues = [venue_map.get(row.get('citing paper title', ''), '') for row in rows]
+    classified = BATCH_CLASSIFIER.classify_batch(venues, authors=authors)
     
+    for i, row in enumerate(rows):
+        author = authors[i]
+        citing_title = row.get('citing paper title', '')
+        cited_title = row.get('cited paper title', '')
+        affiliation = row.get('affiliation', '')
+        lat = row.get('latitude', '')
+        lng = row.get('longitude', '')
+        country = row.get('country', '')
+        city = row.get('city', '')
+        
+        if cited_title:
+            publications_set.add(cited_title)
+        
+        if classified['isSelfCitation'][i]:
+            self_citations_filtered += 1
+            continue
+        
+        if not citing_title:
+            continue
+        
+        venue = venues[i]
+        score = classified['venueScore'][i]
+        
+        # Clean affiliation
+        clean_aff = affiliation if affiliation and affiliation not in ['AI_ML', 'GENAI', 'Security', 'No_author_info'] else ''
+        
+        # Get country for this paper
+        paper_country = paper_countries.get(citing_title, country) or 'Unknown'
+        
+        paper_key = titles.canonical(citing_title)
+        author_id = author_index.resolve(author)
+        if paper_key not in papers_by_title:
+            papers_by_title[paper_key] = {
+                'title': citing_title,
+                'authors': [author] if author else [],
+                'venue': venue,
+                'link': '',
+                'citationCount': 0,
+                'influenceScore': score,
+                'venueScore': score,
+                'citationScore': 0,
+                'citedPublication': cited_title,
+                'affiliation': clean_aff or 'Unknown',
+                'country': paper_country
+            }
+            paper_authors[paper_key] = {author_id} if author_id else set()
+        else:
+            if author_id and author_id not in paper_authors[paper_key]:
+                paper_authors[paper_key].add(author_id)
+                papers_by_title[paper_key]['authors'].append(author)
+            # Update affiliation if better
+            if clean_aff and papers_by_title[paper_key]['affiliation'] == 'Unknown':
+                papers_by_title[paper_key]['affiliation'] = clean_aff
+            # Update country if better
+            if paper_country and paper_country != 'Unknown' and papers_by_title[paper_key].get('country') == 'Unknown':
+                papers_by_title[paper_key]['country'] = paper_country
+        
+        # Aggregate locations
+        try:
+            lat_f = float(lat) if lat else None
+            lng_f = float(lng) if lng else None
+            
+            if lat_f and lng_f and country:
+                paper_title = papers_by_title[paper_key]['title']
+                locations_map.add(lat_f, lng_f, country, city or '', paper_title, [clean_aff])
+        except (ValueError, TypeError):
+            pass
+
     # Convert to lists
     citing_papers = list(papers_by_title.values())
-    locations = list(locations_map.values())
+    locations = locations_map.locations()
     locations.sort(key=lambda x: x['count'], reverse=True)
     
     # Calculate tier stats
@@ -264,9 +236,11 @@ def main():
     citation_data = {
         'lastUpdated': time.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
         'scholarId': SCHOLAR_ID,
+        'patternHashes': PATTERNS.tag(*PATTERN_TABLES),
         'publications': publications,
         'citingPapers': citing_papers,
         'locations': locations,
+        'clusterLayers': cluster_layers(locations),
         'stats': {
             'totalCitations': len(citing_papers),
             'uniqueLocations': len(locations),
@@ -289,6 +263,12 @@ def main():
     print(f"  Citing papers: {len(citing_papers)}")
     print(f"  Locations: {len(locations)}")
     print(f"  Self-citations filtered: {self_citations_filtered}")
+    print(f"  Classification cache: {CLASSIFICATION_CACHE.summary()}")
+    print(f"  Self-citation matcher: {SELF_CITATIONS.summary()}")
+    print(f"  Title clusters: {titles.summary()}")
+    print(f"  Authors: {author_index.summary()}")
+    print(f"  SerpAPI venue join: {venue_map.summary()}")
+    titles.save_decisions('merge_citation_data')
     print(f"\nVenue Tiers:")
     print(f"  Tier 1 (IEEE/ACM): {tier_counts['tier1']}")
     print(f"  Tier 2 (Peer-reviewed): {tier_counts['tier2']}")
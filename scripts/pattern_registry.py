@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Shared registry of the classification tables used by the citation scripts.
+Venue tiers, prestigious institutions and the coordinate tables live in
+pattern_registry.json instead of being copied into every script. The registry
+is loaded and compiled once per process, and every table carries a content
+hash: memoized results and citations.json record the hashes they were
+computed from, so a table edit invalidates exactly what depended on it.
+"""
+
+import functools
+import hashlib
+import json
+from pathlib import Path
+
+from affiliation_index import AffiliationIndex
+from venue_classifier import VenueClassifier
+
+REGISTRY_PATH = Path(__file__).parent / 'pattern_registry.json'
+
+# Bumped when the way a table is matched changes without its content changing,
+# so results computed under the old rules are invalidated like a table edit.
+# prestigious_institutions 2: names only match as whole words
+MATCHING_REVISIONS = {'prestigious_institutions': 2}
+
+
+def table_hash(tables):
+    """Short content hash of one or more tables"""
+    encoded = json.dumps(tables, sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+class PatternRegistry:
+    """Named tables with per-table content hashes and compiled matchers
+
+    Venue tier tables hold preprint/tier1/tier2 lists and whether they are
+    \\b regexes or plain substrings; coordinate tables are matched as
+    substrings of the lowercased text and prestigious institutions as whole
+    words of it.
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.hashes = {name: table_hash([table, MATCHING_REVISIONS[name]] if name in MATCHING_REVISIONS else table)
+                       for name, table in tables.items()}
+        self._compiled = {}
+
+    @classmethod
+    def from_file(cls, path=REGISTRY_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    def hash(self, *names):
+        """Content hash of the named tables taken together"""
+        if len(names) == 1:
+            return self.hashes[names[0]]
+        return table_hash([self.hashes[name] for name in names])
+
+    def tag(self, *names):
+        """{table: hash} to store alongside results derived from the tables"""
+        return {name: self.hashes[name] for name in names}
+
+    def stale(self, tag, *names):
+        """Those of names whose hash in a stored tag is missing or out of date"""
+        tag = tag or {}
+        return {name for name in names if tag.get(name) != self.hashes[name]}
+
+    def _compile(self, key, build):
+        if key not in self._compiled:
+            self._compiled[key] = build()
+        return self._compiled[key]
+
+    def venue_classifier(self, name):
+        table = self.tables[name]
+        return self._compile(('venue', name), lambda: VenueClassifier(
+            table['preprint'], table['tier1'], table['tier2'], regex=table['regex']))
+
+    def index(self, *names, weights=None):
+        """AffiliationIndex over the named tables; lists map each entry to True"""
+        tables = [t if isinstance(t, dict) else dict.fromkeys(t, True)
+                  for t in (self.tables[name] for name in names)]
+        key = ('index', names, tuple(weights) if weights else None)
+        return self._compile(key, lambda: AffiliationIndex(*tables, weights=weights))
+
+
+@functools.lru_cache(maxsize=None)
+def load_pattern_registry(path=REGISTRY_PATH):
+    """The registry at path, loaded and compiled once per process"""
+    return PatternRegistry.from_file(path)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Adaptive token-bucket rate limiter for SerpAPI requests.
+Ramps the request rate up additively while responses succeed, halves it on
+429/5xx, honors Retry-After and rate-limit headers, and keeps track of how long
+it has held requests back.
+"""
+
+import email.utils
+import threading
+import time
+
+# Header names carrying the remaining quota and its reset time, most specific first
+REMAINING_HEADERS = ('x-ratelimit-remaining', 'ratelimit-remaining')
+RESET_HEADERS = ('x-ratelimit-reset', 'ratelimit-reset')
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After value (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now or time.time()))
+
+
+def _header(headers, names):
+    for name in names:
+        if headers.get(name) not in (None, ''):
+            return headers[name]
+    return None
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe AIMD token bucket shared by every request in the process"""
+
+    def __init__(self, rate=2.0, min_rate=0.2, max_rate=10.0, burst=2, increase=0.1, decrease=0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.stats = {'requests': 0, 'throttled': 0, 'waited_seconds': 0.0, 'throttled_seconds': 0.0}
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def current_rate(self):
+        return self.rate
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """Block until a request may start; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                penalty = self._blocked_until - now
+                if penalty <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.stats['requests'] += 1
+                    self.stats['waited_seconds'] += waited
+                    return waited
+                if penalty > 0:
+                    delay = penalty
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def on_success(self, headers=None):
+        """Additive increase, capped by any quota the server advertises"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            cap = self._advertised_rate(headers or {})
+            if cap is not None:
+                self.rate = max(self.min_rate, min(self.rate, cap))
+
+    def on_throttle(self, headers=None):
+        """Multiplicative decrease on 429/5xx; pause everyone for Retry-After"""
+        headers = headers or {}
+        with self._lock:
+            self.stats['throttled'] += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            retry_after = parse_retry_after(headers.get('retry-after'))
+            if retry_after is None:
+                retry_after = 1.0 / self.rate
+            # Wall-clock time blocked: only the part of this pause not already covered counts
+            now = time.monotonic()
+            until = now + retry_after
+            self.stats['throttled_seconds'] += max(0.0, until - max(self._blocked_until, now))
+            self._blocked_until = max(self._blocked_until, until)
+
+    def _advertised_rate(self, headers):
+        remaining = _header(headers, REMAINING_HEADERS)
+        reset = _header(headers, RESET_HEADERS)
+        if remaining is None or reset is None:
+            return None
+        try:
+            remaining = float(remaining)
+            reset = float(reset)
+        except ValueError:
+            return None
+        if reset > 1e9:  # epoch timestamp rather than seconds from now
+            reset -= time.time()
+        if reset <= 0:
+            return None
+        return remaining / reset
+
+    def summary(self):
+        return (f"{self.stats['requests']} requests, rate now {self.rate:.2f}/s, "
+                f"{self.stats['throttled']} throttle responses, "
+                f"{self.stats['throttled_seconds']:.1f}s paused by Retry-After/backoff, "
+                f"{self.stats['waited_seconds']:.1f}s waited across all requests")
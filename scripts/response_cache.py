@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+On-disk SerpAPI response cache.
+Entries are content-addressed by the request URL with api_key removed, so a
+re-run after a crash or a pattern tweak replays fresh pages without spending
+API quota. A cites= page can also be stored with the publication's citation
+count, and is then only served while the caller still expects that count.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent / 'citation_cache' / 'responses'
+
+# Seconds a cached page stays fresh, per SerpAPI engine
+DEFAULT_TTLS = {
+    'google_scholar_author': 6 * 3600,   # author profile: citation counts move daily
+    'google_scholar': 7 * 24 * 3600,     # cites= pages: older pages rarely change
+}
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+SECRET_PARAMS = {'api_key'}
+
+
+def scrub_url(url):
+    """Drop api_key (and other secrets) from a URL and sort its query"""
+    parts = urllib.parse.urlsplit(url)
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+             if k not in SECRET_PARAMS]
+    query.sort()
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def url_engine(url):
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+    return query.get('engine', [''])[0]
+
+
+class ResponseCache:
+    """Size-bounded JSON response cache with per-engine TTLs"""
+
+    def __init__(self, cache_dir=CACHE_DIR, ttls=None, default_ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'writes': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._size = None
+
+    def key(self, url):
+        return hashlib.sha256(scrub_url(url).encode()).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def ttl_for(self, url):
+        return self.ttls.get(url_engine(url), self.default_ttl)
+
+    def get(self, url, citations=None):
+        """Return the cached payload for url, or None if missing or stale
+
+        With citations, an entry stored under a different citation count is stale.
+        """
+        path = self._path(self.key(url))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+
+        if (time.time() - entry.get('fetchedAt', 0) > self.ttl_for(url)
+                or citations is not None and entry.get('citations') != citations):
+            self._count('expired')
+            return None
+
+        os.utime(path)  # mtime doubles as last-access time for eviction
+        self._count('hits')
+        return entry['data']
+
+    def put(self, url, data, citations=None):
+        path = self._path(self.key(url))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {'url': scrub_url(url), 'engine': url_engine(url), 'fetchedAt': time.time(), 'data': data}
+        if citations is not None:
+            entry['citations'] = citations
+        body = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+
+        tmp = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)
+
+        with self._lock:
+            self.stats['writes'] += 1
+            if self._size is not None:
+                self._size += len(body) - old_size
+        self._evict()
+
+    def _entries(self):
+        return [p for p in self.cache_dir.glob('*/*.json') if p.is_file()]
+
+    def _evict(self):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self._entries())
+            if self._size <= self.max_bytes:
+                return
+            for path in sorted(self._entries(), key=lambda p: p.stat().st_mtime):
+                if self._size <= self.max_bytes:
+                    break
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except OSError:
+                    continue
+                self._size -= size
+                self.stats['evictions'] += 1
+
+    def summary(self):
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['expired']
+        hit_rate = self.stats['hits'] / lookups * 100 if lookups else 0.0
+        return (f"{self.stats['hits']} hits, {self.stats['misses']} misses, "
+                f"{self.stats['expired']} expired ({hit_rate:.0f}% hit rate), "
+                f"{self.stats['writes']} writes, {self.stats['evictions']} evictions")
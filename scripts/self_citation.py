@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Self-citation matching on canonicalized author names.
+Author strings come as "Vineeth Sai Narajala" from CitationMap, "VS Narajala"
+or "V Narajala…" from Google Scholar and "Narajala, Vineeth" from other
+sources. Each profile's aliases in self_citation_aliases.json are expanded
+once into every initials/order variant, and every author string is reduced
+to the same canonical form, so a check is one set lookup instead of a
+substring scan over a hand-maintained list of spellings.
+"""
+
+import functools
+import json
+import re
+import unicodedata
+from collections import Counter
+from itertools import product
+from pathlib import Path
+
+ALIASES_PATH = Path(__file__).parent / 'self_citation_aliases.json'
+
+WORD = re.compile(r'[^\W\d_]+')
+
+
+def strip_diacritics(text):
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+@functools.lru_cache(maxsize=65536)
+def canonical_name(name):
+    """'Narajala, V. S.', 'VS Narajala…' -> 'v s narajala'
+
+    Comma order is flipped to given-names-first, diacritics and punctuation
+    are dropped, and all-caps clusters of two or three letters ("VS") are
+    split into initials. A name written entirely in capitals ("KEN HUANG")
+    has no case to tell initials from short names by, so its words are
+    kept whole.
+    """
+    name = strip_diacritics(name or '')
+    if ',' in name:
+        last, _, given = name.partition(',')
+        name = f"{given} {last}"
+    all_caps = name.isupper()
+    tokens = []
+    for word in WORD.findall(name):
+        if not all_caps and word.isupper() and 2 <= len(word) <= 3:
+            tokens.extend(word)
+        else:
+            tokens.append(word)
+    return ' '.join(t.lower() for t in tokens)
+
+
+def name_variants(full_name):
+    """Canonical keys for a full name: each given name full or as an initial,
+    middle names optionally dropped, in given-last and last-given order"""
+    tokens = canonical_name(full_name).split()
+    if len(tokens) < 2:
+        return {' '.join(tokens)} if tokens else set()
+    *given, last = tokens
+    first, middles = given[0], given[1:]
+    choices = [[first, first[0]]] + [[m, m[0], None] for m in middles]
+    keys = set()
+    for combo in product(*choices):
+        parts = [p for p in combo if p]
+        keys.add(' '.join(parts + [last]))
+        keys.add(' '.join([last] + parts))
+    return keys
+
+
+class SelfCitationMatcher:
+    """O(1) self-citation check against a profile's expanded alias keys"""
+
+    def __init__(self, names=(), exact=()):
+        self.keys = set()
+        for name in names:
+            self.keys.update(name_variants(name))
+        # Partial names are only trusted spelled out exactly, not abbreviated
+        self.keys.update(canonical_name(name) for name in exact)
+        self.keys.discard('')
+        self.stats = {'lookups': 0, 'matches': 0}
+        self.matched = Counter()
+
+    @classmethod
+    def from_config(cls, scholar_id=None, path=ALIASES_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+        profile = profiles[scholar_id] if scholar_id else next(iter(profiles.values()))
+        return cls(profile.get('names', []), profile.get('exact', []))
+
+    def is_self(self, author_name):
+        if not author_name:
+            return False
+        self.stats['lookups'] += 1
+        if canonical_name(author_name) in self.keys:
+            self.stats['matches'] += 1
+            self.matched[author_name] += 1
+            return True
+        return False
+
+    def summary(self):
+        spellings = ', '.join(f"{name!r} x{count}" for name, count in self.matched.most_common(5))
+        return (f"{self.stats['matches']} of {self.stats['lookups']} author checks matched"
+                + (f" ({spellings})" if spellings else ''))
+
+
+@functools.lru_cache(maxsize=None)
+def load_self_citation_matcher(scholar_id=None):
+    """The shared matcher for scholar_id (or the only configured profile)"""
+    return SelfCitationMatcher.from_config(scholar_id)
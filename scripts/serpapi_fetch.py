@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Shared SerpAPI fetch helpers for the citation scripts.
+Provides the retrying, cached fetch_url, the citing-page parser and an asyncio
+engine that pages through many publications at once under the shared adaptive
+rate limiter, either collecting every page or streaming them as they arrive.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+from collections import defaultdict
+
+from http_client import HttpError, default_client
+from rate_limiter import AdaptiveRateLimiter
+from response_cache import ResponseCache
+
+# Point SERPAPI_BASE_URL at serpapi_standin.py to benchmark without spending quota
+SERPAPI_BASE_URL = os.environ.get('SERPAPI_BASE_URL', 'https://serpapi.com').rstrip('/')
+SERPAPI_URL = f'{SERPAPI_BASE_URL}/search.json'
+
+# Requests allowed in flight across all publications, and the starting request rate
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 2.0  # requests per second
+RESULTS_PER_PAGE = 10
+
+# Retry on throttling and server errors; other 4xx responses will not get better
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+rate_limiter = AdaptiveRateLimiter(rate=DEFAULT_RATE)
+
+# Set SERPAPI_NO_CACHE=1 to always hit the network
+response_cache = None if os.environ.get('SERPAPI_NO_CACHE') else ResponseCache()
+
+
+def author_url(scholar_id, api_key):
+    return f"{SERPAPI_URL}?engine=google_scholar_author&author_id={scholar_id}&api_key={api_key}"
+
+
+def cites_url(cites_id, api_key, start=0):
+    return f"{SERPAPI_URL}?engine=google_scholar&cites={cites_id}&start={start}&api_key={api_key}"
+
+
+def cached_response(url, citations=None):
+    """Return a fresh cached payload for url, or None
+
+    cites= pages outlive the author profile in the cache, so with the
+    publication's citations count a page cached under another count is
+    stale: once the count moves, the publication is re-paged from the network.
+    """
+    return response_cache.get(url, citations) if response_cache else None
+
+
+def download_url(url, retries=3, citations=None):
+    """Fetch URL from the network with retries and store the result in the cache
+    (along with the citations count it was fetched for, if given)"""
+    for attempt in range(retries):
+        rate_limiter.acquire()
+        try:
+            response = default_client.get(url)
+            data = response.json()
+            rate_limiter.on_success(response.headers)
+            if response_cache and not data.get('error'):
+                response_cache.put(url, data, citations)
+            return data
+        except HttpError as e:
+            print(f"  HTTP Error {e.code}: {e.reason}")
+            if e.code not in RETRYABLE_STATUS:
+                return None
+            rate_limiter.on_throttle(e.headers)
+        except Exception as e:
+            print(f"  Error: {e}")
+            rate_limiter.on_throttle()
+    return None
+
+
+def fetch_url(url, retries=3, citations=None):
+    """Fetch URL with retries, serving fresh pages from the response cache"""
+    cached = cached_response(url, citations)
+    if cached is not None:
+        return cached
+    return download_url(url, retries, citations)
+
+
+def parse_citing_results(data, default_venue=''):
+    """Turn one google_scholar cites= page into citing paper dicts"""
+    papers = []
+    for r in data.get('organic_results', []):
+        pub_info = r.get('publication_info', {})
+        venue = pub_info.get('summary', default_venue)
+        authors = pub_info.get('authors', [])
+
+        papers.append({
+            'title': r.get('title', ''),
+            'venue': venue,
+            'authors': [a.get('name', '') for a in authors],
+            'authorIds': [a.get('author_id', '') for a in authors],  # Scholar IDs, '' if unlinked
+            'link': r.get('link', ''),
+            'citationCount': r.get('inline_links', {}).get('cited_by', {}).get('total', 0),
+            'snippet': r.get('snippet', '')
+        })
+    return papers
+
+
+class _PageLoader:
+    """Fetches cites= pages for one engine run and keeps its speculation counters"""
+
+    def __init__(self, api_key, concurrency, fetch, default_venue, journal, sink, expected_counts=None):
+        self.api_key = api_key
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.fetch = fetch
+        self.default_venue = default_venue
+        self.journal = journal
+        self.sink = sink
+        self.expected_counts = expected_counts or {}
+        self.stats = {'speculative': 0, 'wasted': 0, 'cancelled': 0}
+
+    async def _fetch(self, url, citations, started):
+        # Cache hits skip the rate limiter entirely
+        cached = cached_response(url, citations)
+        if cached is not None:
+            return cached
+        async with self.semaphore:
+            started.set()
+            return await asyncio.to_thread(self.fetch, url, citations=citations)
+
+    async def load(self, cites_id, start, started=None):
+        """Return (papers, has_next) for one page, or None if it could not be fetched"""
+        if self.journal:
+            entry = self.journal.get(cites_id, start)
+            if entry is not None:
+                return entry['papers'], entry['hasNext']
+
+        url = cites_url(cites_id, self.api_key, start)
+        data = await self._fetch(url, self.expected_counts.get(cites_id), started or asyncio.Event())
+        if not data:
+            return None
+
+        papers = parse_citing_results(data, self.default_venue)
+        has_next = bool(papers) and bool(data.get('pagination', {}).get('next'))
+        if self.journal:
+            self.journal.record(cites_id, start, papers, has_next)
+        return papers, has_next
+
+    async def paginate(self, cites_id, max_pages, first_page=0):
+        """Follow pagination.next one page at a time
+
+        Returns False if a page could not be fetched, True once the last page
+        or the page cap is reached.
+        """
+        start = first_page * RESULTS_PER_PAGE
+
+        while start < max_pages * RESULTS_PER_PAGE:
+            page = await self.load(cites_id, start)
+            if page is None:
+                return False
+
+            page_papers, has_next = page
+            await self.sink(cites_id, page_papers)
+
+            if not has_next:
+                break
+            start += RESULTS_PER_PAGE
+        return True
+
+    async def prefetch(self, cites_id, expected, max_pages):
+        """Request every page the expected citation count implies at once
+
+        Pages go to the sink in page order. Pages after the first short page are
+        cancelled if they have not been sent yet and counted as wasted if they have.
+        Returns False if a page could not be fetched, as paginate() does.
+        """
+        n_pages = min(max_pages, max(1, -(-expected // RESULTS_PER_PAGE)))
+        if n_pages <= 0:
+            return True
+        started = [asyncio.Event() for _ in range(n_pages)]
+        tasks = [
+            asyncio.create_task(self.load(cites_id, i * RESULTS_PER_PAGE, started[i]))
+            for i in range(n_pages)
+        ]
+        self.stats['speculative'] += n_pages - 1
+
+        last = n_pages
+        exhausted = failed = False
+        for i, task in enumerate(tasks):
+            page = await task
+            if page:
+                await self.sink(cites_id, page[0])
+            if page is None or not page[1]:
+                last = i + 1
+                exhausted = True
+                failed = page is None
+                break
+
+        for i in range(last, n_pages):
+            if started[i].is_set():
+                self.stats['wasted'] += 1
+            else:
+                tasks[i].cancel()
+                self.stats['cancelled'] += 1
+        await asyncio.gather(*tasks[last:], return_exceptions=True)
+
+        # The profile count was low: carry on serially from where the plan stopped
+        if not exhausted and n_pages < max_pages:
+            return await self.paginate(cites_id, max_pages, first_page=n_pages)
+        return not failed
+
+
+async def fetch_citations_async(cites_ids, api_key, max_pages=10, concurrency=DEFAULT_CONCURRENCY,
+                                fetch=download_url, default_venue='', journal=None,
+                                expected_counts=None, stats=None, sink=None, wait_turn=None):
+    """Page through every cites_id concurrently, returning {cites_id: papers}
+
+    With a sink, each page is awaited as sink(cites_id, papers) as soon as it is
+    in order, followed by sink(cites_id, None) once the publication is done, and
+    nothing is collected. With wait_turn, each publication awaits
+    wait_turn(cites_id) before requesting its first page. max_pages is a page cap for every publication or a
+    {cites_id: pages} plan.
+    With a FetchJournal, journaled pages are replayed and new pages recorded.
+    With expected_counts ({cites_id: citationCount}), every expected page of a
+    publication is requested at once instead of following pagination.next,
+    and cached pages are only reused while the count is unchanged;
+    speculation counters are written into stats if given, along with
+    stats['complete'], the cites_ids whose pages were all fetched up to their
+    last page or page cap.
+    """
+    cites_ids = list(dict.fromkeys(cites_ids))
+    results = {cid: [] for cid in cites_ids}
+
+    async def collect(cites_id, papers):
+        if papers is not None:
+            results[cites_id].extend(papers)
+
+    sink = sink or collect
+    loader = _PageLoader(api_key, concurrency, fetch, default_venue, journal, sink, expected_counts)
+    limits = max_pages if isinstance(max_pages, dict) else dict.fromkeys(cites_ids, max_pages)
+
+    complete = set()
+
+    async def run(cid):
+        if wait_turn is not None:
+            await wait_turn(cid)
+        if expected_counts is None:
+            finished = await loader.paginate(cid, limits.get(cid, 0))
+        else:
+            finished = await loader.prefetch(cid, expected_counts.get(cid, 0) or 0, limits.get(cid, 0))
+        if finished:
+            complete.add(cid)
+        await sink(cid, None)
+
+    await asyncio.gather(*(run(cid) for cid in cites_ids))
+
+    if stats is not None:
+        stats.update(loader.stats, complete=complete)
+    return {} if sink is not collect else results
+
+
+def fetch_all_citations(cites_ids, api_key, **kwargs):
+    """Blocking wrapper around fetch_citations_async for the scripts' main()"""
+    return asyncio.run(fetch_citations_async(cites_ids, api_key, **kwargs))
+
+
+class _OrderedSink:
+    """Engine sink that passes pages on grouped by publication, in cites_ids order
+
+    Pages of the publication at the cursor go straight to out. A later
+    publication's pages are held until its turn, so memory is bounded twice:
+    only publications within lookahead of the cursor may start fetching, and
+    a page for a later publication waits while max_held pages are held.
+    The publication at the cursor never waits on either, so it always drains.
+    """
+
+    def __init__(self, order, out, lookahead, max_held):
+        self.order = order
+        self.position = {cid: i for i, cid in enumerate(order)}
+        self.out = out  # queue.Queue the consumer reads
+        self.lookahead = lookahead
+        self.max_held = max_held
+        self.cursor = 0
+        self.held = defaultdict(list)
+        self.n_held = 0
+        self.finished = set()
+        self.changed = asyncio.Condition()
+
+    def _at_cursor(self, cites_id):
+        return self.cursor < len(self.order) and self.order[self.cursor] == cites_id
+
+    async def wait_turn(self, cites_id):
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.position[cites_id] <= self.cursor + self.lookahead)
+
+    async def __call__(self, cites_id, papers):
+        async with self.changed:
+            if papers is not None:
+                await self.changed.wait_for(lambda: self._at_cursor(cites_id) or self.n_held < self.max_held)
+            if papers is None:
+                self.finished.add(cites_id)
+            elif self._at_cursor(cites_id):
+                await asyncio.to_thread(self.out.put, (cites_id, papers))
+            else:
+                self.held[cites_id].append(papers)
+                self.n_held += 1
+            while self.cursor < len(self.order) and self.order[self.cursor] in self.finished:
+                self.cursor += 1
+                if self.cursor < len(self.order):
+                    next_id = self.order[self.cursor]
+                    for held_papers in self.held.pop(next_id, []):
+                        self.n_held -= 1
+                        await asyncio.to_thread(self.out.put, (next_id, held_papers))
+            self.changed.notify_all()
+
+
+def iter_citations(cites_ids, api_key, buffer_pages=64, lookahead=DEFAULT_CONCURRENCY, **kwargs):
+    """Yield (cites_id, papers) one page at a time while later pages are in flight
+
+    The engine runs on a background thread. Pages come out grouped by
+    publication in cites_ids order, so downstream dedup keeps the same record
+    on every run. At most buffer_pages pages wait for the consumer and as many
+    again are held for later publications; only the lookahead publications
+    after the one being consumed are fetched ahead.
+    """
+    order = list(dict.fromkeys(cites_ids))
+    pages = queue.Queue(maxsize=buffer_pages)
+    sink = _OrderedSink(order, pages, lookahead, buffer_pages)
+    done = object()
+    errors = []
+
+    def run():
+        try:
+            asyncio.run(fetch_citations_async(order, api_key, sink=sink, wait_turn=sink.wait_turn, **kwargs))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            pages.put(done)
+
+    thread = threading.Thread(target=run, name='serpapi-fetch', daemon=True)
+    thread.start()
+
+    while (item := pages.get()) is not done:
+        yield item
+
+    thread.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local SerpAPI stand-in for benchmarking and profiling the fetch path offline.
+Serves the google_scholar_author and google_scholar&cites= engines from
+recorded responses (a response cache directory) or synthetic data, with
+configurable latency, jitter, page counts and injected 429/5xx errors.
+
+Usage:
+    python3 serpapi_standin.py --port 8765 --latency 200 --jitter 80 --error-rate 0.05
+    SERPAPI_BASE_URL=http://127.0.0.1:8765 SERPAPI_KEY=test SERPAPI_NO_CACHE=1 \\
+        python3 full_citation_refresh.py --output /tmp/citations.json
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from response_cache import ResponseCache
+
+RECORDED_BASE_URL = 'https://serpapi.com'
+
+SYNTHETIC_VENUES = [
+    'arXiv preprint arXiv:2505.{n:05d}, 2025 - arxiv.org',
+    'IEEE Access, 2025 - ieeexplore.ieee.org',
+    'Proceedings of the 2025 ACM SIGSAC Conference on Computer and Communications Security',
+    'Journal of Information Security and Applications, 2025 - Elsevier',
+    'Electronics, 2025 - mdpi.com',
+    'Securing AI Agents: Foundations, Frameworks, and …, 2025 - Springer',
+    'researchgate.net',
+]
+SYNTHETIC_AFFILIATIONS = [
+    'Stanford University', 'Tsinghua University', 'University of Oxford', 'Cisco Systems',
+    'Ben-Gurion University of the Negev', 'National University of Singapore', 'KAIST',
+]
+
+
+class StandinConfig:
+    def __init__(self, args):
+        self.latency = args.latency / 1000.0
+        self.jitter = args.jitter / 1000.0
+        self.publications = args.publications
+        self.citations = args.citations
+        self.error_rate = args.error_rate
+        self.server_error_rate = args.server_error_rate
+        self.retry_after = args.retry_after
+        self.fixtures = ResponseCache(args.fixtures, default_ttl=math.inf, ttls={
+            'google_scholar_author': math.inf, 'google_scholar': math.inf,
+        }) if args.fixtures else None
+        self.random = random.Random(args.seed)
+        self.stats = {'requests': 0, 'fixture_hits': 0, 'synthetic': 0, '429': 0, '5xx': 0}
+        self.lock = threading.Lock()
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+    def latency_sample(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def citation_count(self, index):
+        # Deterministic long-tail: a few heavily cited publications, many light ones
+        return max(0, int(self.citations / (index + 1)))
+
+
+def synthetic_author(config, query):
+    articles = []
+    for i in range(config.publications):
+        count = config.citation_count(i)
+        articles.append({
+            'title': f'Synthetic publication {i}',
+            'link': f'https://scholar.google.com/citations?view_op=view_citation&citation_for_view=synthetic:{i}',
+            'publication': 'arXiv preprint arXiv:2504.0000' + str(i),
+            'year': '2025',
+            'cited_by': {'value': count, 'cites_id': str(1000 + i)},
+        })
+    return {'search_metadata': {'status': 'Success'}, 'articles': articles}
+
+
+def synthetic_cites(config, query):
+    cites_id = query.get('cites', ['0'])[0].split(',')[0]
+    start = int(query.get('start', ['0'])[0] or 0)
+    index = int(cites_id) - 1000 if cites_id.isdigit() else 0
+    total = config.citation_count(index)
+
+    results = []
+    for n in range(start, min(start + 10, total)):
+        seed = index * 100000 + n
+        results.append({
+            'title': f'Citing paper {n} of publication {index}',
+            'link': f'https://example.org/papers/{seed}',
+            'snippet': f'Work from {SYNTHETIC_AFFILIATIONS[seed % len(SYNTHETIC_AFFILIATIONS)]}, on agentic AI security.',
+            'publication_info': {
+                'summary': SYNTHETIC_VENUES[seed % len(SYNTHETIC_VENUES)].format(n=seed % 100000),
+                'authors': [{'name': f'A Author{seed % 97}'}, {'name': f'B Writer{seed % 89}'}],
+            },
+            'inline_links': {'cited_by': {'total': seed % 13}},
+        })
+
+    data = {'search_metadata': {'status': 'Success'}, 'organic_results': results}
+    if start + 10 < total:
+        data['pagination'] = {'next': f'/search.json?engine=google_scholar&cites={cites_id}&start={start + 10}'}
+    return data
+
+
+ENGINES = {
+    'google_scholar_author': synthetic_author,
+    'google_scholar': synthetic_cites,
+}
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body)
+                self.send_header('Content-Encoding', 'gzip')
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urllib.parse.urlsplit(self.path)
+            if parts.path == '/stats':
+                with config.lock:
+                    return self._send(200, dict(config.stats))
+            if parts.path != '/search.json':
+                return self._send(404, {'error': 'Not found'})
+
+            config.count('requests')
+            time.sleep(config.latency_sample())
+
+            if config.roll() < config.error_rate:
+                config.count('429')
+                return self._send(429, {'error': 'Rate limit exceeded'},
+                                  {'Retry-After': str(config.retry_after)})
+            if config.roll() < config.server_error_rate:
+                config.count('5xx')
+                return self._send(503, {'error': 'Service unavailable'})
+
+            query = urllib.parse.parse_qs(parts.query)
+            if config.fixtures:
+                recorded = config.fixtures.get(f"{RECORDED_BASE_URL}{parts.path}?{parts.query}")
+                if recorded is not None:
+                    config.count('fixture_hits')
+                    return self._send(200, recorded)
+
+            engine = ENGINES.get(query.get('engine', [''])[0])
+            if not engine:
+                return self._send(400, {'error': 'Unsupported engine'})
+            config.count('synthetic')
+            return self._send(200, engine(config, query))
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local SerpAPI stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=150, help='mean response latency in ms')
+    parser.add_argument('--jitter', type=float, default=50, help='uniform latency jitter in ms')
+    parser.add_argument('--publications', type=int, default=20, help='synthetic publications on the profile')
+    parser.add_argument('--citations', type=int, default=100,
+                        help='citations of the most cited synthetic publication (sets page counts)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 429')
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help='fraction answered 503')
+    parser.add_argument('--retry-after', type=float, default=1, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--fixtures', help='response cache directory to replay recorded responses from')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print(f"SerpAPI stand-in listening on http://{args.host}:{server.server_port}")
+    print(f"  Set SERPAPI_BASE_URL=http://{args.host}:{server.server_port} to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nStand-in stats: {config.stats}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
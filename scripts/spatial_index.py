@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Shared location bucketing and multi-resolution map clusters.
+Every script buckets citing-paper locations via location_key() at the
+precision it has always used (0.1 degrees, or 0.01 for the scripts that
+place institutions individually) instead of building .1f or .2f string keys.
+Coarser grouping is left to the cluster layers, precomputed in one pass:
+each location is geohashed once at the finest precision, and its coarser
+cells are prefixes of that hash. Each layer covers a zoom range, so the
+frontend draws only the layer for the current zoom instead of every location.
+"""
+
+from typing import NamedTuple
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Decimal places locations are rounded to before bucketing (0.1 deg, ~11 km),
+# and the finer grid of the scripts that keep nearby institutions apart
+LOCATION_DECIMALS = 1
+FINE_LOCATION_DECIMALS = 2
+
+
+class ClusterLevel(NamedTuple):
+    precision: int  # geohash characters
+    min_zoom: int   # Leaflet zoom levels the layer is drawn at
+    max_zoom: int
+
+
+# Geohash cells of 5000, 1250, 156 and 39 km; above the last layer's zoom
+# the map draws the locations themselves
+CLUSTER_LEVELS = (
+    ClusterLevel(1, 0, 1),
+    ClusterLevel(2, 2, 3),
+    ClusterLevel(3, 4, 6),
+    ClusterLevel(4, 7, 9),
+)
+
+
+def location_key(lat, lng, decimals=LOCATION_DECIMALS):
+    """Grid cell of a location: its coordinates rounded to decimals places"""
+    return round(lat, decimals), round(lng, decimals)
+
+
+def geohash(lat, lng, precision):
+    """Base-32 geohash of a point, precision characters long"""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    # Integer cell on each axis, clamped so 90 and 180 fall in the last cell
+    x = min(int((lng + 180.0) / 360.0 * (1 << lng_bits)), (1 << lng_bits) - 1)
+    y = min(int((lat + 90.0) / 180.0 * (1 << lat_bits)), (1 << lat_bits) - 1)
+    # Interleave, longitude bit first
+    code = 0
+    for i in range(bits):
+        if i % 2 == 0:
+            bit = (x >> (lng_bits - 1 - i // 2)) & 1
+        else:
+            bit = (y >> (lat_bits - 1 - i // 2)) & 1
+        code = (code << 1) | bit
+    return ''.join(GEOHASH_ALPHABET[(code >> (5 * (precision - 1 - i))) & 31] for i in range(precision))
+
+
+class _Cluster:
+    __slots__ = ('count', 'lat_sum', 'lng_sum', 'locations', 'label', 'label_count')
+
+    def __init__(self):
+        self.count = 0
+        self.lat_sum = 0.0
+        self.lng_sum = 0.0
+        self.locations = 0
+        self.label = ''
+        self.label_count = 0
+
+
+class ClusterIndex:
+    """Citation counts per geohash cell at every cluster level"""
+
+    def __init__(self, levels=CLUSTER_LEVELS):
+        self.levels = tuple(levels)
+        self.precision = max(level.precision for level in self.levels)
+        self._cells = [{} for _ in self.levels]
+        self.points = 0
+
+    def add(self, lat, lng, count=1, label=''):
+        """Add a location carrying count citations; label names it (city or country)"""
+        self.points += 1
+        code = geohash(lat, lng, self.precision)
+        for level, cells in zip(self.levels, self._cells):
+            cell = code[:level.precision]
+            cluster = cells.get(cell)
+            if cluster is None:
+                cluster = cells[cell] = _Cluster()
+            cluster.count += count
+            cluster.lat_sum += lat * count
+            cluster.lng_sum += lng * count
+            cluster.locations += 1
+            # A cluster is named after its largest location
+            if label and count > cluster.label_count:
+                cluster.label, cluster.label_count = label, count
+
+    def layers(self):
+        """The citations.json clusterLayers: one layer per level, clusters largest first"""
+        layers = []
+        for level, cells in zip(self.levels, self._cells):
+            clusters = [{
+                'geohash': cell,
+                # Citation-weighted centroid, so a cluster sits where its citations are
+                'latitude': round(c.lat_sum / c.count, 4) if c.count else 0.0,
+                'longitude': round(c.lng_sum / c.count, 4) if c.count else 0.0,
+                'count': c.count,
+                'locations': c.locations,
+                'label': c.label,
+            } for cell, c in cells.items()]
+            clusters.sort(key=lambda c: (-c['count'], c['geohash']))
+            layers.append({
+                'precision': level.precision,
+                'minZoom': level.min_zoom,
+                'maxZoom': level.max_zoom,
+                'clusters': clusters,
+            })
+        return layers
+
+    def summary(self):
+        sizes = ', '.join(f"{len(cells)} at precision {level.precision}"
+                          for level, cells in zip(self.levels, self._cells))
+        return f"{self.points} locations -> {sizes}"
+
+
+def cluster_layers(locations, levels=CLUSTER_LEVELS):
+    """Cluster layers for a citations.json locations list"""
+    index = ClusterIndex(levels)
+    for loc in locations:
+        try:
+            lat, lng = float(loc['latitude']), float(loc['longitude'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        index.add(lat, lng, loc.get('count', 1), loc.get('city') or loc.get('country') or '')
+    return index.layers()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tests for affiliation_extract's batched extraction and bounded memo.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import unittest
+
+from affiliation_extract import AffiliationExtractor
+
+
+class AffiliationExtractorTest(unittest.TestCase):
+    def test_batch_keeps_text_order(self):
+        extractor = AffiliationExtractor()
+        texts = ['IEEE Access, Stanford University', 'arXiv preprint', 'IEEE Access, Stanford University']
+        picked = [extractor.pick(c) for c in extractor.extract_batch(texts)]
+        self.assertEqual([c.text if c else None for c in picked], ['Stanford University', None, 'Stanford University'])
+        self.assertEqual(extractor.stats['scanned'], 2)
+
+    def test_memo_is_bounded(self):
+        extractor = AffiliationExtractor(maxsize=2)
+        texts = [f'Paper {i}, Northern {i} University' for i in range(5)]
+        result = extractor.extract_batch(texts)
+        self.assertEqual([c[0].text for c in result], [f'Northern {i} University' for i in range(5)])
+        self.assertEqual(len(extractor._candidates), 2)
+        self.assertEqual(extractor.stats['evictions'], 3)
+
+    def test_recently_used_text_survives_eviction(self):
+        extractor = AffiliationExtractor(maxsize=2)
+        extractor.extract_batch(['A, Northern University', 'B, Southern University'])
+        extractor.extract_batch(['A, Northern University'])
+        extractor.extract_batch(['C, Western University'])
+        scanned = extractor.stats['scanned']
+        extractor.extract_batch(['A, Northern University'])
+        self.assertEqual(extractor.stats['scanned'], scanned)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for author_index's name and Scholar ID resolution.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import unittest
+
+from author_index import AuthorIndex
+
+
+class AuthorIndexTest(unittest.TestCase):
+    def test_all_caps_and_mixed_case_are_one_author(self):
+        index = AuthorIndex(['KEN HUANG', 'Ken Huang', 'VINEETH SAI NARAJALA', 'Vineeth Sai Narajala'])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.resolve('KEN HUANG'), index.resolve('Ken Huang'))
+
+    def test_abbreviation_of_all_caps_name_is_not_ambiguous(self):
+        index = AuthorIndex(['KEN HUANG', 'Ken Huang'])
+        self.assertEqual(index.resolve('K Huang'), index.resolve('Ken Huang'))
+        self.assertEqual(index.stats['ambiguous'], 0)
+        self.assertEqual(len(index), 1)
+
+    def test_initials_resolve_to_all_caps_full_name(self):
+        index = AuthorIndex(['VINEETH SAI NARAJALA'])
+        self.assertEqual(index.resolve('VS Narajala'), index.resolve('VINEETH SAI NARAJALA'))
+
+    def test_abbreviation_of_two_authors_stays_separate(self):
+        index = AuthorIndex(['Ken Huang', 'Kai Huang'])
+        self.assertNotIn(index.resolve('K Huang'), {index.resolve('Ken Huang'), index.resolve('Kai Huang')})
+        self.assertEqual(index.stats['ambiguous'], 1)
+
+    def test_scholar_id_joins_spellings(self):
+        index = AuthorIndex()
+        author = index.resolve('VS Narajala', 'hIVoKbIAAAAJ')
+        self.assertEqual(author, 'hIVoKbIAAAAJ')
+        self.assertEqual(index.resolve('V Narajala'), author)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for fetch_journal's crash-resume behaviour.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from fetch_journal import FetchJournal
+
+
+class FetchJournalResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'journal.jsonl'
+        journal = FetchJournal(self.path)
+        journal.record('1', 0, [{'title': 'First'}], True)
+        journal.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_torn_last_line_is_dropped_before_appending(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"citesId": "1", "start": 10, "pap')
+
+        journal = FetchJournal(self.path, resume=True)
+        self.assertIsNone(journal.get('1', 10))
+        journal.record('1', 10, [{'title': 'Second'}], False)
+        journal.close()
+
+        lines = self.path.read_text(encoding='utf-8').splitlines()
+        self.assertEqual([json.loads(line)['start'] for line in lines], [0, 10])
+        resumed = FetchJournal(self.path, resume=True)
+        self.assertEqual(resumed.get('1', 10)['papers'], [{'title': 'Second'}])
+        resumed.close()
+
+    def test_complete_journal_is_kept(self):
+        journal = FetchJournal(self.path, resume=True)
+        self.assertEqual(journal.get('1', 0)['papers'], [{'title': 'First'}])
+        journal.close()
+        self.assertEqual(len(self.path.read_text(encoding='utf-8').splitlines()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
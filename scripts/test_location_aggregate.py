@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for location_aggregate's top-k samples and bounded affiliation counts.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import unittest
+
+from location_aggregate import LocationAggregate, TopK
+
+
+class TopKTest(unittest.TestCase):
+    def test_membership_follows_evictions(self):
+        top = TopK(2)
+        top.add('a', rank=1)
+        top.add('b', rank=3)
+        top.add('c', rank=2)
+        self.assertEqual(top.items(), ['b', 'c'])
+        self.assertNotIn('a', top)
+        self.assertIn('b', top)
+        self.assertIn('c', top)
+
+    def test_rejected_item_is_not_a_member(self):
+        top = TopK(1)
+        top.add('a', rank=2)
+        top.add('b', rank=1)
+        self.assertNotIn('b', top)
+        self.assertIn('a', top)
+
+
+class LocationAggregateTest(unittest.TestCase):
+    def test_affiliation_counts_are_pruned_to_the_most_common(self):
+        location = LocationAggregate(0.0, 0.0, 'Nowhere', affiliation_limit=2, affiliation_capacity=4)
+        for _ in range(3):
+            location.add('Common paper', ['Common University', 'Second University'])
+        for i in range(20):
+            location.add(f'Paper {i}', [f'Rare University {i}'])
+            self.assertLessEqual(len(location.affiliations), 8)
+        self.assertEqual(location.top_affiliations(), ['Common University', 'Second University'])
+        self.assertEqual(location.count, 23)
+
+    def test_ties_stay_in_first_seen_order(self):
+        location = LocationAggregate(0.0, 0.0, 'Nowhere', affiliation_limit=2)
+        location.add('One', ['B University', 'A University', 'C University'])
+        self.assertEqual(location.top_affiliations(), ['B University', 'A University'])
+
+
+if __name__ == '__main__':
+    unittest.main()
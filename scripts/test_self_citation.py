@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for self_citation's name canonicalization and matching.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import unittest
+
+from self_citation import SelfCitationMatcher, canonical_name
+
+
+class CanonicalNameTest(unittest.TestCase):
+    def test_mixed_case_clusters_are_initials(self):
+        self.assertEqual(canonical_name('VS Narajala'), 'v s narajala')
+        self.assertEqual(canonical_name('Narajala, V. S.'), 'v s narajala')
+
+    def test_all_caps_names_keep_short_words(self):
+        self.assertEqual(canonical_name('KEN HUANG'), 'ken huang')
+        self.assertEqual(canonical_name('VINEETH SAI NARAJALA'), 'vineeth sai narajala')
+        self.assertEqual(canonical_name('HUANG, KEN'), 'ken huang')
+
+    def test_all_caps_matches_mixed_case(self):
+        for upper, mixed in [('KEN HUANG', 'Ken Huang'), ('VINEETH SAI NARAJALA', 'Vineeth Sai Narajala')]:
+            self.assertEqual(canonical_name(upper), canonical_name(mixed))
+
+
+class SelfCitationMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = SelfCitationMatcher(['Vineeth Sai Narajala'], exact=['Vineeth Sai'])
+
+    def test_all_caps_spellings_match(self):
+        self.assertTrue(self.matcher.is_self('VINEETH SAI NARAJALA'))
+        self.assertTrue(self.matcher.is_self('NARAJALA, VINEETH SAI'))
+        self.assertTrue(self.matcher.is_self('VINEETH SAI'))
+
+    def test_abbreviations_still_match(self):
+        self.assertTrue(self.matcher.is_self('VS Narajala'))
+        self.assertTrue(self.matcher.is_self('V Narajala'))
+
+    def test_other_authors_do_not_match(self):
+        self.assertFalse(self.matcher.is_self('KEN HUANG'))
+        self.assertFalse(self.matcher.is_self('Sai Kumar'))
+
+
+if __name__ == '__main__':
+    unittest.main()
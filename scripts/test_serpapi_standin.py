@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for replaying recorded SerpAPI responses through serpapi_standin.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import json
+import tempfile
+import threading
+import unittest
+import urllib.request
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+from response_cache import ResponseCache
+from serpapi_standin import RECORDED_BASE_URL, StandinConfig, make_handler
+
+RECORDED_URL = f"{RECORDED_BASE_URL}/search.json?engine=google_scholar&cites=123&start=0&api_key=secret"
+RECORDED_PAGE = {'organic_results': [{'title': 'A recorded citing paper'}], 'pagination': {}}
+
+
+class ResponseCacheCitationsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name)
+        self.cache.put(RECORDED_URL, RECORDED_PAGE, citations=12)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_page_is_served_while_the_count_matches(self):
+        self.assertEqual(self.cache.get(RECORDED_URL, citations=12), RECORDED_PAGE)
+        self.assertEqual(self.cache.get(RECORDED_URL), RECORDED_PAGE)
+
+    def test_page_for_another_count_is_stale(self):
+        self.assertIsNone(self.cache.get(RECORDED_URL, citations=13))
+        self.assertEqual(self.cache.stats['expired'], 1)
+
+
+class FixtureReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        ResponseCache(self.tmp.name).put(RECORDED_URL, RECORDED_PAGE, citations=12)
+        args = SimpleNamespace(latency=0, jitter=0, publications=1, citations=10, error_rate=0.0,
+                               server_error_rate=0.0, retry_after=1, fixtures=self.tmp.name, seed=0)
+        self.config = StandinConfig(args)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(self.config))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_recorded_cites_page_is_replayed(self):
+        url = (f"http://127.0.0.1:{self.server.server_port}"
+               f"/search.json?engine=google_scholar&cites=123&start=0&api_key=test")
+        with urllib.request.urlopen(url) as resp:
+            self.assertEqual(json.load(resp), RECORDED_PAGE)
+        self.assertEqual(self.config.stats['fixture_hits'], 1)
+        self.assertEqual(self.config.stats['synthetic'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for title_index's near-duplicate rules.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import unittest
+
+from title_index import TitleIndex, compare, fingerprint
+
+
+class CompareTest(unittest.TestCase):
+    def assertSame(self, a, b, reason):
+        match = compare(fingerprint(a), fingerprint(b))
+        self.assertIsNotNone(match)
+        self.assertEqual(match[0], reason)
+
+    def assertDifferent(self, a, b):
+        self.assertIsNone(compare(fingerprint(a), fingerprint(b)))
+
+    def test_longer_title_on_the_same_topic_is_not_a_prefix_match(self):
+        self.assertDifferent('A survey of large language models',
+                             'A survey of large language models for autonomous driving')
+        self.assertDifferent('Large language models for software engineering',
+                             'Large language models for software engineering and security')
+
+    def test_truncated_title_is_a_prefix_match(self):
+        self.assertSame('A survey of large language models for autono…',
+                        'A survey of large language models for autonomous driving', 'prefix')
+        self.assertSame('A survey of large language models for autonomous...',
+                        'A survey of large language models for autonomous driving', 'prefix')
+
+    def test_dropped_subtitle_is_a_prefix_match(self):
+        self.assertSame('Large language models for software engineering',
+                        'Large language models for software engineering: A systematic literature review',
+                        'prefix')
+        self.assertSame('Securing agentic AI systems in the enterprise',
+                        'Securing agentic AI systems in the enterprise - a threat model', 'prefix')
+
+    def test_short_prefix_does_not_merge(self):
+        self.assertDifferent('Agentic AI…', 'Agentic AI: A survey of threats')
+
+
+class TitleIndexTest(unittest.TestCase):
+    def test_survey_titles_stay_separate_clusters(self):
+        index = TitleIndex()
+        self.assertTrue(index.add('A survey of large language models'))
+        self.assertTrue(index.add('A survey of large language models for autonomous driving'))
+        self.assertEqual(len(index), 2)
+
+    def test_truncated_title_joins_its_cluster(self):
+        index = TitleIndex()
+        index.add('A survey of large language models for autonomous driving')
+        self.assertFalse(index.add('A survey of large language models for autonomous dri…'))
+        self.assertEqual(index.canonical('A survey of large language models for autonomous dri…'),
+                         'A survey of large language models for autonomous driving')
+
+
+if __name__ == '__main__':
+    unittest.main()
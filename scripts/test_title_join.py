@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Tests for title_join's fuzzy title lookups.
+Run with: python3 -m unittest discover -s scripts
+"""
+
+import unittest
+
+from title_join import TitleJoin
+
+
+class TitleJoinTest(unittest.TestCase):
+    def setUp(self):
+        self.join = TitleJoin({
+            'A survey of large language models for autonomous driving': 'driving',
+            'Large language models for software engineering: A systematic literature review': 'review',
+        })
+
+    def test_longer_title_on_the_same_topic_does_not_join(self):
+        self.assertIsNone(self.join.get('A survey of large language models'))
+        self.assertIsNone(self.join.match('A survey of large language models'))
+
+    def test_truncated_and_subtitle_free_titles_join(self):
+        self.assertEqual(self.join.get('A survey of large language models for autonomous dri…'), 'driving')
+        self.assertEqual(self.join.get('Large language models for software engineering'), 'review')
+        self.assertEqual(self.join.match('Large language models for software engineering').reason, 'prefix')
+
+    def test_summary_counts_only_joined_titles(self):
+        self.join.get('A survey of large language models')
+        self.join.get('large language models for software engineering: a systematic literature review')
+        self.assertEqual(self.join.stats['titles'], 2)
+        self.assertEqual(self.join.stats['exact'], 1)
+        self.assertEqual(self.join.stats['fuzzy'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
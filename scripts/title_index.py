@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate index for citing-paper titles.
+The same paper reaches the scripts under slightly different titles: CSV and
+cache titles with stray leading spaces, SerpAPI titles cut off with an
+ellipsis, dropped subtitles, different punctuation or casing. TitleIndex
+normalizes each title, shingles it into character n-grams and keeps a
+MinHash/LSH index plus a normalized-prefix index, so an insert or lookup
+only compares against the few titles sharing a band or prefix rather than
+every title seen so far. Every merge is logged with its reason and
+similarity so the clustering can be audited.
+"""
+
+import hashlib
+import json
+import re
+import struct
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple
+
+DECISIONS_DIR = Path(__file__).parent / 'citation_cache' / 'title_merges'
+
+SHINGLE_SIZE = 4
+# 16 bands of 4 rows: a pair at Jaccard 0.8 shares a band 99.9% of the time,
+# a pair at 0.3 about 13%, and those are rejected by the exact check
+NUM_PERM = 64
+BANDS = 16
+MERGE_THRESHOLD = 0.8
+# A title that is a prefix of another only merges if it was cut short there
+# (an ellipsis, or the longer title goes on with a subtitle) and the shared
+# prefix is at least this long
+MIN_PREFIX_CHARS = 32
+
+# One extendable-output digest per shingle supplies all NUM_PERM 32-bit hashes
+_HASHES = struct.Struct(f'<{NUM_PERM}I')
+
+ELLIPSIS = re.compile(r'(\.\.\.|…)\s*$')
+NON_WORD = re.compile(r'[^\w\s]')
+NUMBER = re.compile(r'\d+')
+SUBTITLE = re.compile(r':|\s[-–—]\s')
+
+
+def normalize_title(title):
+    """Casefolded title without accents, punctuation, trailing ellipsis or extra spaces"""
+    text = unicodedata.normalize('NFKD', title)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = NON_WORD.sub(' ', ELLIPSIS.sub('', text))
+    return ' '.join(text.split())
+
+
+def shingles(normalized):
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash(shingle_set):
+    rows = [_HASHES.unpack(hashlib.shake_128(s.encode('utf-8')).digest(_HASHES.size))
+            for s in shingle_set]
+    return tuple(map(min, zip(*rows)))
+
+
+class TitleFingerprint(NamedTuple):
+    normalized: str
+    shingles: frozenset
+    numbers: tuple
+    truncated: bool    # the raw title ends in an ellipsis
+    heads: frozenset   # normalized text before each subtitle separator
+
+
+def fingerprint(title):
+    normalized = normalize_title(title)
+    heads = frozenset(normalize_title(title[:m.start()]) for m in SUBTITLE.finditer(title))
+    return TitleFingerprint(normalized, frozenset(shingles(normalized)), tuple(NUMBER.findall(normalized)),
+                            bool(ELLIPSIS.search(title)), heads)
+
+
+def compare(a, b, threshold=MERGE_THRESHOLD, min_prefix=MIN_PREFIX_CHARS):
+    """(reason, similarity) if fingerprints a and b are the same title, else None"""
+    if a.normalized == b.normalized:
+        return 'normalized', 1.0
+    similarity = round(len(a.shingles & b.shingles) / len(a.shingles | b.shingles), 3)
+    shorter, longer = sorted((a, b), key=lambda fp: len(fp.normalized))
+    # "A survey of large language models" is a different paper from "A survey
+    # of large language models for autonomous driving": only a title that was
+    # truncated, or that is the longer one minus its subtitle, is a prefix match
+    if (len(shorter.normalized) >= min_prefix and longer.normalized.startswith(shorter.normalized)
+            and (shorter.truncated or shorter.normalized in longer.heads)):
+        return 'prefix', similarity
+    # Titles that differ only in a number (part 1/part 2, GPT-3/GPT-4, a
+    # year) are near-identical as shingles but are different papers
+    if similarity >= threshold and a.numbers == b.numbers:
+        return 'similar', similarity
+    return None
+
+
+class MergeDecision(NamedTuple):
+    title: str        # the title that was merged
+    canonical: str    # the title of the cluster it joined
+    reason: str       # 'normalized', 'prefix' or 'similar'
+    similarity: float  # Jaccard similarity of the two titles' shingles
+
+
+class TitleIndex:
+    """Clusters near-duplicate titles; the first title of a cluster is its canonical form"""
+
+    def __init__(self, threshold=MERGE_THRESHOLD, min_prefix=MIN_PREFIX_CHARS):
+        self.threshold = threshold
+        self.min_prefix = min_prefix
+        self.decisions = []
+        self.stats = {'titles': 0, 'clusters': 0, 'comparisons': 0}
+        self._canonical = {}        # stripped raw title -> canonical title
+        self._entries = []          # (fingerprint, canonical)
+        self._by_normalized = {}    # normalized -> entry index
+        self._bands = defaultdict(list)
+        self._prefixes = defaultdict(list)
+
+    def __len__(self):
+        return self.stats['clusters']
+
+    def _match(self, title, fp, signature):
+        normalized = fp.normalized
+        if normalized in self._by_normalized:
+            canonical = self._entries[self._by_normalized[normalized]][1]
+            return MergeDecision(title, canonical, 'normalized', 1.0)
+
+        rows = NUM_PERM // BANDS
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(self._bands.get((band, signature[band * rows:(band + 1) * rows]), ()))
+        if len(normalized) >= self.min_prefix:
+            candidates.update(self._prefixes.get(normalized[:self.min_prefix], ()))
+
+        best = None
+        for index in sorted(candidates):
+            other, canonical = self._entries[index]
+            self.stats['comparisons'] += 1
+            match = compare(fp, other, self.threshold, self.min_prefix)
+            if match and (best is None or match[1] > best.similarity):
+                best = MergeDecision(title, canonical, *match)
+        return best
+
+    def _insert(self, title):
+        """(canonical title, whether title started a new cluster)"""
+        key = title.strip()
+        if key in self._canonical:
+            return self._canonical[key], False
+        self.stats['titles'] += 1
+        fp = fingerprint(key)
+        if not fp.normalized:
+            self._canonical[key] = key
+            self.stats['clusters'] += 1
+            return key, True
+
+        signature = minhash(fp.shingles)
+        decision = self._match(key, fp, signature)
+        if decision:
+            self.decisions.append(decision)
+            canonical = decision.canonical
+        else:
+            canonical = key
+            self.stats['clusters'] += 1
+        self._canonical[key] = canonical
+
+        # Merged variants are indexed too, so later variants can match any of them
+        normalized = fp.normalized
+        if normalized not in self._by_normalized:
+            index = len(self._entries)
+            self._entries.append((fp, canonical))
+            self._by_normalized[normalized] = index
+            rows = NUM_PERM // BANDS
+            for band in range(BANDS):
+                self._bands[(band, signature[band * rows:(band + 1) * rows])].append(index)
+            if len(normalized) >= self.min_prefix:
+                self._prefixes[normalized[:self.min_prefix]].append(index)
+        return canonical, decision is None
+
+    def add(self, title):
+        """Index title; True if it starts a new cluster, False if it is a duplicate"""
+        return self._insert(title)[1]
+
+    def canonical(self, title):
+        """Canonical title of title's cluster, indexing it first if unseen"""
+        return self._insert(title)[0]
+
+    def summary(self):
+        reasons = defaultdict(int)
+        for decision in self.decisions:
+            reasons[decision.reason] += 1
+        merged = ', '.join(f"{n} {reason}" for reason, n in sorted(reasons.items())) or 'none'
+        return (f"{self.stats['titles']} distinct titles in {self.stats['clusters']} clusters, "
+                f"merged: {merged}, {self.stats['comparisons']} candidate comparisons")
+
+    def save_decisions(self, name, decisions_dir=DECISIONS_DIR):
+        """Write the merge decisions to <decisions_dir>/<name>.jsonl for auditing"""
+        path = Path(decisions_dir) / f'{name}.jsonl'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for decision in self.decisions:
+                f.write(json.dumps(decision._asdict(), ensure_ascii=False) + '\n')
+        return path
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Fuzzy join from the titles of one source to records keyed by title in another.
+SerpAPI citing papers and CitationMap CSV/pickle rows used to be joined on the
+exact lowercased title, so truncated SerpAPI titles, dropped subtitles and
+punctuation differences silently lost their venue, link or affiliation.
+TitleJoin blocks the records on their title words: a lookup only scores the
+records that share a reasonably rare word with it, with the same rules
+title_index merges on, so joining n titles against m records stays
+near-linear instead of n * m comparisons.
+"""
+
+from collections import defaultdict
+from typing import Any, NamedTuple
+
+from title_index import MERGE_THRESHOLD, MIN_PREFIX_CHARS, compare, fingerprint
+
+# Words shared by more records than this ('a', 'for', 'learning') are too
+# common to block on
+MAX_BLOCK_SIZE = 50
+# Candidates sharing the most blocking words that are actually scored
+MAX_CANDIDATES = 20
+
+
+class JoinMatch(NamedTuple):
+    title: str         # the title that was looked up
+    key: str           # the record title it joined to
+    value: Any         # the record
+    reason: str        # 'normalized', 'prefix' or 'similar'
+    similarity: float  # Jaccard similarity of the two titles' shingles
+
+
+class TitleJoin:
+    """Records keyed by title, looked up by the same or a near-duplicate title
+
+    A drop-in for the {title.lower().strip(): record} dicts: get() takes the
+    other source's raw title. Lookups are memoized and counted, so summary()
+    reports how much of the other source joined.
+    """
+
+    def __init__(self, records, threshold=MERGE_THRESHOLD, min_prefix=MIN_PREFIX_CHARS):
+        self.threshold = threshold
+        self.min_prefix = min_prefix
+        self.stats = {'titles': 0, 'exact': 0, 'fuzzy': 0, 'comparisons': 0}
+        self._matches = {}          # looked-up title -> JoinMatch or None
+        self._records = []          # (key, value, fingerprint)
+        self._by_normalized = {}    # normalized title -> record index
+        self._blocks = defaultdict(list)
+        for key, value in records.items():
+            fp = fingerprint(key)
+            if not fp.normalized:
+                continue
+            index = len(self._records)
+            self._records.append((key, value, fp))
+            # A later record with the same normalized title wins, as it did in the dicts
+            self._by_normalized[fp.normalized] = index
+            for word in set(fp.normalized.split()):
+                self._blocks[word].append(index)
+
+    def __len__(self):
+        return len(self._records)
+
+    def _match(self, title):
+        fp = fingerprint(title)
+        if not fp.normalized:
+            return None
+        index = self._by_normalized.get(fp.normalized)
+        if index is not None:
+            key, value, _ = self._records[index]
+            return JoinMatch(title, key, value, 'normalized', 1.0)
+
+        shared = defaultdict(int)
+        for word in set(fp.normalized.split()):
+            block = self._blocks.get(word, ())
+            if len(block) <= MAX_BLOCK_SIZE:
+                for index in block:
+                    shared[index] += 1
+        candidates = sorted(shared, key=lambda i: (-shared[i], i))[:MAX_CANDIDATES]
+
+        best = None
+        for index in candidates:
+            key, value, other = self._records[index]
+            self.stats['comparisons'] += 1
+            match = compare(fp, other, self.threshold, self.min_prefix)
+            if match and (best is None or match[1] > best.similarity):
+                best = JoinMatch(title, key, value, *match)
+        return best
+
+    def match(self, title):
+        """JoinMatch of the record title joins to, or None"""
+        if title not in self._matches:
+            self.stats['titles'] += 1
+            match = self._match(title)
+            if match:
+                self.stats['exact' if match.reason == 'normalized' else 'fuzzy'] += 1
+            self._matches[title] = match
+        return self._matches[title]
+
+    def get(self, title, default=None):
+        match = self.match(title) if title else None
+        return match.value if match else default
+
+    def summary(self):
+        joined = self.stats['exact'] + self.stats['fuzzy']
+        coverage = joined / self.stats['titles'] if self.stats['titles'] else 0.0
+        return (f"{joined}/{self.stats['titles']} titles joined ({coverage:.0%}): "
+                f"{self.stats['exact']} exact, {self.stats['fuzzy']} fuzzy, "
+                f"{self.stats['comparisons']} candidate comparisons")
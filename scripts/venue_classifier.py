@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Single-pass venue tier classifier shared by the citation scripts.
+Compiles the preprint, tier 1 and tier 2 pattern lists into one alternation
+regex and finds the highest-priority tier in a single scan of the venue
+string, instead of one re.search or substring test per pattern.
+"""
+
+import re
+
+# Highest priority first: a preprint mention wins over any tier 1/2 match
+TIERS = ('preprint', 'tier1', 'tier2')
+
+WORD = r'\b'
+NEVER = '(?!)'
+
+# Pattern fragments that are plain text and can go into a literal trie
+LITERAL = re.compile(r'[\w &\'-]+')
+
+
+def _trie(literals):
+    """Regex matching any of literals, factored on shared prefixes
+
+    sre tries alternation branches one by one at every position; a trie turns
+    that into one character test per level, which is what makes the compiled
+    matcher faster than a loop of `p in venue` substring checks.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+def _alternation(patterns, regex):
+    """One regex body matching any of patterns
+
+    Whole-word patterns (\\bfoo\\b) share a single \\b(?:...)\\b group: the same
+    matches, but it keeps every branch anchored on a word boundary, which lets
+    the regex engine skip most positions outright.
+    """
+    if not regex:
+        return _trie(patterns)
+    is_word = [p.startswith(WORD) and p.endswith(WORD) and len(p) > 4 for p in patterns]
+    words = [p[2:-2] for p, w in zip(patterns, is_word) if w]
+    branches = [f'(?:{p})' for p, w in zip(patterns, is_word) if not w]
+    if words:
+        literals = [w for w in words if LITERAL.fullmatch(w)]
+        fragments = [f'(?:{w})' for w in words if not LITERAL.fullmatch(w)]
+        if literals:
+            fragments.insert(0, _trie(literals))
+        branches.insert(0, WORD + '(?:' + '|'.join(fragments) + ')' + WORD)
+    return '|'.join(branches)
+
+
+class VenueClassifier:
+    """Classify venue text as preprint, tier1, tier2 or other
+
+    Patterns are regular expressions (the \\b-anchored tables) or, with
+    regex=False, plain substrings (the tables matched with `p in venue`).
+    Either way they are matched against the lowercased text, with the same
+    precedence as checking PREPRINT, TIER1 and TIER2 in turn.
+    """
+
+    def __init__(self, preprint, tier1, tier2, regex=True):
+        self.regex = regex
+        tables = (preprint, tier1, tier2)
+        if regex:
+            alternatives = [
+                f'(?P<{tier}>{_alternation(patterns, regex) if patterns else NEVER})'
+                for tier, patterns in zip(TIERS, tables)
+            ]
+            # patterns[r] matches any tier ranked r or better, so once a match is
+            # found only the tiers that could still outrank it are searched for
+            self.patterns = [re.compile('|'.join(alternatives[:r + 1])) for r in range(len(TIERS))]
+        else:
+            # Substrings share one trie; the longest literal matched at a position
+            # stands for every shorter literal that is a prefix of it
+            ranks = {}
+            for rank, patterns in enumerate(tables):
+                for literal in patterns:
+                    ranks.setdefault(literal, rank)
+            self.literal_ranks = {
+                literal: min(r for other, r in ranks.items() if literal.startswith(other))
+                for literal in ranks
+            }
+            self.patterns = [
+                re.compile(_trie([p for p, r in ranks.items() if r <= rank]) or NEVER)
+                for rank in range(len(TIERS))
+            ]
+
+    def _rank(self, match):
+        if self.regex:
+            return TIERS.index(match.lastgroup)
+        return self.literal_ranks[match.group()]
+
+    def tier(self, text):
+        if not text:
+            return 'other'
+        text = text.lower()
+        match = self.patterns[-1].search(text)
+        best = len(TIERS)
+        while match:
+            best = self._rank(match)
+            if best == 0:
+                break
+            # Resume one character in, not at the match end: a higher-priority
+            # pattern may start inside a lower-priority match
+            match = self.patterns[best - 1].search(text, match.start() + 1)
+        return TIERS[best] if best < len(TIERS) else 'other'
@@ -1,8 +1,8 @@
-import React, { useEffect, useRef } from 'react';
-import { MapContainer, TileLayer, Marker, Popup, useMap } from 'react-leaflet';
+import React, { useEffect, useRef, useState } from 'react';
+import { MapContainer, TileLayer, Marker, Popup, useMap, useMapEvents } from 'react-leaflet';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
-import type { CitationLocation } from '@/types/citations';
+import type { CitationLocation, ClusterLayer } from '@/types/citations';
 import { MapPin } from 'lucide-react';
 
 // Fix for default marker icons in React-Leaflet
@@ -60,16 +60,32 @@ const MapBounds: React.FC<MapBoundsProps> = ({ locations }) => {
   return null;
 };
 
+interface ZoomTrackerProps {
+  onZoom: (zoom: number) => void;
+}
+
+const ZoomTracker: React.FC<ZoomTrackerProps> = ({ onZoom }) => {
+  const map = useMapEvents({
+    zoomend: () => onZoom(map.getZoom()),
+  });
+  return null;
+};
+
 interface CitationMapProps {
   locations: CitationLocation[];
+  clusterLayers?: ClusterLayer[];
 }
 
-const CitationMap: React.FC<CitationMapProps> = ({ locations }) => {
+const CitationMap: React.FC<CitationMapProps> = ({ locations, clusterLayers }) => {
   const mapRef = useRef<L.Map | null>(null);
 
   // Default center (world view)
   const defaultCenter: [number, number] = [20, 0];
   const defaultZoom = 2;
+  const [zoom, setZoom] = useState(defaultZoom);
+
+  // Draw only the cluster layer for this zoom; past the last layer, the locations themselves
+  const clusterLayer = clusterLayers?.find(layer => zoom >= layer.minZoom && zoom <= layer.maxZoom);
 
   if (locations.length === 0) {
     return (
@@ -140,7 +156,30 @@ const CitationMap: React.FC<CitationMapProps> = ({ locations }) => {
           url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
         />
         <MapBounds locations={locations} />
-        {locations.map((location, index) => (
+        <ZoomTracker onZoom={setZoom} />
+        {clusterLayer && clusterLayer.clusters.map(cluster => (
+          <Marker
+            key={cluster.geohash}
+            position={[cluster.latitude, cluster.longitude]}
+            icon={createCustomIcon(cluster.count)}
+          >
+            <Popup>
+              <div className="text-white">
+                <h3 className="text-cyber-green font-semibold mb-2">
+                  {cluster.locations > 1 ? `${cluster.label} and nearby` : cluster.label}
+                </h3>
+                <p className="text-sm mb-2">
+                  <span className="text-cyber-green font-medium">{cluster.count}</span> citation{cluster.count !== 1 ? 's' : ''}
+                  {cluster.locations > 1 && ` from ${cluster.locations} locations`}
+                </p>
+                {cluster.locations > 1 && (
+                  <p className="text-xs text-gray-400">Zoom in for individual locations</p>
+                )}
+              </div>
+            </Popup>
+          </Marker>
+        ))}
+        {!clusterLayer && locations.map((location, index) => (
           <Marker
             key={index}
             position={[location.latitude, location.longitude]}
@@ -30,7 +30,7 @@ const normalizeCountry = (country: string): string => {
 
 const Citations = () => {
   const citationData = getCitationData();
-  const { citingPapers: allCitingPapers, locations, stats, lastUpdated, scholar } = citationData;
+  const { citingPapers: allCitingPapers, locations, clusterLayers, stats, lastUpdated, scholar } = citationData;
   const [activeTab, setActiveTab] = useState('map');
   const [selectedLocation, setSelectedLocation] = useState<CitationLocation | null>(null);
 
@@ -319,7 +319,7 @@ const Citations = () => {
                   <CitationGlobe
                     locations={locations}
                     onSelectLocation={setSelectedLocation}
-                    fallback={<CitationMap locations={locations} />}
+                    fallback={<CitationMap locations={locations} clusterLayers={clusterLayers} />}
                   />
                 </Suspense>
 
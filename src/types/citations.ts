@@ -7,6 +7,7 @@ export interface Publication {
   citationCount: number;
   resultId?: string;
   citesId?: string;
+  refreshPending?: boolean; // Not fully fetched yet; re-paged by the next incremental refresh
 }
 
 export interface CitingPaper {
@@ -42,6 +43,22 @@ export interface CitationLocation {
   affiliations: string[];
 }
 
+export interface LocationCluster {
+  geohash: string; // Geohash cell the cluster covers
+  latitude: number; // Citation-weighted centroid of its locations
+  longitude: number;
+  count: number;
+  locations: number; // Number of locations merged into the cluster
+  label: string; // City or country of its largest location
+}
+
+export interface ClusterLayer {
+  precision: number; // Geohash characters per cell
+  minZoom: number; // Map zoom levels the layer is drawn at
+  maxZoom: number;
+  clusters: LocationCluster[];
+}
+
 export interface CitationStats {
   totalCitations: number;
   uniqueLocations: number;
@@ -68,9 +85,11 @@ export interface ScholarMetrics {
 export interface CitationData {
   lastUpdated: string;
   scholarId: string;
+  patternHashes?: Record<string, string>; // Content hash of each classification table used
   scholar: ScholarMetrics;
   publications: Publication[];
   citingPapers: CitingPaper[];
   locations: CitationLocation[];
+  clusterLayers?: ClusterLayer[]; // Precomputed clusters per zoom range; raw locations past the last
   stats: CitationStats;
 }